@@ -0,0 +1,106 @@
+"""原子地生成输出文件。
+
+mkvmerge 先写入同目录下的临时文件 `<输出>.partial`，成功后 fsync 并用 os.replace 改名为最终文件名，
+失败或被停止时删除临时文件。因此最终文件名只会指向完整的输出，被杀掉的运行只会留下 .partial 文件，
+下次继续处理时由任务日志清理。
+
+开始合并前先检查输出所在文件系统的剩余空间是否足够（预计大小加上余量），空间不足时直接失败，
+而不是写到一半才出错。
+
+计划、统计、清单、任务日志和缓存等小文件用 write_atomic 写入：先写入 `<路径>.<pid>.tmp` 再改名，
+读取方不会看到写了一半的文件，失败时删除临时文件。
+"""
+
+import os
+import shutil
+import sys
+
+# 临时输出文件的后缀
+PARTIAL_SUFFIX = '.partial'
+# 检查剩余空间时额外保留的空间
+FREE_SPACE_MARGIN = 64 * 1024 * 1024
+
+
+def partial_path(output_file: str) -> str:
+    """输出文件对应的临时文件路径，与输出文件在同一目录（同一文件系统）下"""
+    return output_file + PARTIAL_SUFFIX
+
+
+def has_free_space(output_file: str, needed_bytes: int) -> bool:
+    """输出所在文件系统是否还有 needed_bytes 加上余量的空间，无法获取时视为足够"""
+    try:
+        free = shutil.disk_usage(os.path.dirname(os.path.abspath(output_file))).free
+    except OSError:
+        return True
+    return free >= needed_bytes + FREE_SPACE_MARGIN
+
+
+def _fsync_directory(directory: str) -> None:
+    """持久化目录项（改名）；Windows 不支持打开目录，跳过"""
+    if sys.platform == 'win32':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def commit(temp_file: str, output_file: str, sync: bool = True) -> None:
+    """
+    把写完的临时文件落盘后改名为最终文件
+
+    Args:
+        sync: 改名前 fsync 临时文件；临时文件是源文件的硬链接时传 False，
+            不以写方式打开（可能只读的）源文件，内容本来就已在磁盘上
+    """
+    if sync:
+        fd = os.open(temp_file, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    os.replace(temp_file, output_file)
+    _fsync_directory(os.path.dirname(os.path.abspath(output_file)))
+
+
+def discard(temp_file: str) -> bool:
+    """删除临时文件，返回是否删除了文件"""
+    try:
+        os.remove(temp_file)
+        return True
+    except OSError:
+        return False
+
+
+def write_atomic(path: str, text: str, sync: bool = False) -> None:
+    """
+    原子地写入文本文件（UTF-8），失败时删除临时文件并抛出原来的异常
+
+    Args:
+        path: 目标文件
+        text: 文件内容
+        sync: 改名前 fsync，断电后也不会丢失已写入的内容
+    """
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        discard(temp_path)
+        raise
+
+
+def copy_atomic(src_path: str, output_file: str) -> None:
+    """复制文件（保留时间戳），先写入临时文件再改名"""
+    temp_file = partial_path(output_file)
+    try:
+        shutil.copy2(src_path, temp_file)
+        commit(temp_file, output_file)
+    except BaseException:
+        discard(temp_file)
+        raise
@@ -0,0 +1,259 @@
+#!/usr/bin/python3
+"""mkvmerge-batch：不依赖 PyQt 的命令行入口，可在没有图形界面的服务器、容器或计划任务中使用。
+
+merge 生成并执行合并计划（或执行 plan 保存的计划），plan 只生成计划，scan-fonts 扫描字体库，
+resolve-fonts 查找字幕用到的字体文件。日志输出到标准错误（同时照常写入 logs/merge.log），
+--json 时标准输出只有一个 JSON 对象，方便脚本处理。本模块及其导入的模块都不导入 PyQt6。
+
+退出码：0 成功；1 merge 有合并失败或被取消的文件，resolve-fonts 有字幕的字体未找到；130 被 Ctrl+C 停止。
+merge 和 plan 中未找到的字体只写入日志（plan 的 --json 输出中为 missing_fonts），不影响退出码。
+第一次 Ctrl+C 与图形界面的停止按钮相同：不再启动新的合并，停止正在运行的 mkvmerge 并删除临时输出；
+第二次 Ctrl+C 立即退出。
+
+命令行用法:
+    python BatchCli.py merge INPUT OUTPUT [--jobs N] [--resume] [--force] [--json]
+    python BatchCli.py merge --plan PLAN [--jobs N] [--mkvmerge PATH]
+    python BatchCli.py plan INPUT OUTPUT -o plan.json [--export Makefile]
+    python BatchCli.py scan-fonts FONT_DIR
+    python BatchCli.py resolve-fonts SUBTITLE [SUBTITLE ...]
+"""
+
+import argparse
+import json
+import logging
+import re
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from CancelToken import CancelToken
+from FontManager import FontManager
+from LogManager import LogManager
+from MergeMkv import execute_plan, plan_merge, process_mkv_files
+from MergePlan import MergePlan
+from MuxScheduler import JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_SKIPPED, MuxResult
+from Passthrough import PASSTHROUGH_OFF, PASSTHROUGH_POLICIES
+from PlanExport import EXPORT_FORMATS, export_plan
+
+PROG = 'mkvmerge-batch'
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_STOPPED = 130
+
+
+class _PlainFormatter(logging.Formatter):
+    """去掉写给图形界面的 <font> 标签"""
+    _TAG = re.compile(r'</?font[^>]*>')
+
+    def format(self, record):
+        return self._TAG.sub('', super().format(record))
+
+
+def _setup_logging(quiet: bool) -> None:
+    """把日志同时输出到标准错误"""
+    if quiet:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_PlainFormatter('%(message)s'))
+    LogManager.get_logger().addHandler(handler)
+
+
+def _install_stop_handler() -> CancelToken:
+    """第一次 Ctrl+C 取消返回的令牌，第二次立即退出"""
+    cancel = CancelToken()
+
+    def on_interrupt(signum, frame):
+        if cancel.is_cancelled():
+            raise KeyboardInterrupt
+        # 取消回调会获取调度器的锁，不能在打断主线程的信号处理函数中直接执行
+        threading.Thread(target=cancel.cancel, name='cancel', daemon=True).start()
+        print('正在停止，再按一次 Ctrl+C 立即退出', file=sys.stderr)
+
+    signal.signal(signal.SIGINT, on_interrupt)
+    return cancel
+
+
+def _device_limit(value: str) -> Tuple[str, int]:
+    """解析 PATH=N"""
+    path, sep, limit = value.rpartition('=')
+    if not sep or not path or not limit.isdigit():
+        raise argparse.ArgumentTypeError(f'expected PATH=N, got {value!r}')
+    return path, int(limit)
+
+
+def _print_json(data: Any) -> None:
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+
+
+def _result_summary(results: List[MuxResult]) -> Dict[str, int]:
+    summary = {JOB_DONE: 0, JOB_SKIPPED: 0, JOB_FAILED: 0, JOB_CANCELLED: 0}
+    for result in results:
+        summary[result.status] = summary.get(result.status, 0) + 1
+    return summary
+
+
+def _report_results(results: Optional[List[MuxResult]], as_json: bool, wall_seconds: float) -> int:
+    """输出合并结果，返回退出码"""
+    if results is None:
+        if as_json:
+            _print_json({'stopped': True, 'results': [], 'summary': {}, 'wall_seconds': wall_seconds})
+        return EXIT_STOPPED
+    summary = _result_summary(results)
+    if as_json:
+        _print_json({
+            'stopped': False,
+            'results': [{
+                'index': result.job.index,
+                'input_file': result.job.input_file,
+                'output_file': result.job.output_file,
+                'status': result.status,
+                'return_code': result.return_code,
+            } for result in results],
+            'summary': summary,
+            'wall_seconds': wall_seconds,
+        })
+    else:
+        for result in results:
+            if result.status not in (JOB_DONE, JOB_SKIPPED):
+                print(f'{result.status}: {result.job.input_file}')
+        print(', '.join(f'{status}: {count}' for status, count in summary.items()) + f' ({wall_seconds:.1f}s)')
+    return EXIT_FAILED if summary[JOB_FAILED] or summary[JOB_CANCELLED] else EXIT_OK
+
+
+def _cmd_merge(args) -> int:
+    cancel = _install_stop_handler()
+    device_limits = dict(args.device_limit) if args.device_limit else None
+    started = time.monotonic()
+    if args.plan is not None:
+        if args.input is not None or args.output is not None:
+            raise SystemExit(f'{PROG} merge: INPUT and OUTPUT cannot be used with --plan')
+        results = execute_plan(MergePlan.load(args.plan), jobs=args.jobs, device_limits=device_limits,
+                               resume=args.resume, journal_path=args.journal, force=args.force,
+                               mkvmerge_path=args.mkvmerge, prometheus_path=args.prometheus, cancel=cancel)
+    else:
+        if args.input is None or args.output is None:
+            raise SystemExit(f'{PROG} merge: INPUT and OUTPUT are required without --plan')
+        results = process_mkv_files(args.input, args.output, execute=True, probe_workers=args.probe_workers,
+                                    jobs=args.jobs, device_limits=device_limits, resume=args.resume,
+                                    journal_path=args.journal, force=args.force, export=args.export,
+                                    prometheus_path=args.prometheus,
+                                    passthrough=args.passthrough, cancel=cancel)
+    return _report_results(results, args.json, time.monotonic() - started)
+
+
+def _cmd_plan(args) -> int:
+    cancel = _install_stop_handler()
+    plan = plan_merge(args.input, args.output, probe_workers=args.probe_workers, passthrough=args.passthrough,
+                      cancel=cancel)
+    if plan is None:
+        return EXIT_STOPPED
+    if args.plan_file is not None:
+        plan.save(args.plan_file)
+    if args.export is not None:
+        export_plan(plan, args.export, args.format)
+    if args.json:
+        _print_json(plan.to_dict())
+    else:
+        for job in plan.jobs:
+            print(job.shell_command)
+        print(f'{len(plan.jobs)} jobs, {plan.estimated_bytes / 1024 / 1024:.1f} MB, '
+              f'{len(plan.missing_fonts)} missing fonts', file=sys.stderr)
+    return EXIT_OK
+
+
+def _cmd_scan_fonts(args) -> int:
+    total = {'files': 0}
+
+    def on_progress(current: int, count: int) -> None:
+        total['files'] = count
+
+    started = time.monotonic()
+    FontManager(max_workers=args.jobs).scan_font_directory(args.font_dir, callback=on_progress)
+    wall_seconds = time.monotonic() - started
+    if args.json:
+        _print_json({'font_dir': args.font_dir, 'font_files': total['files'], 'wall_seconds': wall_seconds})
+    else:
+        print(f'{args.font_dir}: {total["files"]} font files ({wall_seconds:.1f}s)')
+    return EXIT_OK
+
+
+def _cmd_resolve_fonts(args) -> int:
+    font_manager = FontManager()
+    resolved = []
+    for subtitle in args.subtitles:
+        font_files, missing = font_manager.get_font_files_for_subtitle(subtitle, return_missing=True)
+        resolved.append({'subtitle': subtitle, 'font_files': sorted(font_files), 'missing': sorted(missing)})
+    if args.json:
+        _print_json(resolved)
+    else:
+        for item in resolved:
+            print(item['subtitle'])
+            for path in item['font_files']:
+                print(f'  {path}')
+            for name in item['missing']:
+                print(f'  missing: {name}')
+    return EXIT_FAILED if any(item['missing'] for item in resolved) else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true', help='Write a single JSON document to stdout')
+    common.add_argument('-q', '--quiet', action='store_true', help='Do not copy the log to stderr')
+
+    planning = argparse.ArgumentParser(add_help=False)
+    planning.add_argument('--probe-workers', type=int, default=8, help='Concurrent file identifications')
+    planning.add_argument('--passthrough', choices=PASSTHROUGH_POLICIES, default=PASSTHROUGH_OFF,
+                          help='Handling of .mkv files without subtitles (default: mux as usual)')
+
+    parser = argparse.ArgumentParser(prog=PROG, description='Batch mux videos with their subtitles and fonts, without the GUI')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+
+    merge_parser = subparsers.add_parser('merge', parents=[common, planning], help='Plan and run the merge')
+    merge_parser.add_argument('input', nargs='?', help='Input directory')
+    merge_parser.add_argument('output', nargs='?', help='Output directory')
+    merge_parser.add_argument('--plan', help='Run a plan saved by "plan -o" instead of scanning INPUT')
+    merge_parser.add_argument('-j', '--jobs', type=int, default=1, help='Concurrent mkvmerge processes')
+    merge_parser.add_argument('--device-limit', action='append', type=_device_limit, metavar='PATH=N',
+                              help='Concurrent jobs on the device holding PATH (repeatable)')
+    merge_parser.add_argument('--resume', action='store_true', help='Skip files finished by the previous run')
+    merge_parser.add_argument('--force', action='store_true', help='Remux even if the output manifest is up to date')
+    merge_parser.add_argument('--journal', help='Journal path (default: OUTPUT/mergemkv-journal.jsonl)')
+    merge_parser.add_argument('--mkvmerge', help='mkvmerge to use instead of the one recorded in --plan')
+    merge_parser.add_argument('--export', help='Also export the plan as a Makefile, *.ninja or *.sh')
+    merge_parser.add_argument('--prometheus', metavar='PROM', help='Write node_exporter textfile metrics here')
+    merge_parser.set_defaults(func=_cmd_merge)
+
+    plan_parser = subparsers.add_parser('plan', parents=[common, planning], help='Only build the merge plan')
+    plan_parser.add_argument('input', help='Input directory')
+    plan_parser.add_argument('output', help='Output directory')
+    plan_parser.add_argument('-o', '--plan-file', help='Save the plan as JSON')
+    plan_parser.add_argument('--export', help='Export the plan as a Makefile, *.ninja or *.sh')
+    plan_parser.add_argument('--format', choices=EXPORT_FORMATS, help='Export format (default: guessed from the file name)')
+    plan_parser.set_defaults(func=_cmd_plan)
+
+    scan_parser = subparsers.add_parser('scan-fonts', parents=[common], help='Index a font directory into fonts.db')
+    scan_parser.add_argument('font_dir', help='Font directory')
+    scan_parser.add_argument('-j', '--jobs', type=int, help='Worker threads (default: twice the CPU count)')
+    scan_parser.set_defaults(func=_cmd_scan_fonts)
+
+    resolve_parser = subparsers.add_parser('resolve-fonts', parents=[common],
+                                           help='List the font files used by subtitles')
+    resolve_parser.add_argument('subtitles', nargs='+', help='Subtitle files')
+    resolve_parser.set_defaults(func=_cmd_resolve_fonts)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    _setup_logging(args.quiet)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return EXIT_STOPPED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
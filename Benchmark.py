@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+"""性能基准测试。
+
+用法:
+    python Benchmark.py identify FILE [FILE ...] [--repeat N]
+    python Benchmark.py parse [JSON ...] [--streams N] [--repeat N]
+    python Benchmark.py memory [--tracks N] [--streams N]
+    python Benchmark.py command [JSON ...] [--tracks N] [--streams N]
+    python Benchmark.py startup [MODULE ...] [--repeat N] [--top N]
+"""
+
+import argparse
+import configparser
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Set, Tuple
+
+from MKVInfo import MkvInfo, decode
+from MatroskaReader import read_identification
+from MkvFile import MKVFile
+from Verification import _run_identify
+from utils import get_mkvmerge_path
+
+# 启动耗时预算（毫秒）：python -X importtime 中所测模块的累计导入耗时，与多次运行（默认 11 次）的中位数比较，
+# 超出预算时 startup 以非零状态退出。已有 .pyc 时每个模块 21 次运行的测量值（中位数，最小–最大）：
+#   空闲的机器：BatchCli 59 ms（56–62），MergeMkv 62 ms（57–83）；
+#   每个 CPU 都被占满时：BatchCli 166 ms（122–200），MergeMkv 142 ms（116–183）；
+#   评审时另一台机器上为 108–186 ms。
+# 没有 .pyc 或设置了 PYTHONDONTWRITEBYTECODE 时每次都要编译源码，还会多出几十毫秒。
+# 预算取满载时最大值的 1.5 倍，繁忙的 CI 上也不会误报，只用于发现成倍的退化；
+# 启动时误导入的大模块由 STARTUP_FORBIDDEN 检查，不依赖耗时。
+# MergeMkvGUI 在没有 PyQt6 的环境中无法测量，预算在 MergeMkv 的基础上为导入 PyQt6 留出约 200 ms。
+STARTUP_BUDGET_MS = {
+    'BatchCli': 300,
+    'MergeMkv': 300,
+    'MergeMkvGUI': 500,
+}
+# 启动时不应导入、只在首次使用时才导入的模块
+_LAZY_MODULES = ('fontTools', 'pysubs2', 'pymkv', 'pkg_resources', 'rich', 'coloredlogs', 'asyncio')
+STARTUP_FORBIDDEN = {
+    'BatchCli': _LAZY_MODULES + ('PyQt6',),
+    'MergeMkv': _LAZY_MODULES + ('PyQt6',),
+    'MergeMkvGUI': _LAZY_MODULES + ('FontScanWindow',),
+}
+
+
+def _time_call(func: Callable[[], object], repeat: int) -> float:
+    """返回多次调用的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def _command_fields(info_json: dict) -> List[tuple]:
+    """提取生成合并命令会用到的字段，用于比较两种识别方式的结果"""
+    config = configparser.ConfigParser()
+    config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'command-map.ini'))
+    keys = set()
+    for section in config.sections():
+        keys.update(config[section].keys())
+
+    mkv_info = MkvInfo.from_dict(info_json)
+    fields = [('title', mkv_info.container.properties.title)]
+    for track in mkv_info.tracks:
+        properties = track.properties.to_dict() if track.properties else {}
+        fields.append((track.id, track.type, sorted((k, str(v)) for k, v in properties.items()
+                                                    if k in keys and v is not None)))
+    return fields
+
+
+def _synthetic_m2ts(streams: int) -> dict:
+    """生成与蓝光 m2ts 的 mkvmerge -J 输出结构相同的识别信息：一条视频轨道，其余为 DTS 音轨和 PGS 字幕"""
+    tracks = [{'codec': 'HEVC/H.265/MPEG-H', 'id': 0, 'type': 'video', 'properties': {
+        'codec_id': 'V_MPEGH/ISO/HEVC', 'language': 'und', 'number': 4113, 'packetizer': 'mpegh_p2_es_video',
+        'pixel_dimensions': '3840x2160', 'program_number': 1, 'stream_id': 4113, 'multiplexed_tracks': [0, 1],
+        'default_track': True, 'enabled_track': True, 'forced_track': False, 'color_range': 1,
+        'min_luminance': 0.005, 'max_luminance': 1000, 'max_content_light': 1000}}]
+    for i in range(1, streams):
+        if i % 3:
+            tracks.append({'codec': 'HDMV PGS', 'id': i, 'type': 'subtitles', 'properties': {
+                'codec_id': 'S_HDMV/PGS', 'language': 'chi', 'number': 4608 + i, 'program_number': 1,
+                'stream_id': 4608 + i, 'default_track': False, 'forced_track': False, 'enabled_track': True,
+                'text_subtitles': False}})
+        else:
+            tracks.append({'codec': 'DTS-HD Master Audio', 'id': i, 'type': 'audio', 'properties': {
+                'codec_id': 'A_DTS', 'language': 'eng', 'number': 4352 + i, 'audio_channels': 8,
+                'audio_sampling_frequency': 48000, 'audio_bits_per_sample': 24, 'program_number': 1,
+                'stream_id': 4352 + i, 'default_track': False, 'enabled_track': True, 'forced_track': False}})
+    return {'attachments': [], 'chapters': [{'num_entries': 24}], 'container': {
+        'properties': {'container_type': 16, 'is_providing_timestamps': True, 'duration': 7200000000000,
+                       'programs': [{'program_number': 1, 'service_name': 'x', 'service_provider': 'y'}],
+                       'other_file': ['00001.m2ts']},
+        'recognized': True, 'supported': True, 'type': 'MPEG transport stream'},
+        'errors': [], 'file_name': 'BDMV/STREAM/00000.m2ts', 'global_tags': [],
+        'identification_format_version': 19, 'track_tags': [], 'tracks': tracks, 'warnings': []}
+
+
+def bench_identify(args) -> None:
+    """比较原生 Matroska 读取与 mkvmerge -J 的识别耗时"""
+    mkvmerge_path = get_mkvmerge_path()
+    print(f'{"file":<40} {"native ms":>10} {"mkvmerge ms":>12} {"speedup":>8}  match')
+    for file_path in args.files:
+        native_json = read_identification(file_path)
+        subprocess_ms = _time_call(lambda: _run_identify(file_path, mkvmerge_path), args.repeat)
+        name = os.path.basename(file_path)[:40]
+        if native_json is None:
+            print(f'{name:<40} {"-":>10} {subprocess_ms:>12.2f} {"-":>8}  fallback')
+            continue
+        native_ms = _time_call(lambda: read_identification(file_path), args.repeat)
+        match = _command_fields(native_json) == _command_fields(_run_identify(file_path, mkvmerge_path))
+        print(f'{name:<40} {native_ms:>10.2f} {subprocess_ms:>12.2f} {subprocess_ms / native_ms:>7.1f}x  '
+              f'{"yes" if match else "NO"}')
+
+
+def bench_parse(args) -> None:
+    """比较 from_dict 与编译解码器解析识别信息的耗时"""
+    documents = []
+    for file_path in args.files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            documents.append((os.path.basename(file_path)[:40], json.load(f)))
+    if not documents:
+        documents.append((f'synthetic m2ts, {args.streams} streams', _synthetic_m2ts(args.streams)))
+
+    decoders = [
+        ('from_dict', MkvInfo.from_dict),
+        ('strict', lambda d: decode(MkvInfo, d)),
+        ('permissive', lambda d: decode(MkvInfo, d, strict=False)),
+        ('lazy', lambda d: decode(MkvInfo, d, lazy=True)),
+    ]
+    print(f'{"document":<40} ' + ' '.join(f'{name + " ms":>14}' for name, _ in decoders) + '  match')
+    for name, document in documents:
+        timings = [_time_call(lambda: decoder(document), args.repeat) for _, decoder in decoders]
+        expected = MkvInfo.from_dict(document).to_dict()
+        match = all(decoder(document).to_dict() == expected for _, decoder in decoders[1:])
+        print(f'{name:<40} ' + ' '.join(f'{t:>14.3f}' for t in timings) + f'  {"yes" if match else "NO"}')
+
+
+def bench_memory(args) -> None:
+    """测量同时持有大量 MkvInfo 对象时的内存占用"""
+    files = max(1, args.tracks // args.streams)
+    # 每个文件单独解析一次 JSON 文本，与实际识别结果一样不共享字符串
+    text = json.dumps(_synthetic_m2ts(args.streams))
+    modes = [
+        ('eager', lambda: decode(MkvInfo, json.loads(text)), None),
+        ('lazy', lambda: decode(MkvInfo, json.loads(text), lazy=True), None),
+        ('lazy, properties read', lambda: decode(MkvInfo, json.loads(text), lazy=True),
+         lambda info: [track.properties for track in info.tracks]),
+    ]
+    tracks = files * args.streams
+    print(f'{files} files x {args.streams} streams = {tracks} tracks')
+    print(f'{"mode":<24} {"total MB":>10} {"bytes/track":>12}')
+    for name, build, touch in modes:
+        tracemalloc.start()
+        held = [build() for _ in range(files)]
+        if touch is not None:
+            for info in held:
+                touch(info)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del held
+        print(f'{name:<24} {current / 1024 / 1024:>10.1f} {current / tracks:>12.0f}')
+
+
+def _command_with_to_dict(mkv_file: MKVFile) -> List[str]:
+    """按改用映射表之前的方式，遍历 to_dict 结果生成轨道参数，用于对照"""
+    command = []
+    for track in mkv_file.mkv_info.tracks:
+        track_id = str(track.id)
+        if track.type == 'video' or track.type == 'audio':
+            command.extend(['--compression', track_id + ':none'])
+            command.extend(mkv_file.create_command(track_id, 'global-command', track.properties.to_dict()))
+            if track.type == 'video':
+                command.extend(mkv_file.create_command(track_id, 'video-command', track.properties.to_dict()))
+    return command
+
+
+def bench_command(args) -> None:
+    """测量大量轨道的合并命令生成（不执行）耗时"""
+    documents = []
+    for file_path in args.files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            documents.append(json.load(f))
+    if not documents:
+        documents.append(_synthetic_m2ts(args.streams))
+
+    mkv_files = []
+    tracks = 0
+    while tracks < args.tracks:
+        document = documents[len(mkv_files) % len(documents)]
+        mkv_file = MKVFile(None)
+        mkv_file.file_path = document['file_name']
+        mkv_file.mkv_info = decode(MkvInfo, document)
+        mkv_files.append(mkv_file)
+        tracks += len(document['tracks'])
+
+    for mkv_file in mkv_files[:len(documents)]:
+        track_args = mkv_file.command('out', subprocess=True)
+        expected = _command_with_to_dict(mkv_file)
+        if track_args[track_args.index('--no-attachments') + 1:-4] != expected:
+            print(f'MISMATCH: {mkv_file.file_path}')
+
+    print(f'{len(mkv_files)} files, {tracks} tracks')
+    for name, build in (('to_dict + create_command', _command_with_to_dict),
+                        ('projection table', lambda f: f.command('out', subprocess=True))):
+        start = time.perf_counter()
+        for mkv_file in mkv_files:
+            build(mkv_file)
+        elapsed = time.perf_counter() - start
+        print(f'{name:<26} {elapsed * 1000:>10.1f} ms  {elapsed * 1e6 / tracks:>8.2f} us/track')
+
+
+def _import_time(module: str) -> Tuple[float, float, List[Tuple[str, float]], Set[str]]:
+    """
+    在新的解释器中用 -X importtime 导入模块
+
+    Returns:
+        (模块的累计导入耗时 ms, 进程总耗时 ms, [(模块, 自身导入耗时 ms)], 导入的所有模块)
+
+    Raises:
+        ImportError: 导入失败（例如缺少 PyQt6）
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        raise ImportError(lines[-1] if lines else f'import {module} failed')
+    cumulative = 0.0
+    self_times = []
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+        self_times.append((name, int(self_us) / 1000))
+        if name == module:
+            cumulative = int(cumulative_us) / 1000
+    return cumulative, wall, self_times, imported
+
+
+def bench_startup(args) -> None:
+    """测量模块的冷启动导入耗时，检查预算和不应在启动时导入的模块"""
+    over_budget = False
+    for module in args.modules or list(STARTUP_BUDGET_MS):
+        cumulative_times = []
+        wall_times = []
+        try:
+            for _ in range(args.repeat):
+                cumulative, wall, self_times, imported = _import_time(module)
+                cumulative_times.append(cumulative)
+                wall_times.append(wall)
+        except ImportError as e:
+            print(f'{module:<14} skipped: {e}')
+            continue
+        median = statistics.median(cumulative_times)
+        budget = STARTUP_BUDGET_MS.get(module)
+        eager = [lazy for lazy in STARTUP_FORBIDDEN.get(module, ())
+                 if any(name == lazy or name.startswith(lazy + '.') for name in imported)]
+        status = 'ok'
+        if budget is not None and median > budget:
+            status = 'OVER BUDGET'
+            over_budget = True
+        if eager:
+            status = 'EAGER IMPORTS'
+            over_budget = True
+        budget_text = f'{budget:>6} ms' if budget is not None else '     -   '
+        spread = f'{min(cumulative_times):.0f}–{max(cumulative_times):.0f}'
+        print(f'{module:<14} import {median:>8.1f} ms ({spread:>9} ms)  budget {budget_text}  '
+              f'process {statistics.median(wall_times):>8.1f} ms  {status}')
+        if eager:
+            print(f'  imported at startup: {", ".join(eager)}')
+        for name, self_ms in sorted(self_times, key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f'  {self_ms:>8.1f} ms  {name}')
+    if over_budget:
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Performance benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    identify_parser = subparsers.add_parser('identify', help='Native Matroska reader vs mkvmerge -J')
+    identify_parser.add_argument('files', nargs='+', help='Files to identify')
+    identify_parser.add_argument('--repeat', type=int, default=10)
+    identify_parser.set_defaults(func=bench_identify)
+
+    parse_parser = subparsers.add_parser('parse', help='MkvInfo.from_dict vs the compiled decoder')
+    parse_parser.add_argument('files', nargs='*', help='Saved mkvmerge -J output; a synthetic m2ts is used if omitted')
+    parse_parser.add_argument('--streams', type=int, default=48, help='Stream count of the synthetic m2ts')
+    parse_parser.add_argument('--repeat', type=int, default=200)
+    parse_parser.set_defaults(func=bench_parse)
+
+    memory_parser = subparsers.add_parser('memory', help='Memory held by decoded MkvInfo objects')
+    memory_parser.add_argument('--tracks', type=int, default=50000, help='Total number of tracks to hold')
+    memory_parser.add_argument('--streams', type=int, default=48, help='Streams per synthetic file')
+    memory_parser.set_defaults(func=bench_memory)
+
+    command_parser = subparsers.add_parser('command', help='Dry-run command generation')
+    command_parser.add_argument('files', nargs='*', help='Saved mkvmerge -J output; a synthetic m2ts is used if omitted')
+    command_parser.add_argument('--tracks', type=int, default=100000, help='Total number of tracks')
+    command_parser.add_argument('--streams', type=int, default=48, help='Streams per synthetic file')
+    command_parser.set_defaults(func=bench_command)
+
+    startup_parser = subparsers.add_parser('startup', help='Cold-start import time against the recorded budget')
+    startup_parser.add_argument('modules', nargs='*', help=f'Modules to import (default: {", ".join(STARTUP_BUDGET_MS)})')
+    startup_parser.add_argument('--repeat', type=int, default=11, help='Runs per module; the median is compared')
+    startup_parser.add_argument('--top', type=int, default=5, help='Slowest modules to list by self time')
+    startup_parser.set_defaults(func=bench_startup)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""批量合并的取消令牌。
+
+每次运行创建一个 CancelToken，传给查找文件、识别、字体查找和合并的每一步，代替原来的全局停止标志，
+前一次运行的停止请求不会影响下一次运行。cancel() 可以在任意线程中调用：立即执行登记的回调
+（终止正在运行的 mkvmerge 进程、取消排队中的合并），各步骤在开始下一项工作前检查 is_cancelled()，
+取消后不再启动新的子进程。
+"""
+
+import threading
+from typing import Callable, List
+
+from LogManager import LogManager
+
+
+class CancelToken:
+    """一次批量处理的取消令牌，只能取消一次"""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """请求取消，并在当前线程中调用所有登记的回调"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                LogManager.get_logger().debug(f'取消回调出错: {str(e)}')
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待取消，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            InterruptedError: 已取消
+        """
+        if self._event.is_set():
+            raise InterruptedError('cancelled')
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        登记取消时调用的回调，已取消时立即调用
+
+        Returns:
+            注销回调的函数，工作结束后调用
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def unregister() -> None:
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return unregister
+        callback()
+        return lambda: None
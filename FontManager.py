@@ -1,7 +1,6 @@
 import os
 import sqlite3
 from typing import List, Dict, Set, Tuple, Optional, Union
-import fontTools.ttLib as ttLib
 import re
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -16,7 +15,6 @@ from LogManager import LogManager
 from LogFormatter import LogFormatter
 import sys
 from utils import get_app_dir  # 从 utils 导入
-import pysubs2  # 移到文件顶部
 
 class FontManager:
     def __init__(self, max_workers: int = None):
@@ -183,6 +181,9 @@ class FontManager:
         处理单个字体文件
         :return: List of (font_name, file_path, mtime, file_size)
         """
+        # fontTools 只在扫描字体库时用到，首次使用时才导入
+        import fontTools.ttLib as ttLib
+
         results = []
         font_path_str = str(font_path)
         mtime = os.path.getmtime(font_path)
@@ -471,6 +472,8 @@ class FontManager:
         Returns:
             字体名称集合
         """
+        import pysubs2
+
         font_names = set()
         
         try:
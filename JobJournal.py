@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+"""合并任务日志（journal），用于中断后继续处理。
+
+每个输入文件的状态变化（planned、running、done、failed）以一行 JSON 追加写入，并记录输入文件的
+指纹（大小、mtime_ns）和输出文件。每条记录用一次 write 写入并 fsync，进程被杀或断电时最多留下
+一行不完整的记录，读取时忽略即可。
+
+继续处理时读取日志并按输入文件建立索引，每个文件只需一次字典查找：
+- done 且指纹未变的文件直接跳过；
+- running（上次被中断）和 failed 的文件重新合并，先删除残留的临时输出（AtomicOutput 的 .partial 文件）。
+读取后会把日志压缩为每个文件一条记录，通过临时文件和 os.replace 原子替换。
+
+命令行用法:
+    python JobJournal.py show JOURNAL
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from AtomicOutput import partial_path, write_atomic
+
+STATE_PLANNED = 'planned'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+# 默认日志文件名，位于输出目录下
+JOURNAL_FILE_NAME = 'mergemkv-journal.jsonl'
+
+
+def fingerprint(file_path: str) -> Optional[List[int]]:
+    """输入文件指纹 [大小, mtime_ns]，文件不存在时返回 None"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class JobJournal:
+    def __init__(self, journal_path: str):
+        """
+        Args:
+            journal_path: 日志文件路径
+        """
+        self.journal_path = journal_path
+        self.lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._fd: Optional[int] = None
+
+    def open(self, resume: bool = False) -> None:
+        """
+        打开日志
+
+        Args:
+            resume: True 时读取已有记录并压缩；False 时开始新的日志
+        """
+        with self.lock:
+            self._entries = {}
+            if resume:
+                self.load()
+            self._rewrite()
+            self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def close(self) -> None:
+        with self.lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def load(self) -> None:
+        """读取日志，建立每个输入文件最后一条记录的索引"""
+        self._entries = self._read()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """每个输入文件的最后一条记录"""
+        return list(self._entries.values())
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """按顺序重放日志，返回每个输入文件的最后一条记录"""
+        entries = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        entries[record['input']] = record
+                    except (ValueError, KeyError, TypeError):
+                        # 被中断的最后一行
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def _rewrite(self) -> None:
+        """把当前索引原子地写成新的日志文件"""
+        directory = os.path.dirname(os.path.abspath(self.journal_path))
+        os.makedirs(directory, exist_ok=True)
+        write_atomic(self.journal_path, ''.join(json.dumps(record, ensure_ascii=False) + '\n'
+                                                for record in self._entries.values()), sync=True)
+
+    @staticmethod
+    def _key(input_file: str) -> str:
+        return os.path.abspath(input_file)
+
+    def entry(self, input_file: str) -> Optional[Dict[str, Any]]:
+        """输入文件的最后一条记录"""
+        return self._entries.get(self._key(input_file))
+
+    def is_done(self, input_file: str) -> bool:
+        """上次已成功合并且输入文件未变化"""
+        record = self.entry(input_file)
+        return (record is not None and record['state'] == STATE_DONE
+                and record.get('fingerprint') == fingerprint(input_file))
+
+    def partial_output(self, input_file: str) -> Optional[str]:
+        """上次开始合并但未成功完成时留下的临时输出文件路径，文件不存在时返回 None"""
+        record = self.entry(input_file)
+        if record is None or record['state'] not in (STATE_RUNNING, STATE_FAILED):
+            return None
+        output_file = record.get('output')
+        if output_file and os.path.isfile(partial_path(output_file)):
+            return partial_path(output_file)
+        return None
+
+    def record(self, input_file: str, state: str, output_file: Optional[str] = None,
+               return_code: Optional[int] = None) -> None:
+        """追加一条状态记录，可在多个线程中调用"""
+        record = {
+            'input': self._key(input_file),
+            'state': state,
+            'fingerprint': fingerprint(input_file),
+            'output': output_file,
+            'time': time.time(),
+        }
+        if return_code is not None:
+            record['return_code'] = return_code
+        data = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self.lock:
+            self._entries[record['input']] = record
+            if self._fd is not None:
+                os.write(self._fd, data)
+                os.fsync(self._fd)
+
+    def summary(self) -> Dict[str, int]:
+        """各状态的文件数"""
+        counts = {STATE_PLANNED: 0, STATE_RUNNING: 0, STATE_DONE: 0, STATE_FAILED: 0}
+        for record in self._entries.values():
+            counts[record['state']] = counts.get(record['state'], 0) + 1
+        return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect a merge job journal')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    show_parser = subparsers.add_parser('show', help='Show the last state of every input')
+    show_parser.add_argument('journal', help='Path to the journal file')
+
+    args = parser.parse_args(argv)
+    journal = JobJournal(args.journal)
+    journal.load()
+    if args.action == 'show':
+        for record in journal.entries():
+            print(f'{record["state"]:<8} {record["input"]}')
+        print(', '.join(f'{state}: {count}' for state, count in journal.summary().items()))
+
+
+if __name__ == '__main__':
+    main()
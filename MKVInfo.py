@@ -6,7 +6,8 @@
 #
 #     result = MkvInfo_from_dict(json.loads(json_string))
 
-from typing import Any, Optional, List, TypeVar, Type, cast, Callable
+import threading
+from typing import Any, Dict, Optional, List, TypeVar, Type, Union, cast, Callable, get_args, get_origin, get_type_hints
 
 
 T = TypeVar("T")
@@ -75,7 +76,53 @@ def to_float(x: Any) -> float:
     return x
 
 
+class DecodeError(AssertionError):
+    """Raised by the compiled decoder in strict mode.
+
+    Subclasses AssertionError so callers written against the ``from_dict`` methods keep catching it.
+    """
+
+
+# Serializes lazy field builds so two threads never decode the same field twice.
+_lazy_lock = threading.RLock()
+
+
+class LazyFields:
+    """Builds sub-objects from the decoded JSON on first attribute access.
+
+    Objects created with ``from_dict(obj, lazy=True)`` keep the JSON values of the fields listed in ``_lazy_fields``
+    and the decoder mode in ``_raw`` and leave those fields unset. The first access to such a field decodes it with
+    the compiled field decoder and stores the result on the instance, so later accesses are plain attribute reads.
+    ``_raw`` is dropped once every lazy field has been built. Type errors in lazily decoded fields are raised on first
+    access instead of in ``from_dict``.
+    """
+    __slots__ = ("_raw",)
+    _lazy_fields: tuple = ()
+
+    def __getattr__(self, name: str) -> Any:
+        decoder = _FIELD_DECODERS.get((type(self), name))
+        if decoder is None or name not in type(self)._lazy_fields:
+            raise AttributeError(name)
+        with _lazy_lock:
+            # Another thread may have built the field while this one waited for the lock.
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+            try:
+                pending, strict = object.__getattribute__(self, '_raw')
+            except AttributeError:
+                raise AttributeError(name) from None
+            value = decoder(pending.get(name), strict, True)
+            setattr(self, name, value)
+            pending.pop(name, None)
+            if not pending:
+                del self._raw
+            return value
+
+
 class AttachmentProperties:
+    __slots__ = ("uid",)
     uid: int
 
     def __init__(self, uid: int) -> None:
@@ -94,9 +141,10 @@ class AttachmentProperties:
 
 
 class Attachment:
+    __slots__ = ("file_name", "id", "properties", "size", "type", "description", "content_type")
     file_name: str
     id: int
-    properties: Optional[AttachmentProperties]
+    properties: AttachmentProperties
     size: int
     type: Optional[str]
     description: Optional[str]
@@ -138,6 +186,7 @@ class Attachment:
 
 
 class Chapter:
+    __slots__ = ("num_entries",)
     num_entries: int
 
     def __init__(self, num_entries: int) -> None:
@@ -156,6 +205,7 @@ class Chapter:
 
 
 class Program:
+    __slots__ = ("service_name", "program_number", "service_provider")
     service_name: Optional[str]
     program_number: Optional[int]
     service_provider: Optional[str]
@@ -185,6 +235,11 @@ class Program:
 
 
 class ContainerProperties:
+    __slots__ = (
+        "previous_segment_uid", "container_type", "date_local", "playlist_chapters", "programs", "duration",
+        "next_segment_uid", "other_file", "title", "segment_uid", "playlist", "writing_application", "date_utc",
+        "is_providing_timestamps",
+    )
     previous_segment_uid: str
     container_type: int
     date_local: str
@@ -255,6 +310,7 @@ class ContainerProperties:
 
 
 class Container:
+    __slots__ = ("recognized", "supported", "properties")
     recognized: bool
     supported: bool
     properties: ContainerProperties
@@ -281,6 +337,7 @@ class Container:
 
 
 class TrackTag:
+    __slots__ = ("num_entries", "track_id")
     num_entries: int
     track_id: int
 
@@ -303,6 +360,20 @@ class TrackTag:
 
 
 class TrackProperties:
+    __slots__ = (
+        "color_matrix_coefficients", "default_duration", "codec_delay", "flag_original", "number",
+        "codec_private_length", "uid", "track_name", "encoding", "tag_title", "teletext_page", "stream_id",
+        "packetizer", "flag_hearing_impaired", "color_primaries", "audio_bits_per_sample",
+        "content_encoding_algorithms", "max_frame_light", "projection_pose_roll", "flag_text_descriptions",
+        "tag_artist", "chroma_siting", "cb_subsample", "color_range", "display_dimensions", "flag_commentary",
+        "tag_fps", "aac_is_sbr", "stereo_mode", "forced_track", "min_luminance", "enabled_track", "codec_private_data",
+        "program_number", "tag_bitsps", "audio_channels", "audio_emphasis", "audio_sampling_frequency",
+        "chroma_subsample", "chromaticity_coordinates", "codec_id", "projection_type", "projection_pose_yaw",
+        "color_bits_per_channel", "max_luminance", "num_index_entries", "flag_visual_impaired", "codec_name",
+        "white_color_coordinates", "language", "sub_stream_id", "multiplexed_tracks", "default_track", "language_ietf",
+        "tag_bps", "projection_pose_pitch", "minimum_timestamp", "max_content_light", "projection_private",
+        "display_unit", "color_transfer_characteristics", "pixel_dimensions", "text_subtitles",
+    )
     color_matrix_coefficients: Optional[int]
     default_duration: Optional[int]
     codec_delay: Optional[int]
@@ -609,7 +680,8 @@ class TrackProperties:
         return result
 
 
-class Track:
+class Track(LazyFields):
+    __slots__ = ("codec", "id", "type", "properties", "file_path")
     codec: str
     id: int
     type: str
@@ -624,8 +696,12 @@ class Track:
         self.properties = properties
         self.file_path = file_path
 
+    _lazy_fields = ("properties",)
+
     @staticmethod
-    def from_dict(obj: Any) -> 'Track':
+    def from_dict(obj: Any, lazy: bool = False) -> 'Track':
+        if lazy:
+            return decode(Track, obj, lazy=True)
         assert isinstance(obj, dict)
         codec = from_str(obj.get("codec"))
         id = from_int(obj.get("id"))
@@ -645,7 +721,11 @@ class Track:
         return result
 
 
-class MkvInfo:
+class MkvInfo(LazyFields):
+    __slots__ = (
+        "errors", "container", "global_tags", "attachments", "chapters", "file_name", "identification_format_version",
+        "track_tags", "tracks",
+    )
     errors: List[str]
     container: Container
     global_tags: List[Chapter]
@@ -668,8 +748,17 @@ class MkvInfo:
         self.track_tags = track_tags
         self.tracks = tracks
 
+    _lazy_fields = ("container", "global_tags", "attachments", "chapters", "track_tags", "tracks")
+
     @staticmethod
-    def from_dict(obj: Any) -> 'MkvInfo':
+    def from_dict(obj: Any, lazy: bool = False) -> 'MkvInfo':
+        """Build an MkvInfo from decoded `mkvmerge -J` JSON.
+
+        With ``lazy=True`` only the scalar fields are decoded up front; container, tracks, track properties,
+        attachments, chapters and tags are built on first access.
+        """
+        if lazy:
+            return decode(MkvInfo, obj, lazy=True)
         assert isinstance(obj, dict)
         errors = from_list(from_str, obj.get("errors"))
         container = Container.from_dict(obj.get("container"))
@@ -696,8 +785,166 @@ class MkvInfo:
         return result
 
 
-def mkv_info_from_dict(s: Any) -> MkvInfo:
-    return MkvInfo.from_dict(s)
+# Compiled decoder
+#
+# The from_dict methods above try each converter of a union inside try/except and check types with assert, so decoding
+# a single track raises and catches dozens of exceptions. The decoder below is generated once at import time from the
+# class annotations: each field is checked with a `type(v) is ...` test and only values that fail it go through
+# _coerce, so a well-formed document is decoded without raising. It produces the same objects as from_dict.
+#
+# strict=True raises DecodeError wherever from_dict would fail an assertion. strict=False replaces values of the
+# wrong type with None and drops list items that are not objects of the expected class.
+
+_SCALAR_CHECKS = {
+    int: lambda x: isinstance(x, int) and not isinstance(x, bool),
+    str: lambda x: isinstance(x, str),
+    bool: lambda x: isinstance(x, bool),
+    float: lambda x: isinstance(x, (float, int)) and not isinstance(x, bool),
+}
+
+_DECODED_CLASSES = (AttachmentProperties, Attachment, Chapter, Program, ContainerProperties, Container, TrackTag,
+                    TrackProperties, Track, MkvInfo)
+
+# (class, field name) -> decoder(value, strict, lazy)
+_FIELD_DECODERS: Dict[tuple, Callable[[Any, bool, bool], Any]] = {}
+
+
+def _reject(strict: bool, where: str, expected: str, x: Any) -> None:
+    if strict:
+        raise DecodeError(f'{where}: expected {expected}, got {type(x).__name__}')
+    return None
+
+
+def _coerce(kind: type, x: Any, strict: bool, where: str) -> Any:
+    """Slow path for scalars whose type is not exactly `kind`"""
+    if _SCALAR_CHECKS[kind](x):
+        return float(x) if kind is float else x
+    return _reject(strict, where, kind.__name__, x)
+
+
+def _field_spec(hint: Any) -> tuple:
+    """
+    Reduce a field annotation to (kind, target, optional)
+
+    kind is 'scalar', 'object', 'scalar_list' or 'object_list'; target is the scalar type or class.
+    Scalar converters accept None whether or not the annotation is Optional, exactly like from_int and friends.
+    """
+    optional = False
+    if get_origin(hint) is Union:
+        args = [a for a in get_args(hint) if a is not type(None)]
+        optional = len(args) < len(get_args(hint))
+        hint = args[0]
+    if get_origin(hint) in (list, List):
+        item = get_args(hint)[0]
+        return ('scalar_list' if item in _SCALAR_CHECKS else 'object_list'), item, optional
+    if hint in _SCALAR_CHECKS:
+        return 'scalar', hint, optional
+    return 'object', hint, optional
+
+
+def _field_source(cls: type, name: str, hint: Any) -> List[str]:
+    """Generate the statements that turn `v` into the decoded value of one field"""
+    kind, target, optional = _field_spec(hint)
+    where = f'{cls.__name__}.{name}'
+    if kind == 'scalar':
+        return [f"if v is not None and type(v) is not {target.__name__}:",
+                f"    v = _coerce({target.__name__}, v, strict, {where!r})"]
+    if kind == 'scalar_list':
+        return ["if v is not None:",
+                "    if type(v) is list:",
+                f"        v = [y if y is None or type(y) is {target.__name__} "
+                f"else _coerce({target.__name__}, y, strict, {where!r}) for y in v]",
+                "    else:",
+                f"        v = _reject(strict, {where!r}, 'list', v)"]
+    decoder = f'_decode_{target.__name__}'
+    if kind == 'object_list':
+        return ["if v is not None:",
+                "    if type(v) is list:",
+                f"        v = [y for y in [{decoder}(y, strict, lazy) for y in v] if y is not None]",
+                "    else:",
+                f"        v = _reject(strict, {where!r}, 'list', v)"]
+    if optional:
+        return ["if v is not None:",
+                f"    v = {decoder}(v, strict, lazy)"]
+    return [f"v = {decoder}(v, strict, lazy)"]
+
+
+def _class_fields(cls: type) -> Dict[str, Any]:
+    hints = get_type_hints(cls)
+    return {name: hints[name] for name in cls.__annotations__ if not name.startswith('_')}
+
+
+def _compile_decoders() -> None:
+    """Generate and compile one decoder per class and one per field"""
+    namespace: Dict[str, Any] = {'_coerce': _coerce, '_reject': _reject}
+    namespace.update({c.__name__: c for c in _DECODED_CLASSES})
+    namespace.update({t.__name__: t for t in _SCALAR_CHECKS})
+    lines: List[str] = []
+    for cls in _DECODED_CLASSES:
+        name = cls.__name__
+        fields = _class_fields(cls)
+        lazy_fields = getattr(cls, '_lazy_fields', ())
+        lines += [f"def _decode_{name}(obj, strict, lazy):",
+                  "    if type(obj) is not dict:",
+                  f"        return _reject(strict, {name!r}, 'object', obj)",
+                  f"    self = {name}.__new__({name})"]
+        if lazy_fields:
+            pending = ", ".join(f"{field!r}: obj.get({field!r})" for field in lazy_fields)
+            lines += ["    if lazy:",
+                      f"        self._raw = ({{{pending}}}, strict)"]
+        for field, hint in fields.items():
+            body = [f"v = obj.get({field!r})"] + _field_source(cls, field, hint) + [f"self.{field} = v"]
+            indent = "    "
+            if field in lazy_fields:
+                lines.append("    if not lazy:")
+                indent = "        "
+            lines += [indent + line for line in body]
+        lines.append("    return self")
+
+        for field, hint in fields.items():
+            lines.append(f"def _decode_{name}_{field}(v, strict, lazy):")
+            lines += ["    " + line for line in _field_source(cls, field, hint)]
+            lines.append("    return v")
+
+    exec(compile("\n".join(lines), '<MKVInfo decoders>', 'exec'), namespace)
+    for cls in _DECODED_CLASSES:
+        for field in _class_fields(cls):
+            _FIELD_DECODERS[(cls, field)] = namespace[f'_decode_{cls.__name__}_{field}']
+    # Published last: a non-empty _CLASS_DECODERS means every decoder is in place.
+    _CLASS_DECODERS.update({cls: namespace[f'_decode_{cls.__name__}'] for cls in _DECODED_CLASSES})
+
+
+# Filled by _compile_decoders on the first decode() rather than at import, which keeps
+# get_type_hints() and the exec() out of the startup path of every entry point.
+_CLASS_DECODERS: Dict[type, Callable[[Any, bool, bool], Any]] = {}
+
+
+def _ensure_decoders() -> None:
+    with _lazy_lock:
+        if not _CLASS_DECODERS:
+            _compile_decoders()
+
+
+def decode(cls: Type[T], obj: Any, strict: bool = True, lazy: bool = False) -> Optional[T]:
+    """
+    Decode `mkvmerge -J` JSON into `cls` with the compiled decoder
+
+    Args:
+        cls: MkvInfo or one of its component classes
+        obj: decoded JSON object
+        strict: raise DecodeError on values of the wrong type instead of replacing them with None
+        lazy: defer the fields listed in `_lazy_fields` until first access
+
+    Returns:
+        the decoded object; None in permissive mode when `obj` is not a JSON object
+    """
+    if not _CLASS_DECODERS:
+        _ensure_decoders()
+    return _CLASS_DECODERS[cls](obj, strict, lazy)
+
+
+def mkv_info_from_dict(s: Any, strict: bool = True, lazy: bool = False) -> MkvInfo:
+    return decode(MkvInfo, s, strict=strict, lazy=lazy)
 
 
 def mkv_info_to_dict(x: MkvInfo) -> Any:
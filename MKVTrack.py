@@ -39,8 +39,7 @@ import json
 from os.path import expanduser, isfile
 import subprocess as sp
 
-from Verification import verify_supported
-from pymkv.ISO639_2 import is_ISO639_2
+from Verification import verify_supported, identify_file
 from utils import get_mkvmerge_path
 import sys
 
@@ -167,15 +166,7 @@ class MKVTrack:
 
     @track_id.setter
     def track_id(self, track_id):
-        # 创建启动信息对象
-        startupinfo = None
-        if sys.platform == 'win32':
-            startupinfo = sp.STARTUPINFO()
-            startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = sp.SW_HIDE
-        info_json = json.loads(sp.check_output([self.mkvmerge_path, '-J', self.file_path],
-                                               startupinfo=startupinfo,
-                                               creationflags=sp.CREATE_NO_WINDOW).decode())
+        info_json = identify_file(self.file_path, mkvmerge_path=self.mkvmerge_path)
         if not 0 <= track_id < len(info_json['tracks']):
             raise IndexError('track index out of range')
         self._track_id = track_id
@@ -198,10 +189,12 @@ class MKVTrack:
 
     @language.setter
     def language(self, language):
-        if language is None or is_ISO639_2(language):
-            self._language = language
-        else:
-            raise ValueError('not an ISO639-2 language code')
+        if language is not None:
+            # 导入 pymkv 会加载 pkg_resources，较慢，首次设置语言时才导入
+            from pymkv.ISO639_2 import is_ISO639_2
+            if not is_ISO639_2(language):
+                raise ValueError('not an ISO639-2 language code')
+        self._language = language
 
     @property
     def tags(self):
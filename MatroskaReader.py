@@ -0,0 +1,812 @@
+"""不调用 mkvmerge，直接读取 Matroska 文件头生成识别信息。
+
+通过内存映射打开文件，沿 SeekHead 只解析 EBML 头、Segment Info、Tracks、Attachments、Chapters
+和 Tags 元素，不读取任何 Cluster。生成的字典与 `mkvmerge -J` 的输出结构一致，可直接交给
+:func:`MKVInfo.mkv_info_from_dict`。
+
+遇到无法确定与 mkvmerge 结果一致的情况（未知编码、加密轨道、未知轨道类型、结构损坏等）时返回
+None，由调用方回退到 `mkvmerge -J`。
+"""
+
+import binascii
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from MKVInfo import MkvInfo, mkv_info_from_dict
+
+MATROSKA_EXTENSIONS = ('.mkv', '.mka', '.mks', '.mk3d', '.webm')
+
+# EBML 头
+ID_EBML = 0x1A45DFA3
+ID_DOCTYPE = 0x4282
+
+# 顶层元素
+ID_SEGMENT = 0x18538067
+ID_SEEKHEAD = 0x114D9B74
+ID_SEEK = 0x4DBB
+ID_SEEK_ID = 0x53AB
+ID_SEEK_POSITION = 0x53AC
+ID_INFO = 0x1549A966
+ID_TRACKS = 0x1654AE6B
+ID_ATTACHMENTS = 0x1941A469
+ID_CHAPTERS = 0x1043A770
+ID_TAGS = 0x1254C367
+ID_CLUSTER = 0x1F43B675
+
+# Segment Info
+ID_TIMESTAMP_SCALE = 0x2AD7B1
+ID_DURATION = 0x4489
+ID_TITLE = 0x7BA9
+ID_MUXING_APP = 0x4D80
+ID_WRITING_APP = 0x5741
+ID_DATE_UTC = 0x4461
+ID_SEGMENT_UID = 0x73A4
+ID_PREV_UID = 0x3CB923
+ID_NEXT_UID = 0x3EB923
+
+# Tracks
+ID_TRACK_ENTRY = 0xAE
+ID_TRACK_NUMBER = 0xD7
+ID_TRACK_UID = 0x73C5
+ID_TRACK_TYPE = 0x83
+ID_FLAG_ENABLED = 0xB9
+ID_FLAG_DEFAULT = 0x88
+ID_FLAG_FORCED = 0x55AA
+ID_FLAG_HEARING_IMPAIRED = 0x55AB
+ID_FLAG_VISUAL_IMPAIRED = 0x55AC
+ID_FLAG_TEXT_DESCRIPTIONS = 0x55AD
+ID_FLAG_ORIGINAL = 0x55AE
+ID_FLAG_COMMENTARY = 0x55AF
+ID_DEFAULT_DURATION = 0x23E383
+ID_NAME = 0x536E
+ID_LANGUAGE = 0x22B59C
+ID_LANGUAGE_BCP47 = 0x22B59D
+ID_CODEC_ID = 0x86
+ID_CODEC_PRIVATE = 0x63A2
+ID_CODEC_NAME = 0x258688
+ID_CODEC_DELAY = 0x56AA
+ID_CONTENT_ENCODINGS = 0x6D80
+ID_CONTENT_ENCODING = 0x6240
+ID_CONTENT_COMPRESSION = 0x5034
+ID_CONTENT_COMP_ALGO = 0x4254
+ID_CONTENT_ENCRYPTION = 0x5035
+
+# Video
+ID_VIDEO = 0xE0
+ID_PIXEL_WIDTH = 0xB0
+ID_PIXEL_HEIGHT = 0xBA
+ID_DISPLAY_WIDTH = 0x54B0
+ID_DISPLAY_HEIGHT = 0x54BA
+ID_DISPLAY_UNIT = 0x54B2
+ID_STEREO_MODE = 0x53B8
+ID_COLOUR = 0x55B0
+ID_MATRIX_COEFFICIENTS = 0x55B1
+ID_BITS_PER_CHANNEL = 0x55B2
+ID_CHROMA_SUBSAMPLING_HORZ = 0x55B3
+ID_CHROMA_SUBSAMPLING_VERT = 0x55B4
+ID_CB_SUBSAMPLING_HORZ = 0x55B5
+ID_CB_SUBSAMPLING_VERT = 0x55B6
+ID_CHROMA_SITING_HORZ = 0x55B7
+ID_CHROMA_SITING_VERT = 0x55B8
+ID_RANGE = 0x55B9
+ID_TRANSFER_CHARACTERISTICS = 0x55BA
+ID_PRIMARIES = 0x55BB
+ID_MAX_CLL = 0x55BC
+ID_MAX_FALL = 0x55BD
+ID_MASTERING_METADATA = 0x55D0
+ID_PRIMARY_R_X = 0x55D1
+ID_PRIMARY_R_Y = 0x55D2
+ID_PRIMARY_G_X = 0x55D3
+ID_PRIMARY_G_Y = 0x55D4
+ID_PRIMARY_B_X = 0x55D5
+ID_PRIMARY_B_Y = 0x55D6
+ID_WHITE_POINT_X = 0x55D7
+ID_WHITE_POINT_Y = 0x55D8
+ID_LUMINANCE_MAX = 0x55D9
+ID_LUMINANCE_MIN = 0x55DA
+ID_PROJECTION = 0x7670
+ID_PROJECTION_TYPE = 0x7671
+ID_PROJECTION_PRIVATE = 0x7672
+ID_PROJECTION_POSE_YAW = 0x7673
+ID_PROJECTION_POSE_PITCH = 0x7674
+ID_PROJECTION_POSE_ROLL = 0x7675
+
+# Audio
+ID_AUDIO = 0xE1
+ID_SAMPLING_FREQUENCY = 0xB5
+ID_OUTPUT_SAMPLING_FREQUENCY = 0x78B5
+ID_CHANNELS = 0x9F
+ID_BIT_DEPTH = 0x6264
+ID_EMPHASIS = 0x52F1
+
+# Attachments
+ID_ATTACHED_FILE = 0x61A7
+ID_FILE_DESCRIPTION = 0x467E
+ID_FILE_NAME = 0x466E
+ID_FILE_MIME_TYPE = 0x4660
+ID_FILE_DATA = 0x465C
+ID_FILE_UID = 0x46AE
+
+# Chapters
+ID_EDITION_ENTRY = 0x45B9
+ID_CHAPTER_ATOM = 0xB6
+
+# Tags
+ID_TAG = 0x7373
+ID_TARGETS = 0x63C0
+ID_TAG_TRACK_UID = 0x63C5
+
+TRACK_TYPES = {1: 'video', 2: 'audio', 17: 'subtitles', 18: 'buttons'}
+
+# CodecID 与 mkvmerge 显示的编码名称，前缀匹配的条目以 '/' 结尾
+CODEC_NAMES = {
+    'V_MPEG4/ISO/AVC': 'AVC/H.264/MPEG-4p10',
+    'V_MPEGH/ISO/HEVC': 'HEVC/H.265/MPEG-H',
+    'V_AV1': 'AV1',
+    'V_VP8': 'VP8',
+    'V_VP9': 'VP9',
+    'V_MPEG1': 'MPEG-1/2',
+    'V_MPEG2': 'MPEG-1/2',
+    'V_MPEG4/ISO/ASP': 'MPEG-4p2',
+    'V_MPEG4/ISO/SP': 'MPEG-4p2',
+    'V_MPEG4/ISO/AP': 'MPEG-4p2',
+    'V_THEORA': 'Theora',
+    'V_PRORES': 'ProRes',
+    'A_AAC': 'AAC',
+    'A_AAC/': 'AAC',
+    'A_AC3': 'AC-3',
+    'A_AC3/': 'AC-3',
+    'A_EAC3': 'E-AC-3',
+    'A_DTS': 'DTS',
+    'A_DTS/': 'DTS',
+    'A_TRUEHD': 'TrueHD',
+    'A_MLP': 'MLP',
+    'A_FLAC': 'FLAC',
+    'A_OPUS': 'Opus',
+    'A_VORBIS': 'Vorbis',
+    'A_MPEG/L1': 'MP1',
+    'A_MPEG/L2': 'MP2',
+    'A_MPEG/L3': 'MP3',
+    'A_PCM/INT/LIT': 'PCM',
+    'A_PCM/INT/BIG': 'PCM',
+    'A_PCM/FLOAT/IEEE': 'PCM',
+    'A_ALAC': 'ALAC',
+    'A_TTA1': 'TTA',
+    'A_WAVPACK4': 'WavPack4',
+    'S_TEXT/UTF8': 'SubRip/SRT',
+    'S_TEXT/ASCII': 'SubRip/SRT',
+    'S_TEXT/SSA': 'SubStationAlpha',
+    'S_TEXT/ASS': 'SubStationAlpha',
+    'S_SSA': 'SubStationAlpha',
+    'S_ASS': 'SubStationAlpha',
+    'S_TEXT/WEBVTT': 'WebVTT',
+    'S_TEXT/USF': 'USF',
+    'S_HDMV/PGS': 'HDMV PGS',
+    'S_HDMV/TEXTST': 'HDMV TextST',
+    'S_VOBSUB': 'VobSub',
+    'S_KATE': 'Kate',
+    'S_DVBSUB': 'DVBSUB',
+    'B_VOBBTN': 'VobBtn',
+}
+
+# Matroska 纪元 2001-01-01T00:00:00 UTC
+MATROSKA_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc)
+
+
+class EbmlError(Exception):
+    """EBML 结构无法解析或包含不支持的内容"""
+    pass
+
+
+def _read_id(buf, pos: int, end: int) -> Tuple[int, int]:
+    """读取元素 ID（保留长度标记位），返回 (ID, 新位置)"""
+    if pos >= end:
+        raise EbmlError('unexpected end of data')
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 4 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 4 or pos + length > end:
+        raise EbmlError('invalid element id')
+    return int.from_bytes(buf[pos:pos + length], 'big'), pos + length
+
+
+def _read_size(buf, pos: int, end: int) -> Tuple[Optional[int], int]:
+    """读取元素数据长度，未知长度返回 None，返回 (长度, 新位置)"""
+    if pos >= end:
+        raise EbmlError('unexpected end of data')
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > end:
+        raise EbmlError('invalid element size')
+    value = first & (mask - 1)
+    for byte in buf[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    if value == (1 << (7 * length)) - 1:
+        value = None
+    return value, pos + length
+
+
+def _read_element(buf, pos: int, end: int) -> Tuple[int, int, int]:
+    """读取元素头，返回 (ID, 数据起始位置, 数据结束位置)"""
+    element_id, pos = _read_id(buf, pos, end)
+    size, pos = _read_size(buf, pos, end)
+    data_end = end if size is None else pos + size
+    if data_end > end:
+        raise EbmlError('element exceeds its parent')
+    return element_id, pos, data_end
+
+
+def _children(buf, start: int, end: int):
+    """依次返回子元素 (ID, 数据起始位置, 数据结束位置)"""
+    pos = start
+    while pos < end:
+        element_id, data_start, data_end = _read_element(buf, pos, end)
+        yield element_id, data_start, data_end
+        pos = data_end
+
+
+def _uint(buf, start: int, end: int) -> int:
+    return int.from_bytes(buf[start:end], 'big')
+
+
+def _sint(buf, start: int, end: int) -> int:
+    return int.from_bytes(buf[start:end], 'big', signed=True)
+
+
+def _float(buf, start: int, end: int) -> float:
+    size = end - start
+    if size == 0:
+        return 0.0
+    if size == 4:
+        return _shortest_float32(struct.unpack('>f', buf[start:end])[0])
+    if size == 8:
+        return struct.unpack('>d', buf[start:end])[0]
+    raise EbmlError('invalid float size')
+
+
+def _shortest_float32(value: float) -> float:
+    """返回与 32 位浮点数等值的最短十进制表示，避免输出 0.6800000071525574 这类数值"""
+    packed = struct.pack('>f', value)
+    for digits in range(1, 10):
+        candidate = float(f'{value:.{digits}g}')
+        if struct.pack('>f', candidate) == packed:
+            return candidate
+    return value
+
+
+def _string(buf, start: int, end: int) -> str:
+    return bytes(buf[start:end]).split(b'\x00', 1)[0].decode('utf-8', errors='replace')
+
+
+def _hex(buf, start: int, end: int) -> str:
+    return binascii.hexlify(bytes(buf[start:end])).decode('ascii')
+
+
+def _number_str(value: float) -> str:
+    """按 mkvmerge 的习惯把数值格式化为字符串，整数值不带小数点"""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _SegmentReader:
+    """解析单个 Segment 的头部元素"""
+
+    def __init__(self, buf, segment_start: int, segment_end: int):
+        self.buf = buf
+        self.segment_start = segment_start
+        self.segment_end = segment_end
+        # 顶层元素 ID -> 元素在文件中的偏移
+        self.positions: Dict[int, int] = {}
+        self._visited_seekheads = set()
+
+    def locate(self) -> None:
+        """
+        线性扫描 Cluster 之前的顶层元素，并沿 SeekHead 找到其余元素
+
+        没有 SeekHead 时 Attachments、Chapters、Tags 可能位于 Cluster 之后，按大小跳过 Cluster 继续扫描
+
+        Raises:
+            EbmlError: 没有 SeekHead 且遇到大小未知的 Cluster，无法确定其后的元素
+        """
+        buf = self.buf
+        pos = self.segment_start
+        while pos < self.segment_end:
+            element_id, data_start, data_end = _read_element(buf, pos, self.segment_end)
+            if element_id == ID_CLUSTER:
+                if self._visited_seekheads:
+                    break
+                if _read_size(buf, _read_id(buf, pos, self.segment_end)[1], self.segment_end)[0] is None:
+                    raise EbmlError('unknown-size cluster without a seek head')
+                pos = data_end
+                continue
+            self.positions.setdefault(element_id, pos)
+            if element_id == ID_SEEKHEAD:
+                self._read_seekhead(pos, data_start, data_end)
+            pos = data_end
+
+    def _read_seekhead(self, offset: int, start: int, end: int) -> None:
+        if offset in self._visited_seekheads:
+            return
+        self._visited_seekheads.add(offset)
+        for element_id, data_start, data_end in _children(self.buf, start, end):
+            if element_id != ID_SEEK:
+                continue
+            seek_id = None
+            seek_position = None
+            for child_id, child_start, child_end in _children(self.buf, data_start, data_end):
+                if child_id == ID_SEEK_ID:
+                    seek_id = _uint(self.buf, child_start, child_end)
+                elif child_id == ID_SEEK_POSITION:
+                    seek_position = _uint(self.buf, child_start, child_end)
+            if seek_id is None or seek_position is None:
+                continue
+            target = self.segment_start + seek_position
+            if target >= self.segment_end:
+                continue
+            self.positions.setdefault(seek_id, target)
+            if seek_id == ID_SEEKHEAD:
+                # 第二个 SeekHead 通常位于文件末尾
+                child_id, child_start, child_end = _read_element(self.buf, target, self.segment_end)
+                if child_id == ID_SEEKHEAD:
+                    self._read_seekhead(target, child_start, child_end)
+
+    def element(self, element_id: int) -> Optional[Tuple[int, int]]:
+        """返回指定顶层元素的数据范围，不存在时返回 None"""
+        offset = self.positions.get(element_id)
+        if offset is None:
+            return None
+        found_id, data_start, data_end = _read_element(self.buf, offset, self.segment_end)
+        if found_id != element_id:
+            raise EbmlError('seek entry points to the wrong element')
+        return data_start, data_end
+
+
+def _parse_info(buf, start: int, end: int) -> Dict[str, Any]:
+    properties: Dict[str, Any] = {'container_type': 17, 'is_providing_timestamps': True}
+    timestamp_scale = 1000000
+    duration = None
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_TIMESTAMP_SCALE:
+            timestamp_scale = _uint(buf, data_start, data_end)
+        elif element_id == ID_DURATION:
+            duration = _float(buf, data_start, data_end)
+        elif element_id == ID_TITLE:
+            properties['title'] = _string(buf, data_start, data_end)
+        elif element_id == ID_MUXING_APP:
+            properties['muxing_application'] = _string(buf, data_start, data_end)
+        elif element_id == ID_WRITING_APP:
+            properties['writing_application'] = _string(buf, data_start, data_end)
+        elif element_id == ID_DATE_UTC:
+            date = MATROSKA_EPOCH + timedelta(microseconds=_sint(buf, data_start, data_end) // 1000)
+            properties['date_utc'] = date.strftime('%Y-%m-%dT%H:%M:%SZ')
+            properties['date_local'] = date.astimezone().replace(microsecond=0).isoformat()
+        elif element_id == ID_SEGMENT_UID:
+            properties['segment_uid'] = _hex(buf, data_start, data_end)
+        elif element_id == ID_PREV_UID:
+            properties['previous_segment_uid'] = _hex(buf, data_start, data_end)
+        elif element_id == ID_NEXT_UID:
+            properties['next_segment_uid'] = _hex(buf, data_start, data_end)
+    properties['timestamp_scale'] = timestamp_scale
+    if duration is not None:
+        properties['duration'] = int(round(duration * timestamp_scale))
+    return properties
+
+
+def _codec_name(codec_id: str) -> str:
+    name = CODEC_NAMES.get(codec_id)
+    if name is None:
+        for prefix, prefix_name in CODEC_NAMES.items():
+            if prefix.endswith('/') and codec_id.startswith(prefix):
+                return prefix_name
+        raise EbmlError(f'unknown codec id {codec_id}')
+    return name
+
+
+def _aac_is_sbr(codec_id: str, codec_private: Optional[bytes], sampling_frequency, output_sampling_frequency) -> bool:
+    """根据 CodecID、AudioSpecificConfig 和输出采样率判断 AAC 是否为 SBR (HE-AAC)"""
+    if '/SBR' in codec_id:
+        return True
+    if codec_private and len(codec_private) >= 1:
+        object_type = codec_private[0] >> 3
+        if object_type in (5, 29):
+            return True
+    if sampling_frequency and output_sampling_frequency and output_sampling_frequency == 2 * sampling_frequency:
+        return True
+    return False
+
+
+def _parse_video(buf, start: int, end: int, properties: Dict[str, Any]) -> None:
+    pixel_width = pixel_height = display_width = display_height = None
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_PIXEL_WIDTH:
+            pixel_width = _uint(buf, data_start, data_end)
+        elif element_id == ID_PIXEL_HEIGHT:
+            pixel_height = _uint(buf, data_start, data_end)
+        elif element_id == ID_DISPLAY_WIDTH:
+            display_width = _uint(buf, data_start, data_end)
+        elif element_id == ID_DISPLAY_HEIGHT:
+            display_height = _uint(buf, data_start, data_end)
+        elif element_id == ID_DISPLAY_UNIT:
+            properties['display_unit'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_STEREO_MODE:
+            properties['stereo_mode'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_COLOUR:
+            _parse_colour(buf, data_start, data_end, properties)
+        elif element_id == ID_PROJECTION:
+            _parse_projection(buf, data_start, data_end, properties)
+
+    if pixel_width is not None and pixel_height is not None:
+        properties['pixel_dimensions'] = f'{pixel_width}x{pixel_height}'
+        if display_width is None:
+            display_width = pixel_width
+        if display_height is None:
+            display_height = pixel_height
+    if display_width is not None and display_height is not None:
+        properties['display_dimensions'] = f'{display_width}x{display_height}'
+
+
+def _parse_colour(buf, start: int, end: int, properties: Dict[str, Any]) -> None:
+    values: Dict[int, Any] = {}
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_MASTERING_METADATA:
+            for child_id, child_start, child_end in _children(buf, data_start, data_end):
+                values[child_id] = _float(buf, child_start, child_end)
+        else:
+            values[element_id] = _uint(buf, data_start, data_end)
+
+    simple = {
+        ID_MATRIX_COEFFICIENTS: 'color_matrix_coefficients',
+        ID_BITS_PER_CHANNEL: 'color_bits_per_channel',
+        ID_RANGE: 'color_range',
+        ID_TRANSFER_CHARACTERISTICS: 'color_transfer_characteristics',
+        ID_PRIMARIES: 'color_primaries',
+        ID_MAX_CLL: 'max_content_light',
+        ID_MAX_FALL: 'max_frame_light',
+        ID_LUMINANCE_MAX: 'max_luminance',
+        ID_LUMINANCE_MIN: 'min_luminance',
+    }
+    for element_id, name in simple.items():
+        if element_id in values:
+            properties[name] = values[element_id]
+
+    pairs = {
+        'chroma_subsample': (ID_CHROMA_SUBSAMPLING_HORZ, ID_CHROMA_SUBSAMPLING_VERT),
+        'cb_subsample': (ID_CB_SUBSAMPLING_HORZ, ID_CB_SUBSAMPLING_VERT),
+        'chroma_siting': (ID_CHROMA_SITING_HORZ, ID_CHROMA_SITING_VERT),
+        'white_color_coordinates': (ID_WHITE_POINT_X, ID_WHITE_POINT_Y),
+    }
+    for name, ids in pairs.items():
+        if all(element_id in values for element_id in ids):
+            properties[name] = ','.join(_number_str(values[element_id]) for element_id in ids)
+
+    chromaticity = (ID_PRIMARY_R_X, ID_PRIMARY_R_Y, ID_PRIMARY_G_X, ID_PRIMARY_G_Y, ID_PRIMARY_B_X, ID_PRIMARY_B_Y)
+    if all(element_id in values for element_id in chromaticity):
+        properties['chromaticity_coordinates'] = ','.join(_number_str(values[element_id]) for element_id in chromaticity)
+
+
+def _parse_projection(buf, start: int, end: int, properties: Dict[str, Any]) -> None:
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_PROJECTION_TYPE:
+            properties['projection_type'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_PROJECTION_PRIVATE:
+            properties['projection_private'] = _hex(buf, data_start, data_end)
+        elif element_id == ID_PROJECTION_POSE_YAW:
+            properties['projection_pose_yaw'] = _float(buf, data_start, data_end)
+        elif element_id == ID_PROJECTION_POSE_PITCH:
+            properties['projection_pose_pitch'] = _float(buf, data_start, data_end)
+        elif element_id == ID_PROJECTION_POSE_ROLL:
+            properties['projection_pose_roll'] = _float(buf, data_start, data_end)
+
+
+def _parse_audio(buf, start: int, end: int, properties: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    sampling_frequency = 8000.0
+    output_sampling_frequency = None
+    properties['audio_channels'] = 1
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_SAMPLING_FREQUENCY:
+            sampling_frequency = _float(buf, data_start, data_end)
+        elif element_id == ID_OUTPUT_SAMPLING_FREQUENCY:
+            output_sampling_frequency = _float(buf, data_start, data_end)
+        elif element_id == ID_CHANNELS:
+            properties['audio_channels'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_BIT_DEPTH:
+            properties['audio_bits_per_sample'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_EMPHASIS:
+            properties['audio_emphasis'] = _uint(buf, data_start, data_end)
+    properties['audio_sampling_frequency'] = int(sampling_frequency)
+    return sampling_frequency, output_sampling_frequency
+
+
+def _parse_content_encodings(buf, start: int, end: int) -> List[int]:
+    algorithms = []
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id != ID_CONTENT_ENCODING:
+            continue
+        for child_id, child_start, child_end in _children(buf, data_start, data_end):
+            if child_id == ID_CONTENT_ENCRYPTION:
+                raise EbmlError('encrypted tracks are not supported')
+            if child_id == ID_CONTENT_COMPRESSION:
+                algorithm = 0
+                for comp_id, comp_start, comp_end in _children(buf, child_start, child_end):
+                    if comp_id == ID_CONTENT_COMP_ALGO:
+                        algorithm = _uint(buf, comp_start, comp_end)
+                algorithms.append(algorithm)
+    return algorithms
+
+
+def _parse_track_entry(buf, start: int, end: int) -> Tuple[int, Dict[str, Any]]:
+    """解析 TrackEntry，返回 (轨道 UID, mkvmerge 风格的轨道字典)"""
+    properties: Dict[str, Any] = {}
+    track_type = None
+    codec_id = None
+    codec_private = None
+    language = None
+    flags = {
+        'enabled_track': True,
+        'default_track': True,
+        'forced_track': False,
+    }
+    flag_ids = {
+        ID_FLAG_ENABLED: 'enabled_track',
+        ID_FLAG_DEFAULT: 'default_track',
+        ID_FLAG_FORCED: 'forced_track',
+        ID_FLAG_HEARING_IMPAIRED: 'flag_hearing_impaired',
+        ID_FLAG_VISUAL_IMPAIRED: 'flag_visual_impaired',
+        ID_FLAG_TEXT_DESCRIPTIONS: 'flag_text_descriptions',
+        ID_FLAG_ORIGINAL: 'flag_original',
+        ID_FLAG_COMMENTARY: 'flag_commentary',
+    }
+    video = audio = None
+
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_TRACK_NUMBER:
+            properties['number'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_TRACK_UID:
+            properties['uid'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_TRACK_TYPE:
+            track_type = _uint(buf, data_start, data_end)
+        elif element_id in flag_ids:
+            flags[flag_ids[element_id]] = bool(_uint(buf, data_start, data_end))
+        elif element_id == ID_DEFAULT_DURATION:
+            properties['default_duration'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_NAME:
+            properties['track_name'] = _string(buf, data_start, data_end)
+        elif element_id == ID_LANGUAGE:
+            language = _string(buf, data_start, data_end)
+        elif element_id == ID_LANGUAGE_BCP47:
+            properties['language_ietf'] = _string(buf, data_start, data_end)
+        elif element_id == ID_CODEC_ID:
+            codec_id = _string(buf, data_start, data_end)
+        elif element_id == ID_CODEC_PRIVATE:
+            codec_private = bytes(buf[data_start:data_end])
+        elif element_id == ID_CODEC_NAME:
+            properties['codec_name'] = _string(buf, data_start, data_end)
+        elif element_id == ID_CODEC_DELAY:
+            properties['codec_delay'] = _uint(buf, data_start, data_end)
+        elif element_id == ID_CONTENT_ENCODINGS:
+            algorithms = _parse_content_encodings(buf, data_start, data_end)
+            if algorithms:
+                properties['content_encoding_algorithms'] = ','.join(str(a) for a in algorithms)
+        elif element_id == ID_VIDEO:
+            video = (data_start, data_end)
+        elif element_id == ID_AUDIO:
+            audio = (data_start, data_end)
+
+    if track_type not in TRACK_TYPES:
+        raise EbmlError(f'unsupported track type {track_type}')
+    if not codec_id:
+        raise EbmlError('track without codec id')
+
+    properties.update(flags)
+    properties['codec_id'] = codec_id
+    properties['language'] = language if language else 'eng'
+    if codec_private is not None:
+        properties['codec_private_length'] = len(codec_private)
+        properties['codec_private_data'] = codec_private.hex()
+    else:
+        properties['codec_private_length'] = 0
+
+    type_name = TRACK_TYPES[track_type]
+    if type_name == 'video' and video is not None:
+        _parse_video(buf, video[0], video[1], properties)
+    elif type_name == 'audio':
+        sampling_frequency, output_sampling_frequency = _parse_audio(
+            buf, audio[0], audio[1], properties) if audio is not None else (None, None)
+        if codec_id.startswith('A_AAC') and _aac_is_sbr(codec_id, codec_private, sampling_frequency,
+                                                          output_sampling_frequency):
+            properties['aac_is_sbr'] = 'true'
+    elif type_name == 'subtitles' and codec_id.startswith(('S_TEXT/', 'S_SSA', 'S_ASS')):
+        properties['text_subtitles'] = True
+        properties['encoding'] = 'UTF-8'
+
+    track = {
+        'codec': _codec_name(codec_id),
+        'type': type_name,
+        'properties': properties,
+    }
+    return properties.get('uid'), track
+
+
+def _parse_tracks(buf, start: int, end: int) -> List[Tuple[int, Dict[str, Any]]]:
+    tracks = []
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_TRACK_ENTRY:
+            tracks.append(_parse_track_entry(buf, data_start, data_end))
+    return tracks
+
+
+def _parse_attachments(buf, start: int, end: int) -> List[Dict[str, Any]]:
+    attachments = []
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id != ID_ATTACHED_FILE:
+            continue
+        attachment: Dict[str, Any] = {'id': len(attachments) + 1, 'size': 0, 'properties': {}}
+        for child_id, child_start, child_end in _children(buf, data_start, data_end):
+            if child_id == ID_FILE_NAME:
+                attachment['file_name'] = _string(buf, child_start, child_end)
+            elif child_id == ID_FILE_MIME_TYPE:
+                attachment['content_type'] = _string(buf, child_start, child_end)
+            elif child_id == ID_FILE_DESCRIPTION:
+                attachment['description'] = _string(buf, child_start, child_end)
+            elif child_id == ID_FILE_DATA:
+                # 只记录大小，不读取附件内容
+                attachment['size'] = child_end - child_start
+            elif child_id == ID_FILE_UID:
+                attachment['properties']['uid'] = _uint(buf, child_start, child_end)
+        attachments.append(attachment)
+    return attachments
+
+
+def _count_chapter_atoms(buf, start: int, end: int) -> int:
+    count = 0
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_CHAPTER_ATOM:
+            count += 1 + _count_chapter_atoms(buf, data_start, data_end)
+    return count
+
+
+def _parse_chapters(buf, start: int, end: int) -> List[Dict[str, Any]]:
+    count = 0
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id == ID_EDITION_ENTRY:
+            count += _count_chapter_atoms(buf, data_start, data_end)
+    return [{'num_entries': count}] if count else []
+
+
+def _parse_tags(buf, start: int, end: int) -> Tuple[int, Dict[int, int]]:
+    """统计标签数量，返回 (全局标签数, {轨道UID: 标签数})"""
+    global_count = 0
+    track_counts: Dict[int, int] = {}
+    for element_id, data_start, data_end in _children(buf, start, end):
+        if element_id != ID_TAG:
+            continue
+        track_uids = []
+        for child_id, child_start, child_end in _children(buf, data_start, data_end):
+            if child_id != ID_TARGETS:
+                continue
+            for target_id, target_start, target_end in _children(buf, child_start, child_end):
+                if target_id == ID_TAG_TRACK_UID:
+                    track_uids.append(_uint(buf, target_start, target_end))
+        track_uids = [uid for uid in track_uids if uid != 0]
+        if not track_uids:
+            global_count += 1
+        for uid in track_uids:
+            track_counts[uid] = track_counts.get(uid, 0) + 1
+    return global_count, track_counts
+
+
+def _parse_buffer(buf, file_path: str) -> Dict[str, Any]:
+    end = len(buf)
+    element_id, data_start, data_end = _read_element(buf, 0, end)
+    if element_id != ID_EBML:
+        raise EbmlError('missing EBML header')
+    doc_type = None
+    for child_id, child_start, child_end in _children(buf, data_start, data_end):
+        if child_id == ID_DOCTYPE:
+            doc_type = _string(buf, child_start, child_end)
+    if doc_type not in ('matroska', 'webm'):
+        raise EbmlError(f'unsupported doc type {doc_type}')
+
+    pos = data_end
+    while True:
+        element_id, segment_start, segment_end = _read_element(buf, pos, end)
+        if element_id == ID_SEGMENT:
+            break
+        pos = segment_end
+
+    segment = _SegmentReader(buf, segment_start, segment_end)
+    segment.locate()
+
+    info = segment.element(ID_INFO)
+    tracks_range = segment.element(ID_TRACKS)
+    if info is None or tracks_range is None:
+        raise EbmlError('missing segment info or tracks')
+
+    container_properties = _parse_info(buf, *info)
+    track_entries = _parse_tracks(buf, *tracks_range)
+
+    attachments_range = segment.element(ID_ATTACHMENTS)
+    chapters_range = segment.element(ID_CHAPTERS)
+    tags_range = segment.element(ID_TAGS)
+
+    tracks = []
+    uid_to_id = {}
+    for track_id, (uid, track) in enumerate(track_entries):
+        track['id'] = track_id
+        tracks.append(track)
+        if uid is not None:
+            uid_to_id[uid] = track_id
+
+    global_tags: List[Dict[str, Any]] = []
+    track_tags: List[Dict[str, Any]] = []
+    if tags_range is not None:
+        global_count, track_counts = _parse_tags(buf, *tags_range)
+        if global_count:
+            global_tags.append({'num_entries': global_count})
+        for uid, count in track_counts.items():
+            if uid in uid_to_id:
+                track_tags.append({'num_entries': count, 'track_id': uid_to_id[uid]})
+        track_tags.sort(key=lambda tag: tag['track_id'])
+
+    return {
+        'attachments': _parse_attachments(buf, *attachments_range) if attachments_range else [],
+        'chapters': _parse_chapters(buf, *chapters_range) if chapters_range else [],
+        'container': {
+            'properties': container_properties,
+            'recognized': True,
+            'supported': True,
+            'type': 'WebM' if doc_type == 'webm' else 'Matroska',
+        },
+        'errors': [],
+        'file_name': file_path,
+        'global_tags': global_tags,
+        'track_tags': track_tags,
+        'tracks': tracks,
+        'warnings': [],
+    }
+
+
+def read_identification(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取 Matroska 文件头，生成与 `mkvmerge -J` 结构一致的识别信息
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        识别信息字典；不是 Matroska 文件或无法可靠解析时返回 None
+    """
+    if not file_path.lower().endswith(MATROSKA_EXTENSIONS):
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _parse_buffer(buf, file_path)
+    except (OSError, ValueError, EbmlError, struct.error):
+        return None
+
+
+def read_mkv_info(file_path: str) -> Optional[MkvInfo]:
+    """
+    读取 Matroska 文件头并构建 MkvInfo
+
+    Returns:
+        MkvInfo 对象；无法解析时返回 None
+    """
+    info_json = read_identification(file_path)
+    if info_json is None:
+        return None
+    return mkv_info_from_dict(info_json)
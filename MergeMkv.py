@@ -2,28 +2,223 @@
 from MKVTrack import MKVTrack
 from MkvFile import MKVFile
 from FontManager import FontManager
+from OutputManifest import build_manifest, is_up_to_date, write_manifest
+from JobJournal import JOURNAL_FILE_NAME, STATE_DONE, STATE_FAILED, STATE_PLANNED, STATE_RUNNING, JobJournal
 from LogManager import LogManager
 from LogFormatter import LogFormatter
+from CancelToken import CancelToken
+from AtomicOutput import commit, copy_atomic, discard, has_free_space, partial_path
+from MergePlan import MergePlan, PlannedJob, replace_output
+from Passthrough import PASSTHROUGH_OFF, PASSTHROUGH_SKIP, place
+from PlanExport import export_plan, write_shell_script
+from MuxEvents import JobProgress, MuxMessage, MuxProgress, ProgressThrottle
+from MuxMetrics import METRICS_FILE_NAME, collect_metrics, summarize_by_device, write_json, write_prometheus
+from MuxScheduler import JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_SKIPPED, JobLog, MuxJob, MuxResult, MuxScheduler
+from MkvmergeCache import MkvmergeCache
+from MuxSupervisor import MuxChild, MuxSupervisor
+from StorageDevices import DeviceLimits
+from Verification import get_identify_stats, reset_identify_registry, identify_file
+from utils import get_mkvmerge_path
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+import time
 import subprocess as sp
 import os
-import sys
-from rich.console import Console
-import logging as logger
-import coloredlogs
 
-def process_mkv_files(directory: str, output: str, execute: bool = False, print_command: bool = False) -> None:
+# 与视频同名的字幕文件后缀
+SUBTITLE_SUFFIXES = ['.ass', '.zh.ass']
+
+# 合并进行中检查取消的间隔（秒）
+STOP_CHECK_INTERVAL = 0.2
+# 取消后等待 mkvmerge 自行退出的时间（秒），超时后强制结束
+TERMINATE_TIMEOUT = 5.0
+
+
+def discover_mkv_files(directory: str, cancel: Optional[CancelToken] = None) -> List[Tuple[str, List[str]]]:
+    """
+    查找输入目录下所有需要处理的视频文件
+    
+    Args:
+        directory: 输入目录路径
+        cancel: 取消令牌，每个目录之前检查
+        
+    Returns:
+        按 os.walk 顺序排列的 (目录, 视频文件名列表)
+
+    Raises:
+        InterruptedError: 已取消
+    """
+    candidates = []
+    for root, dirs, files in os.walk(directory):
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        videos = [file for file in files if file.lower().endswith(('.mkv', '.m2ts'))]
+        if videos:
+            candidates.append((root, videos))
+    return candidates
+
+
+def find_subtitle_files(root: str, file: str) -> List[Tuple[str, str]]:
+    """与视频同名的字幕文件 [(字幕文件路径, 字幕文件名)]"""
+    file_name, _ = os.path.splitext(file)
+    subtitle_files = []
+    for ass_suffix in SUBTITLE_SUFFIXES:
+        ass_file_name = file_name + ass_suffix
+        ass_file_path = os.path.join(root, ass_file_name)
+        if os.path.exists(ass_file_path):
+            subtitle_files.append((ass_file_path, ass_file_name))
+    return subtitle_files
+
+
+def _is_passthrough(file: str, subtitle_files: List[Tuple[str, str]], passthrough: str) -> bool:
+    """没有同名字幕的 .mkv 在打开 passthrough 时不经过 mkvmerge"""
+    return passthrough != PASSTHROUGH_OFF and not subtitle_files and file.lower().endswith('.mkv')
+
+
+def _prefetch_one(file_path: str, mkvmerge_path: str, cancel: Optional[CancelToken] = None) -> None:
+    """预取单个文件的识别结果，失败时留给正式处理阶段报告"""
+    try:
+        identify_file(file_path, mkvmerge_path=mkvmerge_path, cancel=cancel)
+    except InterruptedError:
+        pass
+    except Exception as e:
+        LogManager.get_logger().debug(f"预取识别失败: {file_path} - {str(e)}")
+
+
+def prefetch_identification(candidates: List[Tuple[str, List[str]]], max_workers: int = 8,
+                            passthrough: str = PASSTHROUGH_OFF,
+                            cancel: Optional[CancelToken] = None) -> Tuple[ThreadPoolExecutor, List[Future]]:
+    """
+    在线程池中并发识别所有视频及其字幕文件
+    
+    识别结果写入 Verification 的进程内登记表，处理阶段按遍历顺序读取；
+    若某个文件尚未识别完成，处理阶段会等待该文件的识别而不会重复调用 mkvmerge。
+    
+    Args:
+        candidates: discover_mkv_files 的返回值
+        max_workers: 同时运行的识别进程数
+        passthrough: passthrough 策略，不经过 mkvmerge 的文件不识别
+        cancel: 取消令牌，取消时终止正在运行的识别进程
+        
+    Returns:
+        (执行识别任务的线程池, 识别任务)，调用方负责用 shutdown_prefetch 关闭
+    """
+    mkvmerge_path = get_mkvmerge_path()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='probe')
+    futures = []
+    for root, files in candidates:
+        for file in files:
+            subtitle_files = find_subtitle_files(root, file)
+            if _is_passthrough(file, subtitle_files, passthrough):
+                continue
+            futures.append(executor.submit(_prefetch_one, os.path.join(root, file), mkvmerge_path, cancel))
+            for ass_file_path, _ in subtitle_files:
+                futures.append(executor.submit(_prefetch_one, ass_file_path, mkvmerge_path, cancel))
+    return executor, futures
+
+
+def shutdown_prefetch(executor: ThreadPoolExecutor, futures: List[Future]) -> None:
+    """取消尚未开始的识别任务并关闭线程池，不等待正在运行的识别（Python 3.8 没有 cancel_futures）"""
+    for future in futures:
+        future.cancel()
+    executor.shutdown(wait=False)
+
+
+def process_mkv_files(directory: str, output: str, execute: bool = False, print_command: bool = False,
+                      probe_workers: int = 8, jobs: int = 1,
+                      device_limits: Optional[Dict[str, int]] = None, resume: bool = False,
+                      journal_path: Optional[str] = None, force: bool = False,
+                      export: Optional[str] = None, progress_rate: float = 4.0,
+                      prometheus_path: Optional[str] = None,
+                      passthrough: str = PASSTHROUGH_OFF,
+                      progress_callback: Optional[Callable[[JobProgress], None]] = None,
+                      cancel: Optional[CancelToken] = None) -> Optional[List[MuxResult]]:
     """
-    处理MKV文件的主要逻辑
+    处理MKV文件的主要逻辑：先生成合并计划，再执行计划
     
     Args:
         directory: 输入目录路径
         output: 输出目录路径
         execute: 是否执行合并命令
         print_command: 是否打印命令
+        probe_workers: 预取文件识别信息的并发数
+        jobs: 同时运行的合并任务数；大于 1 时每个文件的日志在合并结束后整段输出
+        device_limits: {路径: 上限}，指定路径所在存储设备上同时运行的任务数；
+            未指定的设备按类型决定（机械硬盘 1，SATA SSD 2，NVMe 4，无法判断时不限制）
+        resume: 根据任务日志继续上次的处理：跳过已完成且未变化的文件，重新合并失败或被中断的文件
+        journal_path: 任务日志路径，默认为输出目录下的 mergemkv-journal.jsonl；仅在执行合并时使用
+        force: 忽略输出清单，重新合并所有文件；默认跳过输入、字体和命令都未变化的输出
+        export: 把合并计划导出为 Makefile（或 *.ninja、*.sh）的路径，供 make -j / ninja -j 执行
+        progress_rate: 每秒最多调用几次 progress_callback
+        prometheus_path: 合并结束后写入 node_exporter textfile 统计的 .prom 文件路径
+        passthrough: 没有同名字幕的 .mkv 的处理方式：'off' 照常合并；'auto'、'reflink'、'hardlink'、'copy'
+            不经过 mkvmerge 直接放入输出目录；'skip' 不输出
+        progress_callback: 接收 JobProgress 的回调，进度不写入日志；每个任务结束时收到一次 done 为 True 的事件
+        cancel: 取消令牌，在其他线程中调用 cancel.cancel() 停止查找、识别、字体查找和合并，
+            正在运行的 mkvmerge 被终止，临时输出被删除
+        
+    Returns:
+        按输入顺序排列的合并结果（仅生成命令时为空列表）；取消时返回 None
+    """
+    if cancel is None:
+        cancel = CancelToken()
+    done_journal = None
+    if execute and resume:
+        # 继续处理时在生成计划前跳过已完成的文件，不再识别这些文件、查找字体
+        done_journal = JobJournal(journal_path or os.path.join(output, JOURNAL_FILE_NAME))
+        done_journal.load()
+    plan = plan_merge(directory, output, print_command=print_command or not execute, probe_workers=probe_workers,
+                      passthrough=passthrough, journal=done_journal, cancel=cancel)
+    if plan is None:
+        return None
+
+    if print_command or not execute:
+        write_shell_script(plan, "./mergemkv.sh")
+    if export is not None:
+        LogManager.get_logger().info(f'导出合并计划 ({export_plan(plan, export)}): {export}')
+
+    if not execute:
+        LogManager.get_logger().info('仅生成命令，不执行合并')
+        results = []
+    else:
+        results = execute_plan(plan, jobs=jobs, device_limits=device_limits, resume=resume,
+                               journal_path=journal_path, force=force,
+                               progress_callback=progress_callback,
+                               progress_rate=progress_rate, prometheus_path=prometheus_path, cancel=cancel)
+        if results is None:
+            return None
+
+    # 在所有文件处理完成后，显示所有未找到的字体汇总
+    _log_run_summary(plan.missing_fonts, results)
+    return results
+
+
+def plan_merge(directory: str, output: str, print_command: bool = False, probe_workers: int = 8,
+               font_manager: Optional[FontManager] = None, passthrough: str = PASSTHROUGH_OFF,
+               journal: Optional[JobJournal] = None,
+               cancel: Optional[CancelToken] = None) -> Optional[MergePlan]:
+    """
+    生成合并计划：查找视频文件，识别轨道，查找同名字幕及其字体，生成合并命令
+    
+    Args:
+        directory: 输入目录路径
+        output: 输出目录路径，按输入目录的结构存放输出文件
+        print_command: 是否打印每个文件的合并命令
+        probe_workers: 预取文件识别信息的并发数
+        font_manager: 字体管理器，默认新建
+        passthrough: 没有同名字幕的 .mkv 的处理方式，见 process_mkv_files
+        journal: 已读取的任务日志，跳过其中已完成且未变化的文件（继续上次的处理）
+        cancel: 取消令牌，取消时终止正在运行的识别进程
+        
+    Returns:
+        MergePlan；取消时返回 None
     """
     logger = LogManager.get_logger()
-    font_manager = FontManager()
-    all_missing_fonts = set()  # 收集所有文件的未找到字体
+    font_manager = font_manager or FontManager()
+    if cancel is None:
+        cancel = CancelToken()
+    reset_identify_registry()  # 每次运行重新统计文件识别
     
     logger.info(LogFormatter.section("MKV文件处理"))
     logger.info(f"输入目录: {directory}")
@@ -32,178 +227,470 @@ def process_mkv_files(directory: str, output: str, execute: bool = False, print_
     # 确保输出目录存在
     os.makedirs(output, exist_ok=True)
     
-    # 清空 mergemkv.sh 文件
-    if print_command or not execute:
-        with open("./mergemkv.sh", "w", encoding='utf-8') as f:
-            f.write("")  # 清空文件内容
-    
-    # 递归遍历输入目录
-    for root, dirs, files in os.walk(directory):
-        # 计算当前目录对应的输出目录
-        relative_path = os.path.relpath(root, directory)
-        current_output = os.path.join(output, relative_path)
-        os.makedirs(current_output, exist_ok=True)
-        
-        # 处理视频文件
-        for file in files:
-            if not file.lower().endswith(('.mkv', '.m2ts')):
-                continue
-                
-            logger.info(LogFormatter.subsection(f"处理文件: {file}"))
-            
-            # 检查是否被要求停止
-            if hasattr(process_mkv_files, 'should_stop') and process_mkv_files.should_stop:
-                logger.info('<font color="red">收到停止信号，终止处理</font>')
-                return
-                
-            input_file = os.path.join(root, file)
-                    
-            mkv_file = MKVFile(input_file)
-            file_name, _ = os.path.splitext(file)
-            
-            # 记录需要复制的字幕文件
-            subtitle_files = []
-            
-            # 检查字幕文件
-            logger.info(LogFormatter.subsection("字幕检查"))
-            for ass_suffix in ['.ass', '.zh.ass']:
-                ass_file_name = file_name + ass_suffix
-                ass_file_path = os.path.join(root, ass_file_name)
-                if not os.path.exists(ass_file_path):
+    try:
+        return _plan_candidates(directory, output, print_command, probe_workers, font_manager, passthrough,
+                                journal, cancel)
+    except InterruptedError:
+        logger.info('<font color="red">收到停止信号，终止处理</font>')
+        return None
+
+
+def _plan_candidates(directory: str, output: str, print_command: bool, probe_workers: int,
+                     font_manager: FontManager, passthrough: str, journal: Optional[JobJournal],
+                     cancel: CancelToken) -> MergePlan:
+    """
+    查找视频文件并逐个生成合并任务
+
+    Raises:
+        InterruptedError: 已取消
+    """
+    logger = LogManager.get_logger()
+    all_missing_fonts = set()  # 收集所有文件的未找到字体
+
+    # 先查找所有候选文件，再并发预取识别结果
+    candidates = discover_mkv_files(directory, cancel)
+    logger.info(f"找到 {sum(len(files) for _, files in candidates)} 个视频文件")
+    if journal is not None:
+        # 已完成的文件不生成任务，也不预取识别结果
+        remaining = [(root, [file for file in files if not journal.is_done(os.path.join(root, file))])
+                     for root, files in candidates]
+        skipped = sum(len(files) for _, files in candidates) - sum(len(files) for _, files in remaining)
+        candidates = [(root, files) for root, files in remaining if files]
+        logger.info(f"继续上次的处理: 跳过 {skipped} 个已完成的文件")
+
+    plan = MergePlan(directory, output)
+    prefetch_executor, prefetch_futures = prefetch_identification(candidates, max_workers=probe_workers,
+                                                                  passthrough=passthrough, cancel=cancel)
+    try:
+        for root, files in candidates:
+            # 计算当前目录对应的输出目录
+            relative_path = os.path.relpath(root, directory)
+            current_output = os.path.join(output, relative_path)
+            os.makedirs(current_output, exist_ok=True)
+
+            for file in files:
+                cancel.raise_if_cancelled()
+                input_file = os.path.join(root, file)
+                if _is_passthrough(file, find_subtitle_files(root, file), passthrough):
+                    if passthrough == PASSTHROUGH_SKIP:
+                        logger.info(LogFormatter.list_item(f'没有字幕，跳过: {file}'))
+                        continue
+                    logger.info(LogFormatter.list_item(f'没有字幕，直接放入输出目录 ({passthrough}): {file}'))
+                    plan.jobs.append(PlannedJob(
+                        index=len(plan.jobs),
+                        input_file=input_file,
+                        output_file=os.path.join(current_output, file),
+                        argv=[],
+                        subtitle_files=[],
+                        attachments=[],
+                        passthrough=passthrough,
+                    ))
                     continue
-                    
-                logger.info(LogFormatter.list_item(f'Find ASS file: {ass_file_name}'))
-                subtitle_files.append((ass_file_path, ass_file_name))  # 记录字幕文件
-                
-                # 获取字幕使用的字体和未找到的字体
-                font_files, missing = font_manager.get_font_files_for_subtitle(ass_file_path, return_missing=True)
-                all_missing_fonts.update(missing)
-
-                if font_files:
-                    logger.info(LogFormatter.list_item(f'Found {len(font_files)} fonts for subtitle'))
-                    for font_file in font_files:
-                        if os.path.exists(font_file):
-                            font_name = os.path.basename(font_file)
-                            logger.info(LogFormatter.list_item(f'Adding font: {font_name}'))
-                            mkv_file.add_attachment(font_file)
-                        else:
-                            logger.warning(LogFormatter.list_item(f'Font file not found: {font_file}'))
-                
-                # 添加字幕轨道
-                ass_file_track = MKVTrack(
-                    ass_file_path,
-                    track_name="简体中文",
-                    default_track=True,
-                    language="chi"
-                )
-                mkv_file.add_track(ass_file_track)
-
-            # 生成命令
-            logger.info(LogFormatter.subsection("执行合并"))
-            command = mkv_file.command(current_output)
-
-            if print_command or not execute:
-                logger.info(LogFormatter.section('Merge Command:'))
-                logger.info(command)
-                with open("./mergemkv.sh", "a", encoding='utf-8') as f:
-                    f.write(command + "\n")
-
-            if not execute:
-                logger.info('仅生成命令，不执行合并')
-                continue
+                plan.jobs.append(_plan_file(len(plan.jobs), input_file, current_output,
+                                            print_command, font_manager, all_missing_fonts, cancel))
+    finally:
+        shutdown_prefetch(prefetch_executor, prefetch_futures)
+    plan.missing_fonts = sorted(all_missing_fonts)
+    return plan
+
+
+def _plan_file(index: int, input_file: str, current_output: str, print_command: bool,
+               font_manager: FontManager, all_missing_fonts: set,
+               cancel: Optional[CancelToken] = None) -> PlannedJob:
+    """
+    识别视频文件，添加同名字幕及其字体，生成合并命令
+
+    Raises:
+        InterruptedError: 已取消
+    """
+    logger = LogManager.get_logger()
+    root, file = os.path.split(input_file)
+    logger.info(LogFormatter.subsection(f"处理文件: {file}"))
 
-            logger.info('Running with command:')
-            logger.info(command)
-            try:
-                # 创建启动信息对象
-                startupinfo = None
-                if sys.platform == 'win32':
-                    startupinfo = sp.STARTUPINFO()
-                    startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-                    startupinfo.wShowWindow = sp.SW_HIDE
-
-                process = sp.Popen(
-                    mkv_file.command(output, subprocess=True),
-                    stdout=sp.PIPE,
-                    stderr=sp.STDOUT,
-                    stdin=sp.DEVNULL,
-                    encoding='utf-8',
-                    bufsize=1,
-                    errors='replace',
-                    startupinfo=startupinfo,
-                    creationflags=(
-                        sp.CREATE_NO_WINDOW |
-                        sp.DETACHED_PROCESS |
-                        sp.CREATE_NEW_PROCESS_GROUP
-                    ) if sys.platform == 'win32' else 0
-                )
-                
-                # 发送进程创建信号
-                if hasattr(process_mkv_files, 'process_created_callback'):
-                    process_mkv_files.process_created_callback(process)
-                
-                progress_shown = False  # 标记是否已显示进度
-                
-                while True:
-                    # 检查是否被要求停止
-                    if hasattr(process_mkv_files, 'should_stop') and process_mkv_files.should_stop:
-                        process.terminate()
-                        logger.info('<font color="red">收到停止信号，终止处理</font>')
-                        return
-                        
-                    output_line = process.stdout.readline()
-                    if output_line == '' and process.poll() is not None:
-                        break
-                    if output_line:
-                        line = output_line.strip()
-                        
-                        # 处理进度信息
-                        if line.startswith('#GUI#progress'):
-                            try:
-                                current_progress = int(line.split()[-1].rstrip('%'))
-                                # 第一次显示进度
-                                if not progress_shown:
-                                    logger.info(f'<progress_start>合并进度: {current_progress}%</progress_start>')
-                                    progress_shown = True
-                                else:
-                                    # 更新进度
-                                    logger.info(f'<progress_update>{current_progress}</progress_update>')
-                            except (ValueError, IndexError):
-                                pass
-                        # 处理其他信息
-                        elif 'warning' in line.lower():
-                            logger.warning(LogFormatter.warning(line))
-                        elif 'error' in line.lower():
-                            logger.error(LogFormatter.error(f'Failed to process {file}: {line}'))
-                        elif not line.startswith('#GUI#') and not line.startswith('｢'):  # 忽略GUI和文件信息
-                            logger.info(line)
-                
-                return_code = process.poll()
-                if return_code == 0:
-                    logger.info(LogFormatter.success('Successfully processed: ' + output))
-                    
-                    # 在命令执行成功后复制字幕文件
-                    logger.info(LogFormatter.subsection("复制字幕文件"))
-                    for src_path, ass_file_name in subtitle_files:
-                        output_ass_path = os.path.join(output, ass_file_name)
-                        try:
-                            import shutil
-                            shutil.copy2(src_path, output_ass_path)
-                            logger.info(LogFormatter.success(f'字幕文件已复制到: {output_ass_path}'))
-                        except Exception as e:
-                            logger.error(LogFormatter.error(f'复制字幕文件失败: {str(e)}'))
+    started = time.perf_counter()
+    mkv_file = MKVFile(input_file, cancel=cancel)
+    probe_seconds = time.perf_counter() - started
+    font_seconds = 0.0
+    file_name, _ = os.path.splitext(file)
+
+    # 记录需要复制的字幕文件
+    subtitle_files = []
+
+    # 检查字幕文件
+    logger.info(LogFormatter.subsection("字幕检查"))
+    for ass_suffix in SUBTITLE_SUFFIXES:
+        ass_file_name = file_name + ass_suffix
+        ass_file_path = os.path.join(root, ass_file_name)
+        if not os.path.exists(ass_file_path):
+            continue
+
+        logger.info(LogFormatter.list_item(f'Find ASS file: {ass_file_name}'))
+        subtitle_files.append((ass_file_path, ass_file_name))  # 记录字幕文件
+
+        # 获取字幕使用的字体和未找到的字体
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        started = time.perf_counter()
+        font_files, missing = font_manager.get_font_files_for_subtitle(ass_file_path, return_missing=True)
+        font_seconds += time.perf_counter() - started
+        all_missing_fonts.update(missing)
+
+        if font_files:
+            logger.info(LogFormatter.list_item(f'Found {len(font_files)} fonts for subtitle'))
+            for font_file in font_files:
+                if os.path.exists(font_file):
+                    font_name = os.path.basename(font_file)
+                    logger.info(LogFormatter.list_item(f'Adding font: {font_name}'))
+                    mkv_file.add_attachment(font_file)
                 else:
-                    logger.error(LogFormatter.error(f'Failed to process {file} with return code {return_code}'))
-                
-            except sp.CalledProcessError as e:
-                logger.error(LogFormatter.error(f'Failed to process {file}: {str(e)}'))
+                    logger.warning(LogFormatter.list_item(f'Font file not found: {font_file}'))
 
-    # 在所有文件处理完成后，显示所有未找到的字体汇总
+        # 添加字幕轨道
+        ass_file_track = MKVTrack(
+            ass_file_path,
+            track_name="简体中文",
+            default_track=True,
+            language="chi"
+        )
+        mkv_file.add_track(ass_file_track)
+
+    # 生成命令
+    argv = mkv_file.command(current_output, subprocess=True)
+    job = PlannedJob(
+        index=index,
+        input_file=input_file,
+        output_file=argv[argv.index('-o') + 1],
+        argv=argv,
+        subtitle_files=subtitle_files,
+        attachments=[attachment.file_path for attachment in mkv_file.append_attachments],
+        timings={'probe': probe_seconds, 'fonts': font_seconds},
+    )
+    if print_command:
+        logger.info(LogFormatter.section('Merge Command:'))
+        logger.info(job.shell_command)
+    return job
+
+
+def execute_plan(plan: MergePlan, jobs: int = 1, device_limits: Optional[Dict[str, int]] = None,
+                 resume: bool = False, journal_path: Optional[str] = None, force: bool = False,
+                 mkvmerge_path: Optional[str] = None,
+                 progress_callback: Optional[Callable[[JobProgress], None]] = None,
+                 progress_rate: float = 4.0, metrics_path: Optional[str] = None,
+                 prometheus_path: Optional[str] = None,
+                 cancel: Optional[CancelToken] = None) -> Optional[List[MuxResult]]:
+    """
+    执行合并计划
+    
+    Args:
+        plan: plan_merge 生成或从 JSON 读取的计划
+        jobs: 同时运行的合并任务数；大于 1 时每个文件的日志在合并结束后整段输出
+        device_limits: {路径: 上限}，指定路径所在存储设备上同时运行的任务数
+        resume: 根据任务日志跳过已完成的文件，重新合并失败或被中断的文件
+        journal_path: 任务日志路径，默认为计划输出目录下的 mergemkv-journal.jsonl
+        force: 忽略输出清单，重新合并所有文件
+        mkvmerge_path: 使用指定的 mkvmerge 代替计划中的路径（例如在另一台机器上执行）
+        progress_callback: 接收 JobProgress 的回调，每个任务只发送最新的进度，任务结束时发送 done 为 True 的事件
+        progress_rate: 每秒最多调用几次 progress_callback
+        metrics_path: 每个任务耗时和吞吐量统计的 JSON 路径，默认为计划输出目录下的 mergemkv-metrics.json
+        prometheus_path: 同时写入 node_exporter textfile 格式统计的 .prom 文件路径
+        cancel: 取消令牌，取消时不再启动排队中的合并，终止所有正在运行的 mkvmerge 并删除临时输出
+        
+    Returns:
+        按计划顺序排列的合并结果；取消时返回 None
+    """
+    logger = LogManager.get_logger()
+    logger.info(LogFormatter.section("执行合并"))
+    started = time.monotonic()
+    os.makedirs(plan.output, exist_ok=True)
+    journal = JobJournal(journal_path or os.path.join(plan.output, JOURNAL_FILE_NAME))
+    journal.open(resume=resume)
+    planned_jobs = plan.jobs
+    if resume:
+        # process_mkv_files 在生成计划时已跳过；这里处理 plan 保存后再执行的计划
+        planned_jobs = [job for job in planned_jobs if not journal.is_done(job.input_file)]
+        logger.info(f"继续上次的处理: 跳过 {len(plan.jobs) - len(planned_jobs)} 个已完成的文件，"
+                    f"剩余 {len(planned_jobs)} 个")
+
+    # 所有 mkvmerge 进程的输出都在同一个监督线程中读取
+    supervisor = MuxSupervisor()
+    progress = ProgressThrottle(progress_callback, max_rate=progress_rate) if progress_callback else None
+    if cancel is None:
+        cancel = CancelToken()
+    scheduler = MuxScheduler(partial(_execute_job, supervisor=supervisor, journal=journal, progress=progress,
+                                     cancel=cancel),
+                             jobs=jobs, device_limits=DeviceLimits(overrides=device_limits) if jobs > 1 else None)
+    # 取消时立即取消排队中的合并，正在运行的合并由 _execute_job 终止
+    unregister = cancel.register(scheduler.cancel)
+    try:
+        results = _submit_jobs(planned_jobs, scheduler, journal, force, mkvmerge_path, cancel)
+    except BaseException:
+        # 出错时不再启动排队中的合并
+        scheduler.cancel()
+        raise
+    finally:
+        unregister()
+        supervisor.close()
+        if progress is not None:
+            progress.close()
+        journal.close()
+    if results is not None:
+        _write_metrics(plan, results, time.monotonic() - started,
+                       metrics_path or os.path.join(plan.output, METRICS_FILE_NAME), prometheus_path)
+    return results
+
+
+def _write_metrics(plan: MergePlan, results: List[MuxResult], wall_seconds: float,
+                   metrics_path: str, prometheus_path: Optional[str]) -> None:
+    """输出按设备汇总的吞吐量，并写入 JSON 和 Prometheus 统计；写入失败不影响合并结果"""
+    logger = LogManager.get_logger()
+    metrics = collect_metrics(plan, results)
+    logger.info(LogFormatter.subsection("合并速度"))
+    for device, item in summarize_by_device(metrics).items():
+        logger.info(LogFormatter.list_item(
+            f'{device}: {item["mb_per_second"]:.1f} MB/s，合并 {item["mux_seconds"]:.1f}s，'
+            f'排队 {item["queue_seconds"]:.1f}s，识别 {item["probe_seconds"]:.1f}s，字体 {item["font_seconds"]:.1f}s'))
+    try:
+        write_json(metrics, metrics_path, wall_seconds)
+        if prometheus_path:
+            write_prometheus(metrics, prometheus_path, wall_seconds)
+    except OSError as e:
+        logger.warning(LogFormatter.warning(f'无法写入合并统计: {str(e)}'))
+
+
+def _remove_partial_output(input_file: str, journal: JobJournal, logger) -> None:
+    """删除上次被中断或失败的合并留下的不完整输出"""
+    partial_output = journal.partial_output(input_file)
+    if partial_output is None:
+        return
+    try:
+        os.remove(partial_output)
+        logger.info(LogFormatter.list_item(f'删除上次未完成的输出: {partial_output}'))
+    except OSError as e:
+        logger.warning(LogFormatter.warning(f'无法删除未完成的输出 {partial_output}: {str(e)}'))
+
+
+def _submit_jobs(planned_jobs: List[PlannedJob], scheduler: MuxScheduler, journal: JobJournal, force: bool,
+                 mkvmerge_path: Optional[str], cancel: CancelToken) -> Optional[List[MuxResult]]:
+    """
+    按计划顺序把合并任务交给调度器执行，跳过输出清单未变化的任务
+    
+    Returns:
+        按计划顺序排列的合并结果，取消时返回 None
+    """
+    versions: Dict[str, str] = {}
+    for planned in planned_jobs:
+        if cancel.is_cancelled():
+            LogManager.get_logger().info('<font color="red">收到停止信号，终止处理</font>')
+            scheduler.cancel()
+            scheduler.wait()
+            return None
+
+        if planned.passthrough is not None:
+            argv = []
+            # 策略写入清单，改用其他方式（例如不再使用硬链接）时重新放入输出目录
+            manifest = build_manifest(planned.inputs, ['passthrough', planned.passthrough], '')
+        else:
+            argv = list(planned.argv)
+            if mkvmerge_path is not None:
+                argv[0] = mkvmerge_path
+            if argv[0] not in versions:
+                versions[argv[0]] = MkvmergeCache.get_instance().probe(argv[0]).version
+            manifest = build_manifest(planned.inputs, argv, versions[argv[0]])
+
+        # 并发执行时先缓存日志，合并结束后整段输出
+        job_log = JobLog(buffered=scheduler.concurrent)
+        job_log.info(LogFormatter.subsection(f"合并文件: {os.path.basename(planned.input_file)}"))
+        job = MuxJob(
+            index=planned.index,
+            input_file=planned.input_file,
+            output_file=planned.output_file,
+            command=argv,
+            subtitle_files=planned.subtitle_files,
+            output_dir=planned.output_dir,
+            log=job_log,
+            manifest=manifest,
+            estimated_bytes=planned.estimated_bytes,
+            passthrough=planned.passthrough,
+        )
+        if not force and is_up_to_date(planned.output_file, manifest):
+            job_log.info(LogFormatter.success(f'输入和命令均未变化，跳过合并: {planned.output_file}'))
+            journal.record(planned.input_file, STATE_DONE, planned.output_file)
+            scheduler.skip(job)
+            continue
+
+        _remove_partial_output(planned.input_file, journal, job_log)
+        journal.record(planned.input_file, STATE_PLANNED, planned.output_file)
+        if planned.passthrough is None:
+            job_log.info('Running with command:')
+            job_log.info(planned.shell_command)
+        scheduler.submit(job)
+
+    results = scheduler.wait()
+    if cancel.is_cancelled():
+        return None
+    return results
+
+
+def _wait_child(process: MuxChild, cancel: CancelToken) -> int:
+    """等待 mkvmerge 退出；取消时已发送终止信号，TERMINATE_TIMEOUT 秒内仍未退出则强制结束"""
+    while not cancel.is_cancelled():
+        try:
+            return process.wait(timeout=STOP_CHECK_INTERVAL)
+        except sp.TimeoutExpired:
+            pass
+    try:
+        return process.wait(timeout=TERMINATE_TIMEOUT)
+    except sp.TimeoutExpired:
+        process.kill()
+        return process.wait()
+
+
+def _execute_job(job: MuxJob, supervisor: MuxSupervisor, journal: Optional[JobJournal] = None,
+                 progress: Optional[ProgressThrottle] = None, cancel: Optional[CancelToken] = None) -> MuxResult:
+    """
+    执行单个合并任务，mkvmerge 的输出由 supervisor 读取，日志写入 job.log，进度交给 progress，状态写入任务日志
+    
+    mkvmerge 写入临时文件，成功后才改名为输出文件；失败或被取消时删除临时文件
+    """
+    logger = job.log
+    file = os.path.basename(job.input_file)
+    if cancel is None:
+        cancel = CancelToken()
+    if cancel.is_cancelled():
+        return MuxResult(job, JOB_CANCELLED)
+    if job.passthrough is not None:
+        return _execute_passthrough(job, journal, cancel)
+
+    if not has_free_space(job.output_file, job.estimated_bytes):
+        logger.error(LogFormatter.error(
+            f'Failed to process {file}: 输出目录剩余空间不足 {job.estimated_bytes / 1024 / 1024:.0f} MB'))
+        if journal is not None:
+            journal.record(job.input_file, STATE_FAILED, job.output_file)
+        return MuxResult(job, JOB_FAILED)
+    temp_file = partial_path(job.output_file)
+    discard(temp_file)
+
+    def on_event(event):
+        # 在监督线程中调用
+        if isinstance(event, MuxProgress):
+            if progress is not None:
+                progress.update(job.index, job.input_file, event.percent)
+        elif isinstance(event, MuxMessage):
+            if event.level == 'warning':
+                logger.warning(LogFormatter.warning(event.text))
+            elif event.level == 'error':
+                logger.error(LogFormatter.error(f'Failed to process {file}: {event.text}'))
+            else:
+                logger.info(event.text)
+
+    process = supervisor.spawn(replace_output(job.command, temp_file), on_event)
+    
+    if journal is not None:
+        journal.record(job.input_file, STATE_RUNNING, job.output_file)
+    
+    # 取消时立即终止进程，不等下一次检查
+    unregister = cancel.register(process.terminate)
+    try:
+        return_code = _wait_child(process, cancel)
+    finally:
+        unregister()
+        if progress is not None:
+            progress.finish(job.index, job.input_file)
+    if cancel.is_cancelled() and return_code != 0:
+        discard(temp_file)
+        logger.info('<font color="red">收到停止信号，终止处理</font>')
+        return MuxResult(job, JOB_CANCELLED)
+    
+    if return_code != 0:
+        discard(temp_file)
+        logger.error(LogFormatter.error(f'Failed to process {file} with return code {return_code}'))
+        if journal is not None:
+            journal.record(job.input_file, STATE_FAILED, job.output_file, return_code)
+        return MuxResult(job, JOB_FAILED, return_code)
+
+    try:
+        commit(temp_file, job.output_file)
+    except OSError as e:
+        discard(temp_file)
+        logger.error(LogFormatter.error(f'Failed to process {file}: 无法保存输出文件: {str(e)}'))
+        if journal is not None:
+            journal.record(job.input_file, STATE_FAILED, job.output_file, return_code)
+        return MuxResult(job, JOB_FAILED, return_code)
+    logger.info(LogFormatter.success('Successfully processed: ' + job.output_dir))
+    
+    # 在命令执行成功后复制字幕文件
+    logger.info(LogFormatter.subsection("复制字幕文件"))
+    outputs = [job.output_file]
+    copied = True
+    for src_path, ass_file_name in job.subtitle_files:
+        output_ass_path = os.path.join(job.output_dir, ass_file_name)
+        try:
+            copy_atomic(src_path, output_ass_path)
+            outputs.append(output_ass_path)
+            logger.info(LogFormatter.success(f'字幕文件已复制到: {output_ass_path}'))
+        except Exception as e:
+            copied = False
+            logger.error(LogFormatter.error(f'复制字幕文件失败: {str(e)}'))
+    # 字幕复制失败时不写清单，下次重新处理
+    if job.manifest is not None and copied:
+        write_manifest(job.output_file, job.manifest, outputs)
+    if journal is not None:
+        journal.record(job.input_file, STATE_DONE, job.output_file, return_code)
+    return MuxResult(job, JOB_DONE, return_code)
+
+
+def _execute_passthrough(job: MuxJob, journal: Optional[JobJournal] = None,
+                         cancel: Optional[CancelToken] = None) -> MuxResult:
+    """不经过 mkvmerge，按 job.passthrough 策略把源文件放到输出路径"""
+    logger = job.log
+    file = os.path.basename(job.input_file)
+    if journal is not None:
+        journal.record(job.input_file, STATE_RUNNING, job.output_file)
+    try:
+        method = place(job.input_file, job.output_file, job.passthrough,
+                       cancelled=cancel.is_cancelled if cancel is not None else None)
+    except InterruptedError:
+        logger.info('<font color="red">收到停止信号，终止处理</font>')
+        return MuxResult(job, JOB_CANCELLED)
+    except OSError as e:
+        logger.error(LogFormatter.error(f'Failed to process {file}: {str(e)}'))
+        if journal is not None:
+            journal.record(job.input_file, STATE_FAILED, job.output_file)
+        return MuxResult(job, JOB_FAILED)
+    logger.info(LogFormatter.success(f'已放入输出目录 ({method}): {job.output_file}'))
+    if job.manifest is not None:
+        write_manifest(job.output_file, job.manifest, [job.output_file])
+    if journal is not None:
+        journal.record(job.input_file, STATE_DONE, job.output_file, 0)
+    return MuxResult(job, JOB_DONE, 0)
+
+
+def _log_run_summary(all_missing_fonts: List[str], results: List[MuxResult]):
+    """输出未找到的字体、合并结果和文件识别统计"""
+    logger = LogManager.get_logger()
     if all_missing_fonts:
         logger.info(LogFormatter.section("所有未找到的字体汇总"))
         logger.info(f'<font color="red">总共有 {len(all_missing_fonts)} 个字体未找到:</font>')
         for font in sorted(all_missing_fonts):
             logger.info(f'<font color="red">- {font}</font>')
+
+    # 合并结果，按输入顺序列出失败的文件
+    if results:
+        failed = [result for result in results if result.status not in (JOB_DONE, JOB_SKIPPED)]
+        skipped = sum(1 for result in results if result.status == JOB_SKIPPED)
+        logger.info(LogFormatter.subsection("合并结果"))
+        logger.info(LogFormatter.list_item(f"成功: {len(results) - len(failed) - skipped}"))
+        logger.info(LogFormatter.list_item(f"未变化而跳过: {skipped}"))
+        logger.info(LogFormatter.list_item(f"失败: {len(failed)}"))
+        for result in failed:
+            logger.error(LogFormatter.list_item(f"{result.job.input_file} ({result.status})"))
+
+    # 文件识别统计
+    stats = get_identify_stats()
+    logger.info(LogFormatter.subsection("文件识别统计"))
+    logger.info(LogFormatter.list_item(f"识别请求: {stats['requests']}"))
+    logger.info(LogFormatter.list_item(f"mkvmerge -J 调用: {stats['probes']}"))
+    logger.info(LogFormatter.list_item(f"避免的调用: {stats['avoided']} (进程内 {stats['registry_hits']}, 直接读取 {stats['native']}, 磁盘缓存 {stats['cache_hits']})"))
     
     logger.info(LogFormatter.section('All files processed'))
 
@@ -13,8 +13,7 @@ from PyQt6.QtCore import (
 from PyQt6.QtGui import QIcon, QTextCursor
 import logging
 from LogManager import LogManager
-import subprocess
-from FontScanWindow import FontScanWindow
+from CancelToken import CancelToken
 from MergeMkv import process_mkv_files
 
 
@@ -49,7 +48,7 @@ class MergeWorker(QThread):
     """MKV合并工作线程"""
     log = pyqtSignal(str)
     finished = pyqtSignal()
-    process_created = pyqtSignal(object)
+    progress = pyqtSignal(object)  # JobProgress
 
     def __init__(self, input_dir: str, output_dir: str, execute: bool = True):
         super().__init__()
@@ -57,22 +56,17 @@ class MergeWorker(QThread):
         self.output_dir = output_dir
         self.execute = execute
         self._is_running = True
-        self.process = None
+        self.cancel = CancelToken()  # 每次合并使用新的取消令牌
 
     def run(self):
         try:
-            # 设置进程创建回调
-            def on_process_created(p):
-                self.process = p
-                self.process_created.emit(p)
-            
-            process_mkv_files.process_created_callback = on_process_created
-            
             process_mkv_files(
                 directory=self.input_dir,
                 output=self.output_dir,
                 execute=self.execute,
-                print_command=True
+                print_command=True,
+                progress_callback=self.progress.emit,
+                cancel=self.cancel
             )
             
             if self._is_running:
@@ -82,45 +76,18 @@ class MergeWorker(QThread):
             self.log.emit(f'Error: {str(e)}')
             import traceback
             self.log.emit(traceback.format_exc())
-        finally:
-            # 清除回调
-            if hasattr(process_mkv_files, 'process_created_callback'):
-                del process_mkv_files.process_created_callback
 
     def stop(self):
-        """停止工作线程"""
+        """停止工作线程：不再启动新的识别和合并，终止所有正在运行的 mkvmerge，删除临时输出"""
         self._is_running = False
-        
-        # 设置停止标志
-        process_mkv_files.should_stop = True
-        
-        # 终止当前进程
-        if self.process and self.process.poll() is None:
-            try:
-                if sys.platform == 'win32':
-                    # 创建 startupinfo 对象
-                    startupinfo = subprocess.STARTUPINFO()
-                    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    startupinfo.wShowWindow = subprocess.SW_HIDE
-                    subprocess.run(
-                        ['taskkill', '/F', '/T', '/PID', str(self.process.pid)],
-                        startupinfo=startupinfo,
-                        creationflags=subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0,
-                        check=True,
-                        capture_output=True
-                    )
-                else:
-                    self.process.kill()
-                self.process.wait(timeout=5)
-            except Exception:
-                pass
+        self.cancel.cancel()
 
 class MergeMkvWindow(QMainWindow):
     """MKV合并工具主窗口"""
     def __init__(self):
         super().__init__()
         self.worker = None
-        self.process = None  # 保存当前进程
+        self.job_progress = {}  # 正在合并的任务 -> 进度
         self.initUI()
         
         # 只在这里添加一次日志处理器
@@ -255,6 +222,8 @@ class MergeMkvWindow(QMainWindow):
 
     def open_font_scan(self):
         """打开字体扫描工具"""
+        # 字体扫描窗口会导入 FontManager 和 fontTools，打开时才导入，不拖慢主窗口启动
+        from FontScanWindow import FontScanWindow
         self.font_scan_window = FontScanWindow()
         self.font_scan_window.show()
 
@@ -271,10 +240,6 @@ class MergeMkvWindow(QMainWindow):
             self.log_text.append(f'错误：输入目录 "{input_dir}" 不存在！')
             return
 
-        # 重置停止标志
-        if hasattr(process_mkv_files, 'should_stop'):
-            delattr(process_mkv_files, 'should_stop')
-
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         
@@ -286,47 +251,17 @@ class MergeMkvWindow(QMainWindow):
         
         self.worker.log.connect(self.log_text.append)
         self.worker.finished.connect(self.on_merge_finished)
-        self.worker.process_created.connect(self.on_process_created)
+        self.worker.progress.connect(self.on_progress)
         self.worker.start()
 
     def stop_merge(self):
         """停止合并处理"""
         if self.worker:
-            # 设置停止标志
-            process_mkv_files.should_stop = True
-            
-            # 停止工作线程
+            # 停止工作线程，取消后正在运行的进程会在限定时间内退出
             self.worker.stop()
             self.worker.wait()  # 等待线程结束
             self.worker = None
-            
-            # 终止进程
-            if self.process and self.process.poll() is None:
-                try:
-                    if sys.platform == 'win32':
-                        # 创建 startupinfo 对象
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        startupinfo.wShowWindow = subprocess.SW_HIDE
-                        subprocess.run(
-                            ['taskkill', '/F', '/T', '/PID', str(self.process.pid)],
-                            startupinfo=startupinfo,
-                            creationflags=subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0,
-                            check=True,
-                            capture_output=True
-                        )
-                    else:
-                        self.process.kill()
-                    
-                    # 等待进程完全终止
-                    self.process.wait(timeout=5)
-                    self.process = None
-                    self.log_text.append('<font color="red">已停止合并操作</font>')
-                    
-                except Exception as e:
-                    self.log_text.append(f'<font color="red">停止进程时出错: {str(e)}</font>')
-                    import traceback
-                    self.log_text.append(traceback.format_exc())
+            self.log_text.append('<font color="red">已停止合并操作</font>')
                 
             # 恢复按钮状态
             self.start_btn.setEnabled(True)
@@ -336,18 +271,14 @@ class MergeMkvWindow(QMainWindow):
         """合并完成或停止后的处理"""
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
-        self.process = None
         self.progress_bar.setVisible(False)  # 隐藏进度条
+        self.job_progress.clear()
         if not self.execute_checkbox.isChecked():
             self.log_text.append('提示：命令已保存到当前目录下的 mergemkv.sh 文件中')
 
-    def on_process_created(self, process):
-        """保存新创建的进程"""
-        self.process = process
-
     def closeEvent(self, event):
         """窗口关闭事件处理"""
-        if self.process and self.process.poll() is None:  # 检查进程是否还在运行
+        if self.worker and self.worker.isRunning():  # 检查任务是否还在运行
             reply = QMessageBox.question(
                 self, 
                 '确认退出',
@@ -357,54 +288,32 @@ class MergeMkvWindow(QMainWindow):
             )
             
             if reply == QMessageBox.StandardButton.Yes:
-                try:
-                    if sys.platform == 'win32':
-                        startupinfo = subprocess.STARTUPINFO()
-                        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW | subprocess.STARTF_USESTDHANDLES
-                        startupinfo.wShowWindow = subprocess.SW_HIDE
-                        subprocess.run(
-                            ['taskkill', '/F', '/T', '/PID', str(self.process.pid)],
-                            startupinfo=startupinfo,
-                            creationflags=subprocess.CREATE_NO_WINDOW | subprocess.DETACHED_PROCESS if sys.platform == 'win32' else 0,
-                            check=True,
-                            capture_output=True
-                        )
-                    else:
-                        self.process.kill()
-                    
-                    # 等待进程完全终止
-                    self.process.wait(timeout=5)
-                    self.process = None
-                    self.log_text.append('<font color="red">已终止所有进程</font>')
-                    
-                except Exception as e:
-                    self.log_text.append(f'<font color="red">停止进程时出错: {str(e)}</font>')
-                    import traceback
-                    self.log_text.append(traceback.format_exc())
-                finally:
-                    event.accept()
+                self.worker.stop()
+                self.worker.wait()
+                self.worker = None
+                self.log_text.append('<font color="red">已终止所有进程</font>')
+                event.accept()
             else:
                 event.ignore()
         else:
             event.accept()
 
+    def on_progress(self, event):
+        """更新进度条，同时合并多个文件时显示正在合并的文件的平均进度"""
+        if event.done:
+            self.job_progress.pop(event.index, None)
+        else:
+            self.job_progress[event.index] = event.percent
+        self.progress_bar.setVisible(True)
+        if self.job_progress:
+            self.progress_bar.setValue(sum(self.job_progress.values()) // len(self.job_progress))
+        else:
+            self.progress_bar.setValue(100)
+
     @pyqtSlot(str)
     def append_log(self, text: str):
         """添加日志文本"""
-        if text.startswith('<progress_start>'):
-            # 显示进度条
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-        elif text.startswith('<progress_update>'):
-            # 更新进度条
-            try:
-                progress = int(text.replace('<progress_update>', '').replace('</progress_update>', ''))
-                self.progress_bar.setValue(progress)
-            except (ValueError, IndexError):
-                pass
-        else:
-            # 普通日志
-            self.log_text.append(text)
+        self.log_text.append(text)
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""合并计划。
+
+MergeMkv.plan_merge 完成查找文件、识别、字体查找和生成命令，得到一个 MergePlan；
+MergeMkv.execute_plan 只负责执行计划中的合并任务。计划可以保存为 JSON，稍后或在另一台机器上执行、
+与上次的计划比较，或者拆分给多个执行者。
+
+命令行用法:
+    python MergePlan.py show PLAN
+    python MergePlan.py split PLAN --parts N
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from AtomicOutput import write_atomic
+from Passthrough import shell_argv
+
+PLAN_VERSION = 1
+
+
+def replace_output(argv: List[str], output_file: str) -> List[str]:
+    """返回把 mkvmerge 参数中的输出文件（-o 之后的参数）换成 output_file 的新参数列表"""
+    argv = list(argv)
+    argv[argv.index('-o') + 1] = output_file
+    return argv
+
+
+def file_size(path: str) -> int:
+    """文件大小，文件不存在或无法读取时为 0"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class PlannedJob:
+    """一个视频文件的合并任务"""
+    index: int
+    input_file: str
+    output_file: str
+    argv: List[str]
+    subtitle_files: List[Tuple[str, str]]
+    attachments: List[str]
+    estimated_bytes: int
+    timings: Dict[str, float]
+    passthrough: Optional[str]
+
+    def __init__(self, index: int, input_file: str, output_file: str, argv: List[str],
+                 subtitle_files: List[Tuple[str, str]], attachments: List[str],
+                 estimated_bytes: Optional[int] = None, timings: Optional[Dict[str, float]] = None,
+                 passthrough: Optional[str] = None) -> None:
+        """
+        Args:
+            index: 在计划中的序号
+            input_file: 源视频文件
+            output_file: 输出视频文件
+            argv: mkvmerge 参数列表（argv[0] 为 mkvmerge 路径）
+            subtitle_files: [(字幕文件路径, 字幕文件名)]，合并成功后复制到输出目录
+            attachments: 附加的字体文件
+            estimated_bytes: 预计输出大小，默认为所有输入文件大小之和
+            timings: 生成计划各阶段的耗时（秒），{'probe': 识别, 'fonts': 字体查找}
+            passthrough: 不为 None 时不执行 mkvmerge，按该策略（见 Passthrough）把源文件放到输出路径，argv 为空
+        """
+        self.index = index
+        self.input_file = input_file
+        self.output_file = output_file
+        self.argv = argv
+        self.subtitle_files = subtitle_files
+        self.attachments = attachments
+        if estimated_bytes is None:
+            estimated_bytes = sum(file_size(path) for path in self.inputs)
+        self.estimated_bytes = estimated_bytes
+        self.timings = timings if timings is not None else {}
+        self.passthrough = passthrough
+
+    @property
+    def inputs(self) -> List[str]:
+        """所有输入文件：源视频、字幕和字体"""
+        return [self.input_file] + [path for path, _ in self.subtitle_files] + self.attachments
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.dirname(self.output_file)
+
+    @property
+    def outputs(self) -> List[str]:
+        """合并成功后生成的所有文件：输出视频和复制的字幕"""
+        return [self.output_file] + [os.path.join(self.output_dir, name) for _, name in self.subtitle_files]
+
+    @property
+    def shell_command(self) -> str:
+        """写入 mergemkv.sh 的命令行"""
+        if self.passthrough is not None:
+            return ' '.join(shell_argv(self.passthrough, self.input_file, self.output_file))
+        return ' '.join(arg for arg in self.argv if arg != '--gui-mode')
+
+    @staticmethod
+    def from_dict(obj: Dict[str, Any]) -> 'PlannedJob':
+        return PlannedJob(
+            obj['index'], obj['input_file'], obj['output_file'], list(obj['argv']),
+            [(path, name) for path, name in obj['subtitle_files']], list(obj['attachments']),
+            obj['estimated_bytes'], dict(obj.get('timings', {})), obj.get('passthrough'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'input_file': self.input_file,
+            'output_file': self.output_file,
+            'argv': self.argv,
+            'subtitle_files': [list(item) for item in self.subtitle_files],
+            'attachments': self.attachments,
+            'outputs': self.outputs,
+            'estimated_bytes': self.estimated_bytes,
+            'timings': self.timings,
+            'passthrough': self.passthrough,
+        }
+
+
+class MergePlan:
+    """一次批量合并的完整计划"""
+    directory: str
+    output: str
+    jobs: List[PlannedJob]
+    missing_fonts: List[str]
+    created: float
+
+    def __init__(self, directory: str, output: str, jobs: Optional[List[PlannedJob]] = None,
+                 missing_fonts: Optional[List[str]] = None, created: Optional[float] = None) -> None:
+        self.directory = directory
+        self.output = output
+        self.jobs = jobs if jobs is not None else []
+        self.missing_fonts = missing_fonts if missing_fonts is not None else []
+        self.created = created if created is not None else time.time()
+
+    @property
+    def estimated_bytes(self) -> int:
+        return sum(job.estimated_bytes for job in self.jobs)
+
+    def split(self, parts: int) -> List['MergePlan']:
+        """按预计大小把任务分成 parts 份，尽量使每份的数据量接近"""
+        plans = [MergePlan(self.directory, self.output, [], self.missing_fonts, self.created)
+                 for _ in range(max(1, parts))]
+        for job in sorted(self.jobs, key=lambda job: job.estimated_bytes, reverse=True):
+            min(plans, key=lambda plan: plan.estimated_bytes).jobs.append(job)
+        for plan in plans:
+            plan.jobs.sort(key=lambda job: job.index)
+        return plans
+
+    @staticmethod
+    def from_dict(obj: Dict[str, Any]) -> 'MergePlan':
+        if obj.get('version') != PLAN_VERSION:
+            raise ValueError(f'unsupported merge plan version: {obj.get("version")}')
+        return MergePlan(obj['directory'], obj['output'], [PlannedJob.from_dict(job) for job in obj['jobs']],
+                         list(obj['missing_fonts']), obj['created'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': PLAN_VERSION,
+            'directory': self.directory,
+            'output': self.output,
+            'created': self.created,
+            'estimated_bytes': self.estimated_bytes,
+            'missing_fonts': self.missing_fonts,
+            'jobs': [job.to_dict() for job in self.jobs],
+        }
+
+    def save(self, path: str) -> None:
+        """原子地写入 JSON 文件"""
+        write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def load(path: str) -> 'MergePlan':
+        with open(path, 'r', encoding='utf-8') as f:
+            return MergePlan.from_dict(json.load(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or split a saved merge plan')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    show_parser = subparsers.add_parser('show', help='List the jobs of a plan')
+    show_parser.add_argument('plan', help='Path to the plan JSON file')
+    split_parser = subparsers.add_parser('split', help='Split a plan into N plans of similar size')
+    split_parser.add_argument('plan', help='Path to the plan JSON file')
+    split_parser.add_argument('--parts', type=int, required=True, help='Number of plans to write')
+
+    args = parser.parse_args(argv)
+    plan = MergePlan.load(args.plan)
+    if args.action == 'show':
+        for job in plan.jobs:
+            print(f'{job.index:>4} {job.estimated_bytes / 1024 / 1024:>10.1f} MB  {job.input_file} -> {job.output_file}')
+        print(f'{len(plan.jobs)} jobs, {plan.estimated_bytes / 1024 / 1024:.1f} MB')
+    elif args.action == 'split':
+        base, ext = os.path.splitext(args.plan)
+        for number, part in enumerate(plan.split(args.parts), 1):
+            path = f'{base}.{number}{ext}'
+            part.save(path)
+            print(f'{path}: {len(part.jobs)} jobs, {part.estimated_bytes / 1024 / 1024:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
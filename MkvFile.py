@@ -1,58 +1,109 @@
 from os.path import expanduser, isfile
 import json
-from pymkv import MKVAttachment
 from MKVTrack import MKVTrack
-from Verification import verify_mkvmerge
-from MKVInfo import MkvInfo, Track
-from typing import Any, Optional, List, TypeVar, Type, cast, Callable
+from Verification import verify_mkvmerge, identify_file, aidentify_file
+from MKVInfo import MkvInfo, Track, TrackProperties
+from MuxEvents import MuxFinished, parse_gui_line
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple, TypeVar, Type, cast, Callable
 import subprocess as sp
 import configparser
 import os
 import platform
-from utils import get_mkvmerge_path
+import threading
+from utils import get_mkvmerge_path, hidden_window_kwargs
 import sys
 
+if TYPE_CHECKING:
+    from pymkv import MKVAttachment
+
 def str_add_quotes(x: Any) -> str:
     return str(x)
 
+# command-map.ini 中各节对应的轨道类型，video 轨道同时使用 global-command 和 video-command
+COMMAND_MAP_SECTIONS = {
+    'video': ('global-command', 'video-command'),
+    'audio': ('global-command',),
+}
+
+_command_map: Optional[configparser.ConfigParser] = None
+_command_projections: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+_command_map_lock = threading.Lock()
+
+
+def load_command_map() -> Tuple[configparser.ConfigParser, Dict[str, Tuple[Tuple[str, str], ...]]]:
+    """
+    读取并编译 command-map.ini，每个进程只读取一次
+
+    Returns:
+        (配置对象, {轨道类型: ((TrackProperties 属性名, mkvmerge 参数), ...)})
+        每个轨道类型的映射按节的顺序排列，节内按 TrackProperties.to_dict 的字段顺序排列，
+        与逐个遍历 to_dict 结果生成的参数顺序一致
+    """
+    global _command_map
+    if _command_map is not None:
+        return _command_map, _command_projections
+    with _command_map_lock:
+        if _command_map is None:
+            config = configparser.ConfigParser()
+            config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'command-map.ini'))
+            for track_type, sections in COMMAND_MAP_SECTIONS.items():
+                projection = []
+                for section in sections:
+                    for attribute in TrackProperties.__slots__:
+                        flag = config.get(section, attribute, fallback=None)
+                        if flag is not None:
+                            projection.append((attribute, flag))
+                _command_projections[track_type] = tuple(projection)
+            _command_map = config
+    return _command_map, _command_projections
+
+
 class MKVFile:
     mkvmerge_path: str
     file_path: str
     mkv_info: MkvInfo
     append_tracks: List[MKVTrack]
-    append_attachments: List[MKVAttachment]
+    append_attachments: List['MKVAttachment']
     config: configparser.ConfigParser
+    command_projections: Dict[str, Tuple[Tuple[str, str], ...]]
 
-    def __init__(self, file_path) -> None:
+    def __init__(self, file_path, cancel=None) -> None:
         self.mkvmerge_path = get_mkvmerge_path()  # 使用通用函数获取路径
         self.file_path = file_path
-        # 获取当前脚本文件的绝对路径
-        script_path = os.path.abspath(__file__)
-        script_directory = os.path.dirname(script_path)
         self.append_attachments = []
         self.append_tracks = []
-        self.config = configparser.ConfigParser()
-        self.config.read(os.path.join(script_directory,'command-map.ini'))
+        self.config, self.command_projections = load_command_map()
 
         # 只在第一次初始化时验证 mkvmerge
         if file_path is not None and not verify_mkvmerge(mkvmerge_path=self.mkvmerge_path):
             raise FileNotFoundError('未找到mkvmerge程序，请确保MKVToolNix已正确安装')
         if file_path is not None:
-            # 创建启动信息对象
-            startupinfo = None
-            if sys.platform == 'win32':
-                startupinfo = sp.STARTUPINFO()
-                startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = sp.SW_HIDE
-
             # add file title
             file_path = expanduser(file_path)
-            info_json = sp.check_output(
-                [self.mkvmerge_path, '-J', file_path],
-                startupinfo=startupinfo,
-                creationflags=sp.CREATE_NO_WINDOW | sp.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-            ).decode()
-            self.mkv_info = MkvInfo.from_dict(json.loads(info_json))
+            # cancel: CancelToken，取消时终止正在运行的 mkvmerge -J 并抛出 InterruptedError
+            info_json = identify_file(file_path, mkvmerge_path=self.mkvmerge_path, cancel=cancel)
+            self.mkv_info = MkvInfo.from_dict(info_json, lazy=True)
+
+    @classmethod
+    async def aopen(cls, file_path) -> 'MKVFile':
+        """
+        异步创建 MKVFile，识别文件时不阻塞事件循环
+        
+        Args:
+            file_path: 视频文件路径
+            
+        Returns:
+            MKVFile 对象
+        """
+        import asyncio  # 只有异步接口用到，同步合并和命令行启动时不导入
+        mkv_file = cls(None)
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, verify_mkvmerge, mkv_file.mkvmerge_path):
+            raise FileNotFoundError('未找到mkvmerge程序，请确保MKVToolNix已正确安装')
+        mkv_file.file_path = expanduser(file_path)
+        info_json = await aidentify_file(mkv_file.file_path, mkvmerge_path=mkv_file.mkvmerge_path)
+        mkv_file.mkv_info = MkvInfo.from_dict(info_json, lazy=True)
+        return mkv_file
 
     def add_track(self, track):
         if isinstance(track, str):
@@ -63,6 +114,8 @@ class MKVFile:
             raise TypeError('track is not str or MKVTrack')
 
     def add_attachment(self, attachment):
+        # 导入 pymkv 会加载 pkg_resources，较慢，首次添加附件时才导入
+        from pymkv import MKVAttachment
         if isinstance(attachment, str):
             self.append_attachments.append(MKVAttachment(attachment))
         elif isinstance(attachment, MKVAttachment):
@@ -86,15 +139,19 @@ class MKVFile:
         command.extend(["--no-attachments"])
 
         tracks = mkv_info.tracks
+        projections = self.command_projections
         file_id=0
         for track in tracks:
-            track_id = str(track.id)
-            trackProperties = track.properties
-            if track.type == 'video' or track.type == 'audio':
+            projection = projections.get(track.type)
+            if projection is not None:
+                track_id = str(track.id)
                 command.extend(['--compression', track_id + ':none'])
-                command.extend(self.create_command(track_id, command_map_name='global-command', properties=trackProperties.to_dict()))
-                if track.type == 'video':
-                    command.extend(self.create_command(track_id, command_map_name='video-command', properties=trackProperties.to_dict()))
+                trackProperties = track.properties
+                if trackProperties is not None:
+                    for attribute, flag in projection:
+                        value = getattr(trackProperties, attribute)
+                        if value is not None:
+                            command.extend([flag, str_add_quotes(track_id + ':' + str(value))])
                 track_order.append(str(file_id) + ':' + track_id)
         # add path
         command.append(str_add_quotes(self.file_path))
@@ -137,6 +194,34 @@ class MKVFile:
         return " ".join(command)
 
 
+    async def amux(self, output_path):
+        """
+        异步执行合并，按顺序产出 MuxProgress / MuxMessage 事件，最后产出 MuxFinished
+        
+        生成器被提前关闭或任务被取消时会终止 mkvmerge 进程。
+        
+        Args:
+            output_path: 输出目录
+        """
+        import asyncio
+        process = await asyncio.create_subprocess_exec(
+            *self.command(output_path, subprocess=True),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            stdin=asyncio.subprocess.DEVNULL,
+            **hidden_window_kwargs()
+        )
+        try:
+            async for raw_line in process.stdout:
+                event = parse_gui_line(raw_line.decode('utf-8', errors='replace').strip())
+                if event is not None:
+                    yield event
+            yield MuxFinished(await process.wait())
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
     def create_command(self, track_id:str, command_map_name:str, properties:dict) -> List[str]:
         command = []
         if properties is None:
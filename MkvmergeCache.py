@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+"""mkvmerge 路径、版本和功能的持久化缓存。
+
+查找 mkvmerge 可能需要读取注册表、遍历安装目录，验证还要执行 `mkvmerge -V`，每次启动都会先
+产生几次进程调用。这里把查找到的路径、`-V` 输出的版本和 `--capabilities` 列出的功能记录到
+JSON 文件中，下次启动时只要可执行文件的 mtime 和大小未变就直接使用，不再启动任何进程。
+
+utils.get_mkvmerge_path、utils.verify_mkvmerge、Verification.verify_mkvmerge 以及 MKVFile、
+MKVTrack 都通过这里获取 mkvmerge 信息。
+
+命令行用法:
+    python MkvmergeCache.py show
+    python MkvmergeCache.py refresh
+    python MkvmergeCache.py clear
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+from re import match
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from AtomicOutput import write_atomic
+from utils import hidden_window_kwargs
+
+
+class MkvmergeInfo:
+    """一个 mkvmerge 可执行文件的探测结果，version 为空表示不可用"""
+    path: str
+    version: str
+    features: List[str]
+    mtime_ns: int
+    size: int
+
+    def __init__(self, path: str, version: str, features: List[str], mtime_ns: int, size: int) -> None:
+        self.path = path
+        self.version = version
+        self.features = features
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+    @property
+    def verified(self) -> bool:
+        return bool(self.version)
+
+    @staticmethod
+    def from_dict(obj: Dict[str, Any]) -> 'MkvmergeInfo':
+        return MkvmergeInfo(obj['path'], obj['version'], list(obj['features']), obj['mtime_ns'], obj['size'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'version': self.version,
+            'features': self.features,
+            'mtime_ns': self.mtime_ns,
+            'size': self.size,
+        }
+
+
+class MkvmergeCache:
+    _instance = None
+    _instance_lock = Lock()
+
+    def __init__(self, cache_path: str = 'mkvmerge_cache.json'):
+        """
+        初始化 mkvmerge 信息缓存
+
+        Args:
+            cache_path: 缓存文件路径
+        """
+        self.cache_path = cache_path
+        self.lock = Lock()
+        self._entries: Dict[str, MkvmergeInfo] = {}
+        self._default_path: Optional[str] = None
+        self._load()
+
+    @classmethod
+    def get_instance(cls) -> 'MkvmergeCache':
+        """获取进程内共享的缓存实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _load(self) -> None:
+        """读取缓存文件，文件不存在或损坏时视为空缓存"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = {path: MkvmergeInfo.from_dict(entry) for path, entry in data.get('entries', {}).items()}
+            self._default_path = data.get('default_path')
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self._entries = {}
+            self._default_path = None
+
+    def _save(self) -> None:
+        """原子地写入缓存文件，写入失败只影响下次启动的速度"""
+        data = {
+            'default_path': self._default_path,
+            'entries': {path: info.to_dict() for path, info in self._entries.items()},
+        }
+        try:
+            write_atomic(self.cache_path, json.dumps(data, ensure_ascii=False, indent=2))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _stat(mkvmerge_path: str) -> Optional[Tuple[str, int, int]]:
+        """
+        解析可执行文件的实际位置
+
+        Returns:
+            (绝对路径, mtime_ns, 大小)，找不到时返回 None
+        """
+        resolved = shutil.which(mkvmerge_path)
+        if resolved is None:
+            return None
+        resolved = os.path.abspath(resolved)
+        try:
+            st = os.stat(resolved)
+        except OSError:
+            return None
+        return resolved, st.st_mtime_ns, st.st_size
+
+    def _lookup(self, mkvmerge_path: str) -> Tuple[Optional[MkvmergeInfo], Optional[Tuple[str, int, int]]]:
+        """返回 (仍然有效的缓存条目, 当前文件状态)，调用方需持有 self.lock"""
+        stat = self._stat(mkvmerge_path)
+        if stat is None:
+            return None, None
+        info = self._entries.get(stat[0])
+        if info is not None and (info.mtime_ns, info.size) == stat[1:]:
+            return info, stat
+        return None, stat
+
+    @staticmethod
+    def _run(mkvmerge_path: str, option: str) -> Optional[str]:
+        """执行 mkvmerge 并返回标准输出，失败返回 None"""
+        try:
+            return subprocess.check_output(
+                [mkvmerge_path, option], stdin=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                **hidden_window_kwargs()
+            ).decode('utf-8', errors='replace')
+        except (subprocess.CalledProcessError, OSError):
+            return None
+
+    def probe(self, mkvmerge_path: str, refresh: bool = False) -> MkvmergeInfo:
+        """
+        获取 mkvmerge 的版本和功能，缓存有效时不启动进程
+
+        Args:
+            mkvmerge_path: mkvmerge 路径或命令名
+            refresh: 忽略缓存重新探测
+
+        Returns:
+            MkvmergeInfo；mkvmerge 不可用时 version 为空字符串
+        """
+        with self.lock:
+            info, stat = self._lookup(mkvmerge_path)
+            if info is not None and not refresh:
+                return info
+            if stat is None:
+                return MkvmergeInfo(mkvmerge_path, '', [], 0, 0)
+
+            output = self._run(stat[0], '-V')
+            version = ''
+            features: List[str] = []
+            if output is not None and match('mkvmerge.*', output):
+                version = output.strip().splitlines()[0]
+                capabilities = self._run(stat[0], '--capabilities')
+                if capabilities is not None:
+                    features = [line.strip() for line in capabilities.splitlines() if line.strip()]
+            info = MkvmergeInfo(stat[0], version, features, stat[1], stat[2])
+            if info.verified:
+                self._entries[stat[0]] = info
+                self._save()
+            return info
+
+    def get_default_path(self, discover: Callable[[], str], refresh: bool = False) -> str:
+        """
+        获取默认 mkvmerge 路径，上次查找到的文件未变化时直接返回，否则调用 discover 重新查找
+
+        Args:
+            discover: 查找 mkvmerge 路径的函数
+            refresh: 忽略缓存重新查找
+        """
+        with self.lock:
+            if self._default_path is not None and not refresh:
+                info, _ = self._lookup(self._default_path)
+                if info is not None:
+                    return self._default_path
+        mkvmerge_path = discover()
+        info = self.probe(mkvmerge_path, refresh=refresh)
+        if info.verified:
+            with self.lock:
+                self._default_path = mkvmerge_path
+                self._save()
+        return mkvmerge_path
+
+    @property
+    def default_path(self) -> Optional[str]:
+        """上次查找到的默认 mkvmerge 路径"""
+        return self._default_path
+
+    def entries(self) -> List[MkvmergeInfo]:
+        """列出缓存的 mkvmerge 信息"""
+        with self.lock:
+            return list(self._entries.values())
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        with self.lock:
+            count = len(self._entries)
+            self._entries = {}
+            self._default_path = None
+            try:
+                os.remove(self.cache_path)
+            except OSError:
+                pass
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or refresh the cached mkvmerge location and capabilities')
+    parser.add_argument('--cache', default='mkvmerge_cache.json', help='Path to the cache file')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    subparsers.add_parser('show', help='Show cached mkvmerge binaries')
+    subparsers.add_parser('refresh', help='Look mkvmerge up again and re-probe it')
+    subparsers.add_parser('clear', help='Remove the cache file')
+
+    args = parser.parse_args(argv)
+    cache = MkvmergeCache(cache_path=args.cache)
+
+    if args.action == 'show':
+        print(f'default: {cache.default_path}')
+        for info in cache.entries():
+            print(f'{info.path}\n  version: {info.version}\n  size: {info.size}\n'
+                  f'  features: {", ".join(info.features) or "-"}')
+    elif args.action == 'refresh':
+        from utils import discover_mkvmerge_path
+        mkvmerge_path = cache.get_default_path(discover_mkvmerge_path, refresh=True)
+        info = cache.probe(mkvmerge_path)
+        print(f'{info.path}: {info.version or "not working"}')
+    elif args.action == 'clear':
+        print(f'removed: {cache.clear()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""mkvmerge 合并过程中产生的事件。
+
+mkvmerge 在 --gui-mode 下输出 `#GUI#progress 45%` 这样的进度行，以及普通的提示、警告和错误信息。
+parse_gui_line 把单行输出转换为对应的事件对象。
+
+批量合并时进度以 JobProgress 事件交给回调，不写入日志。ProgressThrottle 对每个任务只保留最新的
+进度，按设定的最高频率合并发送，日志写入和界面刷新次数不随 mkvmerge 输出进度的频率增长。
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Union
+
+
+class MuxProgress:
+    """合并进度"""
+    percent: int
+
+    def __init__(self, percent: int) -> None:
+        self.percent = percent
+
+    def __repr__(self):
+        return f'MuxProgress({self.percent})'
+
+
+class MuxMessage:
+    """mkvmerge 输出的信息，level 为 'info'、'warning' 或 'error'"""
+    level: str
+    text: str
+
+    def __init__(self, level: str, text: str) -> None:
+        self.level = level
+        self.text = text
+
+    def __repr__(self):
+        return f'MuxMessage({self.level!r}, {self.text!r})'
+
+
+class MuxFinished:
+    """mkvmerge 进程已退出"""
+    return_code: int
+
+    def __init__(self, return_code: int) -> None:
+        self.return_code = return_code
+
+    @property
+    def success(self) -> bool:
+        return self.return_code == 0
+
+    def __repr__(self):
+        return f'MuxFinished({self.return_code})'
+
+
+MuxEvent = Union[MuxProgress, MuxMessage, MuxFinished]
+
+
+def parse_gui_line(line: str) -> Optional[MuxEvent]:
+    """
+    解析 mkvmerge --gui-mode 的一行输出
+
+    Args:
+        line: 去掉首尾空白的输出行
+
+    Returns:
+        对应的事件；空行、GUI 控制信息和文件信息行返回 None
+    """
+    if not line:
+        return None
+    if line.startswith('#GUI#progress'):
+        try:
+            return MuxProgress(int(line.split()[-1].rstrip('%')))
+        except (ValueError, IndexError):
+            return None
+    lowered = line.lower()
+    if 'warning' in lowered:
+        return MuxMessage('warning', line)
+    if 'error' in lowered:
+        return MuxMessage('error', line)
+    if line.startswith('#GUI#') or line.startswith('｢'):
+        # 忽略GUI和文件信息
+        return None
+    return MuxMessage('info', line)
+
+
+class JobProgress:
+    """批量合并中某个任务的进度，done 为 True 表示任务已结束（成功、失败或被取消）"""
+    index: int
+    input_file: str
+    percent: int
+    done: bool
+
+    def __init__(self, index: int, input_file: str, percent: int, done: bool = False) -> None:
+        self.index = index
+        self.input_file = input_file
+        self.percent = percent
+        self.done = done
+
+    def __repr__(self):
+        return f'JobProgress({self.index}, {self.input_file!r}, {self.percent}, done={self.done})'
+
+
+class ProgressThrottle:
+    """
+    合并并限制进度事件的发送频率
+
+    update 可在任意线程调用，只记录每个任务的最新进度；距离上次发送不足 1 / max_rate 秒时，
+    由定时器在间隔到达后一次性发送所有任务的最新进度。回调在调用 update、finish 的线程或定时器线程中执行，
+    同一时间只执行一个回调，任务结束的事件之后不会再收到该任务的进度。
+    """
+
+    def __init__(self, callback: Callable[[JobProgress], None], max_rate: float = 4.0) -> None:
+        """
+        Args:
+            callback: 接收 JobProgress 的回调
+            max_rate: 每秒最多发送几次
+        """
+        self.callback = callback
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, JobProgress] = {}
+        self._percent: Dict[int, int] = {}  # 每个任务最后记录的进度
+        self._last_sent = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+    def update(self, index: int, input_file: str, percent: int) -> None:
+        """记录任务的最新进度"""
+        with self._lock:
+            self._pending[index] = JobProgress(index, input_file, percent)
+            self._percent[index] = percent
+            if self._timer is not None:
+                return
+            delay = self._last_sent + self.interval - time.monotonic()
+            if delay > 0:
+                self._timer = threading.Timer(delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def finish(self, index: int, input_file: str) -> None:
+        """任务结束时（无论是否成功）立即发送 done 为 True 的事件，带最后的进度"""
+        with self._send_lock:
+            with self._lock:
+                self._pending.pop(index, None)
+                percent = self._percent.pop(index, 0)
+            self._send(JobProgress(index, input_file, percent, done=True))
+
+    def flush(self) -> None:
+        """发送所有任务的最新进度"""
+        with self._send_lock:
+            with self._lock:
+                events = list(self._pending.values())
+                self._pending.clear()
+                self._timer = None
+                self._last_sent = time.monotonic()
+            for event in events:
+                self._send(event)
+
+    def close(self) -> None:
+        """取消定时器并发送剩余的进度"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        self.flush()
+
+    def _send(self, event: JobProgress) -> None:
+        try:
+            self.callback(event)
+        except Exception:
+            # 进度只用于显示，回调出错不影响合并
+            pass
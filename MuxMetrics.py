@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+"""合并任务的吞吐量统计。
+
+每个任务记录识别、字体查找、排队和合并的耗时，以及输入、输出字节数和合并速度（MB/s），
+按源文件所在的挂载点汇总。每批合并结束后写入 JSON，并可写入 Prometheus node_exporter
+textfile collector 读取的 .prom 文件（原子替换，collector 不会读到写了一半的文件），
+用于调整并发数和发现慢的网络共享。
+
+命令行用法:
+    python MuxMetrics.py show METRICS_JSON
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from AtomicOutput import write_atomic
+from MergePlan import MergePlan, file_size
+from MuxScheduler import JOB_DONE, MuxResult
+from StorageDevices import mount_point
+
+# 默认 JSON 文件名，位于输出目录下
+METRICS_FILE_NAME = 'mergemkv-metrics.json'
+
+
+class JobMetrics:
+    """单个合并任务的统计"""
+    index: int
+    input_file: str
+    output_file: str
+    device: str
+    status: str
+    input_bytes: int
+    output_bytes: int
+    probe_seconds: float
+    font_seconds: float
+    queue_seconds: float
+    mux_seconds: float
+
+    def __init__(self, index: int, input_file: str, output_file: str, device: str, status: str,
+                 input_bytes: int, output_bytes: int, probe_seconds: float, font_seconds: float,
+                 queue_seconds: float, mux_seconds: float) -> None:
+        self.index = index
+        self.input_file = input_file
+        self.output_file = output_file
+        self.device = device
+        self.status = status
+        self.input_bytes = input_bytes
+        self.output_bytes = output_bytes
+        self.probe_seconds = probe_seconds
+        self.font_seconds = font_seconds
+        self.queue_seconds = queue_seconds
+        self.mux_seconds = mux_seconds
+
+    @property
+    def wall_seconds(self) -> float:
+        """从开始识别到合并结束的总耗时"""
+        return self.probe_seconds + self.font_seconds + self.queue_seconds + self.mux_seconds
+
+    @property
+    def mb_per_second(self) -> float:
+        """合并阶段每秒读取的输入（MB）"""
+        if self.mux_seconds <= 0:
+            return 0.0
+        return self.input_bytes / 1024 / 1024 / self.mux_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'input_file': self.input_file,
+            'output_file': self.output_file,
+            'device': self.device,
+            'status': self.status,
+            'input_bytes': self.input_bytes,
+            'output_bytes': self.output_bytes,
+            'probe_seconds': self.probe_seconds,
+            'font_seconds': self.font_seconds,
+            'queue_seconds': self.queue_seconds,
+            'mux_seconds': self.mux_seconds,
+            'wall_seconds': self.wall_seconds,
+            'mb_per_second': self.mb_per_second,
+        }
+
+
+def collect_metrics(plan: MergePlan, results: List[MuxResult]) -> List[JobMetrics]:
+    """根据计划中的识别、字体耗时和调度器记录的排队、合并耗时生成每个任务的统计"""
+    planned = {job.index: job for job in plan.jobs}
+    devices: Dict[str, str] = {}
+    metrics = []
+    for result in results:
+        job = result.job
+        planned_job = planned.get(job.index)
+        directory = os.path.dirname(os.path.abspath(job.input_file))
+        if directory not in devices:
+            devices[directory] = mount_point(directory)
+        inputs = planned_job.inputs if planned_job is not None else [job.input_file]
+        outputs = planned_job.outputs if planned_job is not None else [job.output_file]
+        timings = planned_job.timings if planned_job is not None else {}
+        metrics.append(JobMetrics(
+            index=job.index,
+            input_file=job.input_file,
+            output_file=job.output_file,
+            device=devices[directory],
+            status=result.status,
+            input_bytes=sum(file_size(path) for path in inputs),
+            output_bytes=sum(file_size(path) for path in outputs) if result.status == JOB_DONE else 0,
+            probe_seconds=timings.get('probe', 0.0),
+            font_seconds=timings.get('fonts', 0.0),
+            queue_seconds=job.queue_wait,
+            mux_seconds=job.run_time,
+        ))
+    return metrics
+
+
+def summarize_by_device(metrics: List[JobMetrics]) -> Dict[str, Dict[str, Any]]:
+    """按设备汇总任务数、字节数、各阶段耗时和平均合并速度"""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for item in metrics:
+        device = summary.setdefault(item.device, {
+            'jobs': {}, 'input_bytes': 0, 'output_bytes': 0,
+            'probe_seconds': 0.0, 'font_seconds': 0.0, 'queue_seconds': 0.0, 'mux_seconds': 0.0,
+            'muxed_input_bytes': 0,
+        })
+        device['jobs'][item.status] = device['jobs'].get(item.status, 0) + 1
+        device['input_bytes'] += item.input_bytes
+        device['output_bytes'] += item.output_bytes
+        device['probe_seconds'] += item.probe_seconds
+        device['font_seconds'] += item.font_seconds
+        device['queue_seconds'] += item.queue_seconds
+        device['mux_seconds'] += item.mux_seconds
+        if item.status == JOB_DONE:
+            device['muxed_input_bytes'] += item.input_bytes
+    for device in summary.values():
+        muxed = device.pop('muxed_input_bytes')
+        device['mb_per_second'] = muxed / 1024 / 1024 / device['mux_seconds'] if device['mux_seconds'] > 0 else 0.0
+    return summary
+
+
+def write_json(metrics: List[JobMetrics], path: str, wall_seconds: Optional[float] = None) -> None:
+    """原子地写入每个任务的统计和按设备的汇总"""
+    data = {
+        'finished': time.time(),
+        'wall_seconds': wall_seconds,
+        'devices': summarize_by_device(metrics),
+        'jobs': [item.to_dict() for item in metrics],
+    }
+    write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus(metrics: List[JobMetrics], path: str, wall_seconds: Optional[float] = None) -> None:
+    """
+    写入 node_exporter textfile collector 格式的统计，文件名应以 .prom 结尾
+
+    所有指标都是最近一批合并的值（gauge）
+    """
+    summary = summarize_by_device(metrics)
+    lines = []
+
+    def gauge(name: str, help_text: str, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_label(str(val))}"' for key, val in labels.items())
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+    gauge('mergemkv_batch_jobs', 'Jobs in the last batch by device and status',
+          [({'device': device, 'status': status}, count)
+           for device, item in summary.items() for status, count in item['jobs'].items()])
+    gauge('mergemkv_batch_input_bytes', 'Input bytes of the last batch',
+          [({'device': device}, item['input_bytes']) for device, item in summary.items()])
+    gauge('mergemkv_batch_output_bytes', 'Output bytes written by the last batch',
+          [({'device': device}, item['output_bytes']) for device, item in summary.items()])
+    gauge('mergemkv_batch_phase_seconds', 'Seconds spent per phase in the last batch, summed over jobs',
+          [({'device': device, 'phase': phase}, item[f'{key}_seconds'])
+           for device, item in summary.items()
+           for phase, key in (('probe', 'probe'), ('fonts', 'font'), ('queue', 'queue'), ('mux', 'mux'))])
+    gauge('mergemkv_batch_throughput_bytes_per_second', 'Input bytes muxed per second of mux time',
+          [({'device': device}, item['mb_per_second'] * 1024 * 1024) for device, item in summary.items()])
+    if wall_seconds is not None:
+        gauge('mergemkv_batch_wall_seconds', 'Wall clock duration of the last batch', [({}, wall_seconds)])
+    gauge('mergemkv_batch_last_completion_timestamp_seconds', 'Unix time the last batch finished',
+          [({}, time.time())])
+
+    write_atomic(path, '\n'.join(lines) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show the throughput metrics of the last merge batch')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    show_parser = subparsers.add_parser('show', help='Print the per-device summary')
+    show_parser.add_argument('metrics', help='Path to the metrics JSON file')
+
+    args = parser.parse_args(argv)
+    with open(args.metrics, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if args.action == 'show':
+        for device, item in data['devices'].items():
+            jobs = ', '.join(f'{status}: {count}' for status, count in item['jobs'].items())
+            print(f'{device}\n  jobs: {jobs}\n  input: {item["input_bytes"] / 1024 / 1024:.1f} MB'
+                  f'  output: {item["output_bytes"] / 1024 / 1024:.1f} MB  {item["mb_per_second"]:.1f} MB/s\n'
+                  f'  probe {item["probe_seconds"]:.2f}s  fonts {item["font_seconds"]:.2f}s'
+                  f'  queue {item["queue_seconds"]:.2f}s  mux {item["mux_seconds"]:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""并发执行合并任务。
+
+MuxScheduler 最多同时运行 N 个合并任务。每个任务的日志先写入自己的 JobLog，任务结束后按提交顺序
+整段输出，因此并发执行时同一文件的日志不会与其他文件交错，结果也按输入顺序报告。N 为 1 时任务在
+提交线程中直接执行，日志实时输出，与逐个处理完全相同。
+
+指定 DeviceLimits 时，每个任务还会占用源文件和输出文件所在设备的名额；排在前面的任务所在设备已满时，
+先启动其他设备上的任务。
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from LogFormatter import LogFormatter
+from LogManager import LogManager
+from StorageDevices import DeviceLimits
+
+# 任务状态
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_SKIPPED = 'skipped'
+
+
+class JobLog:
+    """
+    单个任务的日志
+
+    buffered 为 False 时直接写入日志；为 True 时先缓存，由 flush 一次性输出。
+    提供与 logging.Logger 相同的 info/warning/error/debug 方法。
+    """
+
+    def __init__(self, buffered: bool = False) -> None:
+        self.buffered = buffered
+        self.records: List[Tuple[int, str]] = []
+
+    def log(self, level: int, message: str) -> None:
+        if self.buffered:
+            self.records.append((level, message))
+        else:
+            LogManager.get_logger().log(level, message)
+
+    def debug(self, message: str) -> None:
+        self.log(logging.DEBUG, message)
+
+    def info(self, message: str) -> None:
+        self.log(logging.INFO, message)
+
+    def warning(self, message: str) -> None:
+        self.log(logging.WARNING, message)
+
+    def error(self, message: str) -> None:
+        self.log(logging.ERROR, message)
+
+    @contextmanager
+    def capture(self):
+        """
+        缓存模式下，把当前线程通过 LogManager 日志器输出的日志（例如字体查找）也写入缓存
+        """
+        if not self.buffered:
+            yield self
+            return
+        logger = LogManager.get_logger()
+        log_filter = _ThreadCapture(self.records)
+        logger.addFilter(log_filter)
+        try:
+            yield self
+        finally:
+            logger.removeFilter(log_filter)
+
+    def flush(self) -> None:
+        """输出缓存的日志"""
+        logger = LogManager.get_logger()
+        for level, message in self.records:
+            logger.log(level, message)
+        self.records = []
+
+
+class _ThreadCapture(logging.Filter):
+    """拦截指定线程的日志记录并写入列表"""
+
+    def __init__(self, records: List[Tuple[int, str]]) -> None:
+        super().__init__()
+        self.records = records
+        self.thread_id = threading.get_ident()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.thread != self.thread_id:
+            return True
+        self.records.append((record.levelno, record.getMessage()))
+        return False
+
+
+class MuxJob:
+    """一个待执行的合并任务"""
+    index: int
+    input_file: str
+    output_file: str
+    command: List[str]
+    subtitle_files: List[Tuple[str, str]]
+    output_dir: str
+    log: JobLog
+    manifest: Optional[Dict[str, Any]]
+    estimated_bytes: int
+    passthrough: Optional[str]
+    devices: Tuple[int, ...]
+    queued_at: Optional[float]    # time.monotonic()，提交时间
+    started_at: Optional[float]   # 开始执行时间，未执行为 None
+    finished_at: Optional[float]  # 执行结束时间
+
+    def __init__(self, index: int, input_file: str, output_file: str, command: List[str],
+                 subtitle_files: List[Tuple[str, str]], output_dir: str, log: JobLog,
+                 manifest: Optional[Dict[str, Any]] = None, estimated_bytes: int = 0,
+                 passthrough: Optional[str] = None) -> None:
+        self.index = index
+        self.input_file = input_file
+        self.output_file = output_file
+        self.command = command
+        self.subtitle_files = subtitle_files
+        self.output_dir = output_dir
+        self.log = log
+        self.manifest = manifest
+        self.estimated_bytes = estimated_bytes
+        self.passthrough = passthrough
+        self.devices = ()
+        self.queued_at = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def queue_wait(self) -> float:
+        """在队列中等待的秒数"""
+        if self.queued_at is None or self.started_at is None:
+            return 0.0
+        return self.started_at - self.queued_at
+
+    @property
+    def run_time(self) -> float:
+        """执行的秒数"""
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class MuxResult:
+    """合并任务的结果，status 为 JOB_DONE、JOB_FAILED、JOB_CANCELLED 或 JOB_SKIPPED"""
+    job: MuxJob
+    status: str
+    return_code: Optional[int]
+
+    def __init__(self, job: MuxJob, status: str, return_code: Optional[int] = None) -> None:
+        self.job = job
+        self.status = status
+        self.return_code = return_code
+
+    def __repr__(self):
+        return f'MuxResult({self.job.input_file!r}, {self.status!r}, {self.return_code!r})'
+
+
+class MuxScheduler:
+    """
+    合并任务调度器
+
+    submit 和 wait 只能在同一个线程中调用；任务日志和 on_report 回调都在该线程中按提交顺序执行。
+    """
+
+    def __init__(self, run: Callable[[MuxJob], MuxResult], jobs: int = 1,
+                 on_report: Optional[Callable[[MuxResult], None]] = None,
+                 device_limits: Optional[DeviceLimits] = None) -> None:
+        """
+        Args:
+            run: 执行单个任务的函数，需自行检查停止信号
+            jobs: 最多同时运行的任务数
+            on_report: 任务结果按提交顺序报告时调用
+            device_limits: 每个存储设备的并发上限，None 表示只限制总任务数
+        """
+        self.run = run
+        self.jobs = max(1, jobs)
+        self.on_report = on_report
+        self.device_limits = device_limits
+        self._device_running: Dict[int, int] = {}
+        self._condition = threading.Condition()
+        self._queued: List[MuxJob] = []          # 已提交、尚未开始的任务
+        self._running = 0
+        self._results = {}                       # job.index -> MuxResult
+        self._order: List[MuxJob] = []           # 所有任务，按提交顺序
+        self._reported = 0
+        self._cancelled = False
+
+    @property
+    def concurrent(self) -> bool:
+        """是否会并发执行任务；调用方据此决定任务日志是否需要缓存"""
+        return self.jobs > 1
+
+    def submit(self, job: MuxJob) -> None:
+        """提交任务；单任务模式下直接在当前线程执行"""
+        job.queued_at = time.monotonic()
+        self._order.append(job)
+        if not self.concurrent:
+            self._results[job.index] = self._run_job(job)
+        else:
+            if self.device_limits is not None:
+                job.devices = self.device_limits.devices_for((job.input_file, job.output_file))
+                self._log_new_devices(job.devices)
+            with self._condition:
+                self._queued.append(job)
+                self._dispatch()
+        self._report_finished()
+
+    def skip(self, job: MuxJob) -> None:
+        """记录一个无需执行的任务，与其他任务一起按提交顺序报告"""
+        self._order.append(job)
+        with self._condition:
+            self._results[job.index] = MuxResult(job, JOB_SKIPPED)
+        self._report_finished()
+
+    def cancel(self) -> None:
+        """取消所有尚未开始的任务，正在运行的任务由 run 自行检查停止信号"""
+        with self._condition:
+            self._cancelled = True
+            for job in self._queued:
+                self._results[job.index] = MuxResult(job, JOB_CANCELLED)
+            self._queued = []
+            self._condition.notify_all()
+
+    def wait(self) -> List[MuxResult]:
+        """等待所有任务结束，按提交顺序报告并返回结果"""
+        while self._reported < len(self._order):
+            with self._condition:
+                while self._order[self._reported].index not in self._results:
+                    self._condition.wait()
+            self._report_finished()
+        return [self._results[job.index] for job in self._order]
+
+    def _log_new_devices(self, devices: Tuple[int, ...]) -> None:
+        """第一次遇到某个设备时输出其类型和并发上限"""
+        for device in devices:
+            if device in self._device_running:
+                continue
+            self._device_running[device] = 0
+            limit = self.device_limits.limit(device)
+            LogManager.get_logger().info(LogFormatter.list_item(
+                f'存储设备 {device} ({self.device_limits.kind(device)}): '
+                f'{"最多 " + str(limit) + " 个任务" if limit is not None else "不限制"}'))
+
+    def _admissible(self, job: MuxJob) -> bool:
+        """任务涉及的每个设备都还有名额"""
+        for device in job.devices:
+            limit = self.device_limits.limit(device)
+            if limit is not None and self._device_running.get(device, 0) >= limit:
+                return False
+        return True
+
+    def _dispatch(self) -> None:
+        """在持有锁时按提交顺序启动可以开始的任务，跳过设备名额已满的任务"""
+        position = 0
+        while position < len(self._queued) and self._running < self.jobs and not self._cancelled:
+            job = self._queued[position]
+            if not self._admissible(job):
+                position += 1
+                continue
+            del self._queued[position]
+            self._running += 1
+            for device in job.devices:
+                self._device_running[device] = self._device_running.get(device, 0) + 1
+            threading.Thread(target=self._worker, args=(job,), name=f'mux-{job.index}', daemon=True).start()
+
+    def _worker(self, job: MuxJob) -> None:
+        result = self._run_job(job)
+        with self._condition:
+            self._results[job.index] = result
+            self._running -= 1
+            for device in job.devices:
+                self._device_running[device] -= 1
+            self._dispatch()
+            self._condition.notify_all()
+
+    def _run_job(self, job: MuxJob) -> MuxResult:
+        job.started_at = time.monotonic()
+        try:
+            return self.run(job)
+        except Exception as e:
+            job.log.error(f'Failed to process {job.input_file}: {str(e)}')
+            return MuxResult(job, JOB_FAILED)
+        finally:
+            job.finished_at = time.monotonic()
+
+    def _report_finished(self) -> None:
+        """按提交顺序输出已结束任务的日志和结果"""
+        while self._reported < len(self._order):
+            job = self._order[self._reported]
+            with self._condition:
+                result = self._results.get(job.index)
+            if result is None:
+                return
+            job.log.flush()
+            self._reported += 1
+            if self.on_report is not None:
+                self.on_report(result)
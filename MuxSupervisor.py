@@ -0,0 +1,186 @@
+"""在一个线程中监督多个 mkvmerge 进程。
+
+MuxSupervisor 在自己的线程中运行 asyncio 事件循环（Windows 下为 Proactor，管道也能异步读取），
+所有子进程的 --gui-mode 输出都在这个线程中以非阻塞方式读取，解析为 MuxEvents 中的事件后立即交给
+回调，不经过队列。每个子进程只保留一段未完成的行，超过 max_line 字节的行截断，因此输出再多，
+每个子进程占用的内存也有上限。
+
+spawn 返回的 MuxChild 提供与 subprocess.Popen 相同的 pid、poll、wait、terminate、kill，
+可以在任意线程中调用，GUI 的进程回调无需修改。
+"""
+
+import subprocess
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from LogManager import LogManager
+from MuxEvents import MuxEvent, MuxFinished, parse_gui_line
+from utils import hidden_window_kwargs
+
+if TYPE_CHECKING:
+    import asyncio
+
+# 每次从管道读取的字节数
+READ_CHUNK_BYTES = 64 * 1024
+# 单行输出的上限，超出部分丢弃
+MAX_LINE_BYTES = 64 * 1024
+
+
+class MuxChild:
+    """由 MuxSupervisor 管理的 mkvmerge 进程"""
+    argv: List[str]
+    pid: Optional[int]
+    returncode: Optional[int]
+
+    def __init__(self, supervisor: 'MuxSupervisor', argv: List[str], on_event: Callable[[MuxEvent], None]) -> None:
+        self.argv = argv
+        self.pid = None
+        self.returncode = None
+        self.on_event = on_event
+        self._supervisor = supervisor
+        self._process: Optional['asyncio.subprocess.Process'] = None
+        self._error: Optional[BaseException] = None
+        self._started = threading.Event()
+        self._exited = threading.Event()
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """等待进程退出并读完输出，超时抛出 subprocess.TimeoutExpired"""
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.argv, timeout)
+        return self.returncode
+
+    def terminate(self) -> None:
+        self._supervisor._signal(self, 'terminate')
+
+    def kill(self) -> None:
+        self._supervisor._signal(self, 'kill')
+
+
+class MuxSupervisor:
+    """
+    mkvmerge 进程监督器
+
+    回调在监督线程中执行，应当很快返回；使用完毕后调用 close，仍在运行的进程会被终止。
+    """
+
+    def __init__(self, max_line: int = MAX_LINE_BYTES) -> None:
+        # 在创建监督器（开始合并）时才导入 asyncio，命令行和图形界面启动时不导入
+        import asyncio
+        self.max_line = max_line
+        self._loop = asyncio.new_event_loop()
+        self._children: List[MuxChild] = []
+        self._thread = threading.Thread(target=self._loop.run_forever, name='mux-supervisor', daemon=True)
+        self._thread.start()
+
+    def spawn(self, argv: List[str], on_event: Callable[[MuxEvent], None]) -> MuxChild:
+        """
+        启动 mkvmerge 进程，等待进程创建后返回
+
+        Args:
+            argv: 命令参数列表，应包含 --gui-mode
+            on_event: 收到 MuxProgress / MuxMessage 事件时调用，进程退出且输出读完后调用一次 MuxFinished
+
+        Raises:
+            OSError: 无法启动进程
+        """
+        import asyncio
+        child = MuxChild(self, argv, on_event)
+        asyncio.run_coroutine_threadsafe(self._supervise(child), self._loop)
+        child._started.wait()
+        if child._error is not None:
+            raise child._error
+        return child
+
+    def close(self) -> None:
+        """终止仍在运行的进程并停止监督线程"""
+        if self._loop.is_closed():
+            return
+        for child in list(self._children):
+            child.kill()
+            child.wait()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def _signal(self, child: MuxChild, method: str) -> None:
+        def send():
+            process = child._process
+            if process is not None and process.returncode is None:
+                try:
+                    getattr(process, method)()
+                except ProcessLookupError:
+                    pass
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(send)
+
+    async def _supervise(self, child: MuxChild) -> None:
+        import asyncio
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *child.argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL,
+                **hidden_window_kwargs()
+            )
+        except BaseException as e:
+            child._error = e
+            child._started.set()
+            child._exited.set()
+            return
+        child._process = process
+        child.pid = process.pid
+        self._children.append(child)
+        child._started.set()
+        try:
+            await self._read(process.stdout, child)
+            child.returncode = await process.wait()
+            self._emit_event(child, MuxFinished(child.returncode))
+        finally:
+            self._children.remove(child)
+            if child.returncode is None:
+                child.returncode = process.returncode
+            child._exited.set()
+
+    async def _read(self, stream: 'asyncio.StreamReader', child: MuxChild) -> None:
+        """按行读取输出，未完成的行最多保留 max_line 字节"""
+        pending = bytearray()
+        discarding = False  # 正在丢弃超长行的剩余部分
+        while True:
+            chunk = await stream.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            pending += chunk
+            start = 0
+            while True:
+                end = pending.find(b'\n', start)
+                if end < 0:
+                    break
+                if not discarding:
+                    self._emit_line(child, pending[start:end])
+                discarding = False
+                start = end + 1
+            del pending[:start]
+            if len(pending) > self.max_line:
+                if not discarding:
+                    self._emit_line(child, pending[:self.max_line])
+                    discarding = True
+                pending.clear()
+        if pending and not discarding:
+            self._emit_line(child, pending)
+
+    def _emit_line(self, child: MuxChild, raw: bytes) -> None:
+        event = parse_gui_line(bytes(raw).decode('utf-8', errors='replace').strip())
+        if event is not None:
+            self._emit_event(child, event)
+
+    @staticmethod
+    def _emit_event(child: MuxChild, event: MuxEvent) -> None:
+        try:
+            child.on_event(event)
+        except Exception as e:
+            # 回调出错不能影响其他进程的读取
+            LogManager.get_logger().error(f'处理 mkvmerge 输出时出错: {str(e)}')
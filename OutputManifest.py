@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""输出文件清单（manifest），用于增量合并。
+
+每个合并成功的输出文件在同目录的 .mergemkv/ 下有一个同名 JSON 清单，记录：
+- 源视频、同名字幕和附加字体文件的指纹（大小、mtime_ns）；
+- 合并命令行和 mkvmerge 版本；
+- 输出文件（视频和复制的字幕）的指纹。
+再次运行时如果清单与本次的输入和命令完全一致，且输出文件未被改动，就跳过合并，类似 make。
+任何输入变化、字体查找结果变化、命令变化或输出被删除、替换都会重新合并。
+
+命令行用法:
+    python OutputManifest.py show OUTPUT_FILE
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from AtomicOutput import write_atomic
+from JobJournal import fingerprint
+
+# 清单所在的子目录名
+MANIFEST_DIR_NAME = '.mergemkv'
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_file: str) -> str:
+    """输出文件对应的清单路径"""
+    directory, name = os.path.split(os.path.abspath(output_file))
+    return os.path.join(directory, MANIFEST_DIR_NAME, name + '.json')
+
+
+def build_manifest(inputs: Iterable[str], command: list, mkvmerge_version: str) -> Dict[str, Any]:
+    """
+    生成本次合并的清单（不含输出指纹）
+
+    Args:
+        inputs: 源视频、字幕、字体等所有输入文件
+        command: 合并命令参数列表
+        mkvmerge_version: mkvmerge 版本
+    """
+    return {
+        'version': MANIFEST_VERSION,
+        'mkvmerge': mkvmerge_version,
+        'command': list(command),
+        'inputs': {os.path.abspath(path): fingerprint(path) for path in inputs},
+    }
+
+
+def load_manifest(output_file: str) -> Optional[Dict[str, Any]]:
+    """读取输出文件的清单，不存在或损坏时返回 None"""
+    try:
+        with open(manifest_path(output_file), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def is_up_to_date(output_file: str, manifest: Dict[str, Any]) -> bool:
+    """
+    判断输出是否无需重新合并
+
+    Args:
+        output_file: 输出视频文件
+        manifest: build_manifest 生成的本次清单
+    """
+    stored = load_manifest(output_file)
+    if stored is None:
+        return False
+    for key in ('version', 'mkvmerge', 'command', 'inputs'):
+        if stored.get(key) != manifest[key]:
+            return False
+    outputs = stored.get('outputs')
+    if not isinstance(outputs, dict) or os.path.abspath(output_file) not in outputs:
+        return False
+    return all(fingerprint(path) == recorded for path, recorded in outputs.items())
+
+
+def write_manifest(output_file: str, manifest: Dict[str, Any], outputs: Iterable[str]) -> None:
+    """
+    合并成功后原子地写入清单
+
+    Args:
+        output_file: 输出视频文件
+        manifest: build_manifest 生成的清单
+        outputs: 本次生成的所有输出文件（包括输出视频）
+    """
+    data = dict(manifest)
+    data['outputs'] = {os.path.abspath(path): fingerprint(path) for path in outputs}
+    path = manifest_path(output_file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+    except OSError:
+        # 清单写入失败只会导致下次重新合并
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect the manifest of a merged output file')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    show_parser = subparsers.add_parser('show', help='Show the manifest and whether its files changed')
+    show_parser.add_argument('output', help='Merged output file')
+
+    args = parser.parse_args(argv)
+    if args.action == 'show':
+        manifest = load_manifest(args.output)
+        if manifest is None:
+            print(f'no manifest: {manifest_path(args.output)}')
+            return
+        print(f'mkvmerge: {manifest.get("mkvmerge")}')
+        for title, files in (('inputs', manifest.get('inputs', {})), ('outputs', manifest.get('outputs', {}))):
+            print(f'{title}:')
+            for path, recorded in files.items():
+                print(f'  {"ok     " if fingerprint(path) == recorded else "changed"} {path}')
+
+
+if __name__ == '__main__':
+    main()
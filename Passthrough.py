@@ -0,0 +1,169 @@
+"""没有同名字幕的视频直接放入输出目录，不经过 mkvmerge。
+
+没有字幕和字体需要添加的 .mkv 重新合并只会去掉原有的字幕和附件，却要完整读写一遍文件。
+打开 passthrough 后这类文件按策略处理：
+- auto：依次尝试 reflink（FICLONE，Btrfs/XFS 等支持写时复制的文件系统）、硬链接（同一文件系统）、
+  copy_file_range 复制，记住每对源、目标设备上第一个可用的方式；
+- reflink / hardlink / copy：只使用指定的方式；
+- skip：不放入输出目录。
+输出同样先写入 .partial 临时文件再改名。
+"""
+
+import errno
+import os
+import shutil
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from AtomicOutput import commit, discard, has_free_space, partial_path
+
+PASSTHROUGH_OFF = 'off'
+PASSTHROUGH_SKIP = 'skip'
+PASSTHROUGH_POLICIES = (PASSTHROUGH_OFF, 'auto', 'reflink', 'hardlink', 'copy', PASSTHROUGH_SKIP)
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# 每次 copy_file_range 复制的字节数，两次之间检查停止信号
+COPY_CHUNK_BYTES = 64 * 1024 * 1024
+# 普通复制每次读写的字节数
+FALLBACK_CHUNK_BYTES = 1024 * 1024
+# copy_file_range 返回这些错误时表示文件系统组合不支持，改用普通复制；其他错误（磁盘满、I/O 错误）直接抛出
+_COPY_FALLBACK_ERRNOS = frozenset((errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP))
+
+# 各策略依次尝试的方式
+_METHODS = {
+    'auto': ('reflink', 'hardlink', 'copy'),
+    'reflink': ('reflink',),
+    'hardlink': ('hardlink',),
+    'copy': ('copy',),
+}
+
+# (源设备, 目标设备) -> 可用的方式
+_device_methods: Dict[Tuple[int, int], str] = {}
+_device_methods_lock = threading.Lock()
+
+
+def reflink(src_path: str, dst_path: str) -> None:
+    """写时复制克隆文件，文件系统不支持时抛出 OSError"""
+    if not sys.platform.startswith('linux'):
+        raise OSError(f'reflink is not supported on {sys.platform}')
+    import fcntl
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(src_path, dst_path)
+
+
+def hardlink(src_path: str, dst_path: str) -> None:
+    """创建硬链接，跨文件系统时抛出 OSError"""
+    os.link(src_path, dst_path)
+
+
+def _copy_chunks(src, dst, cancelled: Optional[Callable[[], bool]]) -> None:
+    """普通的分块复制，每块之间检查停止信号"""
+    while True:
+        if cancelled is not None and cancelled():
+            raise InterruptedError('copy cancelled')
+        chunk = src.read(FALLBACK_CHUNK_BYTES)
+        if not chunk:
+            break
+        dst.write(chunk)
+
+
+def copy(src_path: str, dst_path: str, cancelled: Optional[Callable[[], bool]] = None) -> None:
+    """
+    在内核中复制文件内容（copy_file_range），不支持时分块读写
+
+    Raises:
+        InterruptedError: cancelled 返回 True
+    """
+    if not has_free_space(dst_path, os.path.getsize(src_path)):
+        raise OSError(f'not enough free space for {dst_path}')
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        if not hasattr(os, 'copy_file_range'):
+            _copy_chunks(src, dst, cancelled)
+        else:
+            while True:
+                if cancelled is not None and cancelled():
+                    raise InterruptedError('copy cancelled')
+                try:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), COPY_CHUNK_BYTES)
+                except OSError as e:
+                    if e.errno not in _COPY_FALLBACK_ERRNOS:
+                        raise
+                    # 部分文件系统组合不支持，从头改用普通复制
+                    dst.seek(0)
+                    dst.truncate()
+                    src.seek(0)
+                    _copy_chunks(src, dst, cancelled)
+                    break
+                if copied == 0:
+                    break
+    shutil.copystat(src_path, dst_path)
+
+
+def _run_method(method: str, src_path: str, dst_path: str, cancelled: Optional[Callable[[], bool]]) -> None:
+    if method == 'reflink':
+        reflink(src_path, dst_path)
+    elif method == 'hardlink':
+        hardlink(src_path, dst_path)
+    else:
+        copy(src_path, dst_path, cancelled)
+
+
+def place(src_path: str, output_file: str, policy: str = 'auto',
+          cancelled: Optional[Callable[[], bool]] = None) -> str:
+    """
+    按策略把源文件放到输出路径，先写入临时文件再改名
+
+    Args:
+        src_path: 源文件
+        output_file: 输出文件
+        policy: 'auto'、'reflink'、'hardlink' 或 'copy'
+        cancelled: 复制过程中检查是否停止
+
+    Returns:
+        实际使用的方式
+
+    Raises:
+        OSError: 所有方式都失败
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    key = (os.stat(src_path).st_dev, os.stat(os.path.dirname(os.path.abspath(output_file))).st_dev)
+    methods = list(_METHODS[policy])
+    with _device_methods_lock:
+        known = _device_methods.get(key)
+    if known in methods:
+        methods.remove(known)
+        methods.insert(0, known)
+
+    temp_file = partial_path(output_file)
+    error: Optional[BaseException] = None
+    for method in methods:
+        discard(temp_file)
+        try:
+            _run_method(method, src_path, temp_file, cancelled)
+            # 硬链接与源文件是同一个文件，不需要也不应该以写方式打开落盘
+            commit(temp_file, output_file, sync=method != 'hardlink')
+        except InterruptedError:
+            discard(temp_file)
+            raise
+        except OSError as e:
+            discard(temp_file)
+            error = e
+            continue
+        with _device_methods_lock:
+            _device_methods[key] = method
+        return method
+    raise error if error is not None else OSError(f'no passthrough method for policy {policy}')
+
+
+def shell_argv(policy: str, src_path: str, output_file: str) -> List[str]:
+    """在 shell 脚本、Makefile 中执行同样操作的命令（GNU coreutils）"""
+    if policy == 'hardlink':
+        return ['ln', '-f', src_path, output_file]
+    if policy == 'reflink':
+        return ['cp', '--reflink=always', '-p', src_path, output_file]
+    if policy == 'copy':
+        return ['cp', '-p', src_path, output_file]
+    return ['cp', '--reflink=auto', '-p', src_path, output_file]
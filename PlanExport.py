@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""把合并计划导出为 shell 脚本、Makefile 或 build.ninja。
+
+Makefile 和 build.ninja 中每个输出文件是一个目标，依赖源视频、同名字幕和附加的字体文件，
+因此 `make -j N` / `ninja -j N` 可以并行合并，并且只重新合并比输入旧的输出。目标的命令先创建
+输出目录，再由 mkvmerge 写入临时文件并在成功后改名，最后把字幕复制到输出目录，
+需要 POSIX shell（Windows 下可用 Git Bash/MSYS）。
+
+命令行用法:
+    python PlanExport.py PLAN -o Makefile
+    python PlanExport.py PLAN -o build.ninja
+    python PlanExport.py PLAN -o mergemkv.sh --format sh
+"""
+
+import argparse
+import shlex
+from typing import List, Optional
+
+from AtomicOutput import partial_path
+from MergePlan import MergePlan, PlannedJob, replace_output
+from Passthrough import shell_argv
+
+EXPORT_FORMATS = ('sh', 'make', 'ninja')
+
+
+def _job_commands(job: PlannedJob) -> List[str]:
+    """执行一个任务的 shell 命令：创建输出目录、合并到临时文件并改名、复制字幕"""
+    temp_file = partial_path(job.output_file)
+    if job.passthrough is not None:
+        argv = shell_argv(job.passthrough, job.input_file, temp_file)
+    else:
+        argv = replace_output([arg for arg in job.argv if arg != '--gui-mode'], temp_file)
+    commands = [
+        shlex.join(['mkdir', '-p', job.output_dir]),
+        shlex.join(argv) + ' || { rm -f ' + shlex.quote(temp_file) + '; exit 1; }',
+        shlex.join(['mv', '-f', temp_file, job.output_file]),
+    ]
+    # 不用 cp -p：字幕副本也是 make/ninja 的输出，保留原来的修改时间会让它们一直比输入旧，每次都重新执行
+    for (src_path, _), output_path in zip(job.subtitle_files, job.outputs[1:]):
+        commands.append(shlex.join(['cp', src_path, output_path]))
+    return commands
+
+
+def _make_path(path: str, target: bool = False) -> str:
+    """
+    转义 Makefile 目标和依赖中的特殊字符
+
+    Args:
+        target: 用作规则的目标。目标中的 % 不转义会变成模式规则；依赖中的 % 本来就按字面处理，
+            转义反而会保留反斜杠
+    """
+    path = path.replace('$', '$$')
+    for char in ('\\', ' ', '#', ':') + (('%',) if target else ()):
+        path = path.replace(char, '\\' + char)
+    return path
+
+
+def _ninja_path(path: str) -> str:
+    """转义 build.ninja 路径中的特殊字符"""
+    return path.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+
+
+def write_shell_script(plan: MergePlan, path: str = './mergemkv.sh') -> None:
+    """按顺序写入每个任务的合并命令，每行一个"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for job in plan.jobs:
+            f.write(job.shell_command + '\n')
+
+
+def write_makefile(plan: MergePlan, path: str = 'Makefile') -> None:
+    """每个输出文件一个目标，all 目标依赖所有输出"""
+    lines = [
+        '# 由 PlanExport.py 生成，使用 make -j N 并行合并',
+        '.PHONY: all',
+        '.DELETE_ON_ERROR:',
+        'all: ' + ' '.join(_make_path(job.output_file) for job in plan.jobs),
+        '',
+    ]
+    for job in plan.jobs:
+        lines.append(f'{_make_path(job.output_file, target=True)}: ' + ' '.join(_make_path(p) for p in job.inputs))
+        for command in _job_commands(job):
+            lines.append('\t' + command.replace('$', '$$'))
+        lines.append('')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def write_ninja(plan: MergePlan, path: str = 'build.ninja') -> None:
+    """每个输出文件一条 build 语句，复制的字幕作为附加输出"""
+    lines = [
+        '# 由 PlanExport.py 生成，使用 ninja -j N 并行合并',
+        'rule mux',
+        '  command = $cmd',
+        '  description = mkvmerge $out',
+        '',
+    ]
+    for job in plan.jobs:
+        outputs = ' '.join(_ninja_path(p) for p in job.outputs)
+        inputs = ' '.join(_ninja_path(p) for p in job.inputs)
+        lines.append(f'build {outputs}: mux {inputs}')
+        lines.append('  cmd = ' + ' && '.join(_job_commands(job)).replace('$', '$$'))
+        lines.append('')
+    lines.append('default ' + ' '.join(_ninja_path(job.output_file) for job in plan.jobs))
+    lines.append('')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def export_plan(plan: MergePlan, path: str, export_format: Optional[str] = None) -> str:
+    """
+    导出合并计划
+
+    Args:
+        plan: 合并计划
+        path: 输出文件路径
+        export_format: 'sh'、'make' 或 'ninja'，默认按文件名判断（*.ninja 为 ninja，*.sh 为 sh，其余为 make）
+
+    Returns:
+        实际使用的格式
+    """
+    if export_format is None:
+        if path.endswith('.ninja'):
+            export_format = 'ninja'
+        elif path.endswith('.sh'):
+            export_format = 'sh'
+        else:
+            export_format = 'make'
+    if export_format == 'sh':
+        write_shell_script(plan, path)
+    elif export_format == 'make':
+        write_makefile(plan, path)
+    elif export_format == 'ninja':
+        write_ninja(plan, path)
+    else:
+        raise ValueError(f'unknown export format: {export_format}')
+    return export_format
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export a saved merge plan as a shell script, Makefile or build.ninja')
+    parser.add_argument('plan', help='Path to the plan JSON file')
+    parser.add_argument('-o', '--output', required=True, help='File to write')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help='Output format (default: guessed from the file name)')
+
+    args = parser.parse_args(argv)
+    plan = MergePlan.load(args.plan)
+    export_format = export_plan(plan, args.output, args.format)
+    print(f'{args.output}: {len(plan.jobs)} jobs ({export_format})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/python3
+"""mkvmerge -J 识别结果的持久化缓存。
+
+缓存以 (绝对路径, 文件大小, mtime_ns, inode, mkvmerge 版本) 作为键，任一项变化即视为失效。
+数据保存在 SQLite 数据库中，超过条目数或总字节数上限时按最近访问时间淘汰。
+
+命令行用法:
+    python ProbeCache.py stats
+    python ProbeCache.py list --limit 20
+    python ProbeCache.py purge --missing
+    python ProbeCache.py purge --older-than 30
+    python ProbeCache.py clear
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ProbeCache:
+    _instance = None
+    _instance_lock = Lock()
+
+    def __init__(self, db_path: str = 'probe_cache.db', max_entries: int = 50000,
+                 max_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化识别结果缓存
+
+        Args:
+            db_path: 缓存数据库路径
+            max_entries: 最多保留的条目数
+            max_bytes: 识别结果 JSON 的总字节数上限
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_lock = Lock()
+        self.conn = None
+        self._init_db()
+
+    def __del__(self):
+        """析构函数，确保数据库连接被正确关闭"""
+        if self.conn:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+
+    @classmethod
+    def get_instance(cls) -> 'ProbeCache':
+        """获取进程内共享的缓存实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _get_connection(self):
+        """获取数据库连接"""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self.conn
+
+    def _init_db(self):
+        """初始化数据库"""
+        conn = self._get_connection()
+        with self.db_lock:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS probes (
+                    file_path TEXT PRIMARY KEY,
+                    file_size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    mkvmerge_version TEXT NOT NULL,
+                    info_json TEXT NOT NULL,
+                    info_size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_probes_access ON probes (last_access)')
+            conn.commit()
+
+    @staticmethod
+    def make_key(file_path: str, mkvmerge_version: str) -> Optional[Tuple[str, int, int, int, str]]:
+        """
+        计算缓存键
+
+        Returns:
+            (绝对路径, 大小, mtime_ns, inode, mkvmerge版本)，文件不存在时返回 None
+        """
+        abs_path = os.path.abspath(os.path.expanduser(file_path))
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return None
+        return abs_path, st.st_size, st.st_mtime_ns, st.st_ino, mkvmerge_version
+
+    def get(self, file_path: str, mkvmerge_version: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的识别结果，键不匹配时返回 None
+        """
+        key = self.make_key(file_path, mkvmerge_version)
+        if key is None:
+            return None
+        with self.db_lock:
+            conn = self._get_connection()
+            row = conn.execute(
+                'SELECT file_size, mtime_ns, inode, mkvmerge_version, info_json FROM probes WHERE file_path = ?',
+                (key[0],)
+            ).fetchone()
+            if row is None or tuple(row[:4]) != key[1:]:
+                return None
+            conn.execute('UPDATE probes SET last_access = ? WHERE file_path = ?', (time.time(), key[0]))
+            conn.commit()
+        return json.loads(row[4])
+
+    def put(self, file_path: str, mkvmerge_version: str, info: Dict[str, Any]) -> None:
+        """
+        写入识别结果，必要时淘汰最久未访问的条目
+        """
+        key = self.make_key(file_path, mkvmerge_version)
+        if key is None:
+            return
+        info_json = json.dumps(info, ensure_ascii=False, separators=(',', ':'))
+        with self.db_lock:
+            conn = self._get_connection()
+            conn.execute('''
+                INSERT OR REPLACE INTO probes
+                (file_path, file_size, mtime_ns, inode, mkvmerge_version, info_json, info_size, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', key + (info_json, len(info_json), time.time()))
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn) -> int:
+        """按最近访问时间淘汰超出上限的条目，返回删除数量"""
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(info_size), 0) FROM probes').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        rows = conn.execute('SELECT file_path, info_size FROM probes ORDER BY last_access ASC').fetchall()
+        victims = []
+        for file_path, info_size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((file_path,))
+            count -= 1
+            total -= info_size
+            removed += 1
+        conn.executemany('DELETE FROM probes WHERE file_path = ?', victims)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        with self.db_lock:
+            count, total = self._get_connection().execute(
+                'SELECT COUNT(*), COALESCE(SUM(info_size), 0) FROM probes').fetchone()
+        return {
+            'db_path': os.path.abspath(self.db_path),
+            'entries': count,
+            'bytes': total,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+        }
+
+    def entries(self, limit: Optional[int] = None) -> List[Tuple[str, int, str, float]]:
+        """
+        列出缓存条目，最近访问的在前
+
+        Returns:
+            List of (file_path, file_size, mkvmerge_version, last_access)
+        """
+        query = 'SELECT file_path, file_size, mkvmerge_version, last_access FROM probes ORDER BY last_access DESC'
+        params: tuple = ()
+        if limit is not None:
+            query += ' LIMIT ?'
+            params = (limit,)
+        with self.db_lock:
+            return self._get_connection().execute(query, params).fetchall()
+
+    def purge(self, missing: bool = False, older_than: Optional[float] = None) -> int:
+        """
+        清理缓存条目
+
+        Args:
+            missing: 删除源文件已不存在或已变化的条目
+            older_than: 删除超过指定秒数未访问的条目
+
+        Returns:
+            删除的条目数
+        """
+        victims = []
+        with self.db_lock:
+            conn = self._get_connection()
+            rows = conn.execute(
+                'SELECT file_path, file_size, mtime_ns, inode, last_access FROM probes').fetchall()
+            now = time.time()
+            for file_path, file_size, mtime_ns, inode, last_access in rows:
+                if older_than is not None and now - last_access > older_than:
+                    victims.append((file_path,))
+                    continue
+                if missing:
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        victims.append((file_path,))
+                        continue
+                    if (st.st_size, st.st_mtime_ns, st.st_ino) != (file_size, mtime_ns, inode):
+                        victims.append((file_path,))
+            conn.executemany('DELETE FROM probes WHERE file_path = ?', victims)
+            conn.commit()
+        return len(victims)
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        with self.db_lock:
+            conn = self._get_connection()
+            count = conn.execute('SELECT COUNT(*) FROM probes').fetchone()[0]
+            conn.execute('DELETE FROM probes')
+            conn.commit()
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or purge the mkvmerge identification cache')
+    parser.add_argument('--db', default='probe_cache.db', help='Path to the cache database')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+
+    subparsers.add_parser('stats', help='Show cache statistics')
+
+    list_parser = subparsers.add_parser('list', help='List cached files, most recently used first')
+    list_parser.add_argument('--limit', type=int, default=50)
+
+    purge_parser = subparsers.add_parser('purge', help='Remove stale entries')
+    purge_parser.add_argument('--missing', action='store_true', help='Remove entries whose file is gone or changed')
+    purge_parser.add_argument('--older-than', type=float, metavar='DAYS', help='Remove entries unused for DAYS days')
+
+    subparsers.add_parser('clear', help='Remove all entries')
+
+    args = parser.parse_args(argv)
+    cache = ProbeCache(db_path=args.db)
+
+    if args.action == 'stats':
+        for key, value in cache.stats().items():
+            print(f'{key}: {value}')
+    elif args.action == 'list':
+        for file_path, file_size, version, last_access in cache.entries(limit=args.limit):
+            accessed = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_access))
+            print(f'{accessed}  {file_size:>14}  {version}  {file_path}')
+    elif args.action == 'purge':
+        if not args.missing and args.older_than is None:
+            parser.error('purge requires --missing and/or --older-than')
+        older_than = args.older_than * 86400 if args.older_than is not None else None
+        print(f'removed: {cache.purge(missing=args.missing, older_than=older_than)}')
+    elif args.action == 'clear':
+        print(f'removed: {cache.clear()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""不调用 mkvmerge，直接识别 ASS/SSA/SRT 文本字幕文件。
+
+独立的文本字幕文件在 mkvmerge 中总是只有一条 id 为 0 的字幕轨道，只需根据文件头和段落标记
+判断格式即可生成与 `mkvmerge -J` 结构一致的识别信息。无法确定格式时返回 None，由调用方回退到
+`mkvmerge -J`。
+"""
+
+import codecs
+import re
+from typing import Any, Dict, Optional
+
+SUBTITLE_EXTENSIONS = ('.ass', '.ssa', '.srt')
+
+# 只读取文件开头用于判断格式
+HEADER_BYTES = 64 * 1024
+
+_SRT_TIMESTAMP = re.compile(r'^\s*\d+:\d{1,2}:\d{1,2}[,.]\d{1,3}\s*-->\s*\d+:\d{1,2}:\d{1,2}[,.]\d{1,3}')
+_SCRIPT_TYPE = re.compile(r'^\s*scripttype\s*:\s*v4\.00(\+?)', re.IGNORECASE | re.MULTILINE)
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+def _decode_header(data: bytes) -> str:
+    """
+    解码文件头，只用于判断格式
+
+    有 BOM 时按 BOM 解码；无 BOM 时先按 UTF-8 解码，失败则按 latin-1 逐字节解码。中文字幕常见的
+    GBK、Big5 文件没有 BOM，但判断格式用到的标记（[Script Info]、ScriptType:、SRT 时间轴）都是 ASCII，
+    这些编码中的 ASCII 字节原样保留；文件头截断在多字节字符中间时同样适用。
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return data[len(bom):].decode(encoding, errors='ignore')
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def _detect_ssa(text: str) -> Optional[str]:
+    """识别 SSA/ASS，返回 CodecID"""
+    first_line = text.lstrip().split('\n', 1)[0].strip().lower()
+    if first_line != '[script info]':
+        return None
+    lowered = text.lower()
+    script_type = _SCRIPT_TYPE.search(text)
+    if script_type is not None:
+        return 'S_TEXT/ASS' if script_type.group(1) else 'S_TEXT/SSA'
+    if '[v4+ styles]' in lowered:
+        return 'S_TEXT/ASS'
+    if '[v4 styles]' in lowered:
+        return 'S_TEXT/SSA'
+    return 'S_TEXT/ASS'
+
+
+def _detect_srt(text: str) -> bool:
+    """识别 SRT：首个非空行为序号，下一行为时间轴"""
+    lines = [line for line in text.splitlines() if line.strip()][:2]
+    return len(lines) == 2 and lines[0].strip().isdigit() and bool(_SRT_TIMESTAMP.match(lines[1]))
+
+
+def read_identification(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    根据文件头识别文本字幕文件，生成与 `mkvmerge -J` 结构一致的识别信息
+
+    Args:
+        file_path: 字幕文件路径
+
+    Returns:
+        识别信息字典；不是可识别的 ASS/SSA/SRT 文件时返回 None
+    """
+    if not file_path.lower().endswith(SUBTITLE_EXTENSIONS):
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read(HEADER_BYTES)
+    except OSError:
+        return None
+
+    text = _decode_header(data)
+    codec_id = _detect_ssa(text)
+    if codec_id is not None:
+        container_type = 'SSA/ASS subtitles'
+        codec = 'SubStationAlpha'
+    elif _detect_srt(text):
+        container_type = 'SRT subtitles'
+        codec = 'SubRip/SRT'
+        codec_id = 'S_TEXT/UTF8'
+    else:
+        return None
+
+    properties: Dict[str, Any] = {
+        'codec_id': codec_id,
+        'number': 1,
+        'text_subtitles': True,
+    }
+
+    return {
+        'attachments': [],
+        'chapters': [],
+        'container': {
+            'properties': {'is_providing_timestamps': True},
+            'recognized': True,
+            'supported': True,
+            'type': container_type,
+        },
+        'errors': [],
+        'file_name': file_path,
+        'global_tags': [],
+        'track_tags': [],
+        'tracks': [{
+            'codec': codec,
+            'id': 0,
+            'properties': properties,
+            'type': 'subtitles',
+        }],
+        'warnings': [],
+    }
@@ -6,12 +6,28 @@
 import json
 import os
 from os.path import expanduser, isfile
-from re import match
 import subprocess as sp
 import sys
+import threading
+
+import MatroskaReader
+from MkvmergeCache import MkvmergeCache
+from ProbeCache import ProbeCache
+import SubtitleReader
+from utils import hidden_window_kwargs
 
 # 添加在文件开头的全局变量
 _mkvmerge_verified = {}
+_mkvmerge_versions = {}
+_mkvmerge_lock = threading.Lock()
+
+# 进程内识别结果登记表，保证同一文件每次运行最多调用一次 mkvmerge -J
+_identify_registry = {}
+_identify_inflight = {}
+_identify_lock = threading.Lock()
+# 不需要调用 mkvmerge 的识别方式，按顺序尝试，不适用时返回 None
+_native_readers = (MatroskaReader.read_identification, SubtitleReader.read_identification)
+_identify_stats = {'requests': 0, 'registry_hits': 0, 'native': 0, 'cache_hits': 0, 'probes': 0}
 
 def verify_mkvmerge(mkvmerge_path='mkvmerge'):
     """Verify mkvmerge is working.
@@ -23,25 +39,275 @@ def verify_mkvmerge(mkvmerge_path='mkvmerge'):
     if mkvmerge_path in _mkvmerge_verified:
         return _mkvmerge_verified[mkvmerge_path]
 
+    with _mkvmerge_lock:
+        # 并发调用时只验证一次
+        if mkvmerge_path in _mkvmerge_verified:
+            return _mkvmerge_verified[mkvmerge_path]
+
+        # 版本信息来自持久化缓存，mkvmerge 未变化时不启动进程
+        info = MkvmergeCache.get_instance().probe(mkvmerge_path)
+        _mkvmerge_verified[mkvmerge_path] = info.verified
+        _mkvmerge_versions[mkvmerge_path] = info.version
+        return info.verified
+
+
+def get_mkvmerge_version(mkvmerge_path='mkvmerge'):
+    """Return the first line of `mkvmerge -V`, or an empty string if mkvmerge is not working.
+
+    mkvmerge_path (str):
+        Alternate path to mkvmerge if it is not already in the $PATH variable.
+    """
+    verify_mkvmerge(mkvmerge_path=mkvmerge_path)
+    return _mkvmerge_versions.get(mkvmerge_path, '')
+
+
+def _run_identify(file_path, mkvmerge_path, cancel=None):
+    """Run `mkvmerge -J` on a file and return the decoded identification JSON.
+
+    cancel (CancelToken):
+        Kill the probe when the token is cancelled; raises InterruptedError instead of returning.
+    """
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    startupinfo = None
+    if sys.platform == 'win32':
+        startupinfo = sp.STARTUPINFO()
+        startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = sp.SW_HIDE
+
+    argv = [mkvmerge_path, '-J', file_path]
+    process = sp.Popen(
+        argv,
+        stdout=sp.PIPE,
+        startupinfo=startupinfo,
+        creationflags=sp.CREATE_NO_WINDOW | sp.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
+    )
+    unregister = cancel.register(process.kill) if cancel is not None else None
     try:
-        # 创建启动信息对象
-        startupinfo = None
-        if sys.platform == 'win32':
-            startupinfo = sp.STARTUPINFO()
-            startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = sp.SW_HIDE
-
-        output = sp.check_output(
-            [mkvmerge_path, '-V'],
-            startupinfo=startupinfo,
-            creationflags=sp.CREATE_NO_WINDOW | sp.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-        ).decode()
-        result = bool(match('mkvmerge.*', output))
-        _mkvmerge_verified[mkvmerge_path] = result
-        return result
-    except (sp.CalledProcessError, FileNotFoundError):
-        _mkvmerge_verified[mkvmerge_path] = False
-        return False
+        output, _ = process.communicate()
+    finally:
+        if unregister is not None:
+            unregister()
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    if process.returncode:
+        raise sp.CalledProcessError(process.returncode, argv, output)
+    return json.loads(output.decode())
+
+
+def _identify_native(file_path):
+    """Try the native readers, returning None if none of them applies."""
+    for reader in _native_readers:
+        info_json = reader(file_path)
+        if info_json is not None:
+            with _identify_lock:
+                _identify_stats['native'] += 1
+            return info_json
+    return None
+
+
+def _identify_cached(file_path, mkvmerge_path, use_cache):
+    """Look a file up in the persistent cache.
+
+    Returns a `(cache, version, info_json)` tuple; `cache` is None when caching is disabled and `info_json` is None
+    on a miss.
+    """
+    version = get_mkvmerge_version(mkvmerge_path=mkvmerge_path)
+    cache = ProbeCache.get_instance() if use_cache and version else None
+    info_json = cache.get(file_path, version) if cache is not None else None
+    if info_json is not None:
+        with _identify_lock:
+            _identify_stats['cache_hits'] += 1
+    else:
+        with _identify_lock:
+            _identify_stats['probes'] += 1
+    return cache, version, info_json
+
+
+def _identify_uncached(file_path, mkvmerge_path, use_cache, native, cancel=None):
+    """Identify a file natively or through the persistent cache, spawning mkvmerge only as a last resort."""
+    if native:
+        info_json = _identify_native(file_path)
+        if info_json is not None:
+            return info_json
+
+    cache, version, info_json = _identify_cached(file_path, mkvmerge_path, use_cache)
+    if info_json is not None:
+        return info_json
+
+    info_json = _run_identify(file_path, mkvmerge_path, cancel)
+    if cache is not None:
+        cache.put(file_path, version, info_json)
+    return info_json
+
+
+def _registry_claim(key):
+    """Look a file up in the registry or claim it for identification.
+
+    Returns `(info_json, pending, owner)`: the registered result, or the event to wait on, and whether the caller
+    now owns the identification and must call :func:`_registry_release`.
+    """
+    with _identify_lock:
+        if key in _identify_registry:
+            _identify_stats['requests'] += 1
+            _identify_stats['registry_hits'] += 1
+            return _identify_registry[key], None, False
+        pending = _identify_inflight.get(key)
+        if pending is not None:
+            # 其他线程正在识别同一文件，等待其完成后重新查表
+            return None, pending, False
+        _identify_stats['requests'] += 1
+        pending = _identify_inflight[key] = threading.Event()
+        return None, pending, True
+
+
+def _registry_release(key, pending, info_json):
+    """Register an identification result (None on failure) and wake up waiters."""
+    with _identify_lock:
+        if info_json is not None:
+            _identify_registry[key] = info_json
+        _identify_inflight.pop(key, None)
+    pending.set()
+
+
+def _registry_key(file_path, mkvmerge_path, native):
+    """Registry key shared by :func:`identify_file` and :func:`aidentify_file`, None if the file does not exist.
+
+    `native` is part of the key: a `native=False` caller asked for real `mkvmerge -J` output and must never be
+    served a result the native readers produced.
+    """
+    key = ProbeCache.make_key(file_path, mkvmerge_path)
+    return None if key is None else key + (native,)
+
+
+def identify_file(file_path, mkvmerge_path='mkvmerge', use_cache=True, native=True, cancel=None):
+    """Return the `mkvmerge -J` identification of a file.
+
+    Every path is identified at most once per run: results are kept in a process-wide registry shared by
+    :class:`MKVFile`, :class:`MKVTrack` and the verify functions, and concurrent requests for the same file wait
+    for the first one. Registry misses are looked up in the persistent :class:`ProbeCache`, keyed by path, size,
+    mtime, inode and mkvmerge version, so unchanged files are not probed again across runs either.
+
+    Matroska files and ASS/SSA/SRT subtitles are read directly by :mod:`MatroskaReader` and
+    :mod:`SubtitleReader` without spawning mkvmerge; `.m2ts` and anything the native readers cannot parse fall
+    back to `mkvmerge -J`.
+
+    file_path (str):
+        Path to the file to be identified.
+    mkvmerge_path (str):
+        Alternate path to mkvmerge if it is not already in the $PATH variable.
+    use_cache (bool):
+        Consult and update the persistent cache.
+    native (bool):
+        Try the native header readers before spawning mkvmerge.
+    cancel (CancelToken):
+        Kill a running `mkvmerge -J` when the token is cancelled and raise InterruptedError.
+    """
+    file_path = expanduser(file_path)
+    key = _registry_key(file_path, mkvmerge_path, native)
+    if key is None:
+        # 文件不存在，直接交给 mkvmerge 报错
+        return _identify_uncached(file_path, mkvmerge_path, use_cache, native, cancel)
+
+    while True:
+        info_json, pending, owner = _registry_claim(key)
+        if info_json is not None:
+            return info_json
+        if owner:
+            break
+        pending.wait()
+
+    info_json = None
+    try:
+        info_json = _identify_uncached(file_path, mkvmerge_path, use_cache, native, cancel)
+        return info_json
+    finally:
+        _registry_release(key, pending, info_json)
+
+
+async def _arun_identify(file_path, mkvmerge_path):
+    """Run `mkvmerge -J` as an asyncio subprocess and return the decoded identification JSON."""
+    # asyncio is imported by the async entry points only, so synchronous callers never pay for it.
+    import asyncio
+    process = await asyncio.create_subprocess_exec(
+        mkvmerge_path, '-J', file_path,
+        stdout=asyncio.subprocess.PIPE,
+        stdin=asyncio.subprocess.DEVNULL,
+        **hidden_window_kwargs()
+    )
+    output, _ = await process.communicate()
+    if process.returncode != 0:
+        raise sp.CalledProcessError(process.returncode, [mkvmerge_path, '-J', file_path], output)
+    return json.loads(output.decode())
+
+
+async def aidentify_file(file_path, mkvmerge_path='mkvmerge', use_cache=True, native=True):
+    """Asynchronous counterpart of :func:`identify_file`.
+
+    Shares the registry, the persistent cache and the native readers with :func:`identify_file`, but runs
+    `mkvmerge -J` as an asyncio subprocess, so many files can be probed from one event loop. Blocking file and
+    cache reads are done in the loop's default executor.
+
+    file_path (str):
+        Path to the file to be identified.
+    mkvmerge_path (str):
+        Alternate path to mkvmerge if it is not already in the $PATH variable.
+    use_cache (bool):
+        Consult and update the persistent cache.
+    native (bool):
+        Try the native header readers before spawning mkvmerge.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    file_path = expanduser(file_path)
+    key = _registry_key(file_path, mkvmerge_path, native)
+
+    owner = False
+    pending = None
+    if key is not None:
+        while True:
+            info_json, pending, owner = _registry_claim(key)
+            if info_json is not None:
+                return info_json
+            if owner:
+                break
+            await loop.run_in_executor(None, pending.wait)
+
+    info_json = None
+    try:
+        if native:
+            info_json = await loop.run_in_executor(None, _identify_native, file_path)
+        if info_json is None:
+            cache, version, info_json = await loop.run_in_executor(
+                None, _identify_cached, file_path, mkvmerge_path, use_cache)
+            if info_json is None:
+                info_json = await _arun_identify(file_path, mkvmerge_path)
+                if cache is not None:
+                    await loop.run_in_executor(None, cache.put, file_path, version, info_json)
+        return info_json
+    finally:
+        if owner:
+            _registry_release(key, pending, info_json)
+
+
+def get_identify_stats():
+    """Return identification counters for the current run.
+
+    The returned dict contains `requests`, `registry_hits`, `native` (files read without mkvmerge),
+    `cache_hits`, `probes` (actual mkvmerge -J spawns) and `avoided` (requests that did not need a spawn).
+    """
+    with _identify_lock:
+        stats = dict(_identify_stats)
+    stats['avoided'] = stats['requests'] - stats['probes']
+    return stats
+
+
+def reset_identify_registry():
+    """Forget all identification results and counters of the current run."""
+    with _identify_lock:
+        _identify_registry.clear()
+        for name in _identify_stats:
+            _identify_stats[name] = 0
 
 
 def verify_matroska(file_path, mkvmerge_path='mkvmerge'):
@@ -63,17 +329,7 @@ def verify_matroska(file_path, mkvmerge_path='mkvmerge'):
     if not isfile(file_path):
         raise FileNotFoundError('"{}" does not exist'.format(file_path))
     try:
-        startupinfo = None
-        if sys.platform == 'win32':
-            startupinfo = sp.STARTUPINFO()
-            startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = sp.SW_HIDE
-
-        info_json = json.loads(sp.check_output(
-            [mkvmerge_path, '-J', expanduser(file_path)],
-            startupinfo=startupinfo,
-            creationflags=sp.CREATE_NO_WINDOW | sp.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-        ).decode())
+        info_json = identify_file(file_path, mkvmerge_path=mkvmerge_path)
     except sp.CalledProcessError:
         raise ValueError('"{}" could not be opened'.format(file_path))
     return info_json['container']['type'] == 'Matroska'
@@ -96,17 +352,7 @@ def verify_recognized(file_path, mkvmerge_path='mkvmerge'):
     if not isfile(file_path):
         raise FileNotFoundError('"{}" does not exist'.format(file_path))
     try:
-        startupinfo = None
-        if sys.platform == 'win32':
-            startupinfo = sp.STARTUPINFO()
-            startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = sp.SW_HIDE
-
-        info_json = json.loads(sp.check_output(
-            [mkvmerge_path, '-J', file_path],
-            startupinfo=startupinfo,
-            creationflags=sp.CREATE_NO_WINDOW | sp.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-        ).decode())
+        info_json = identify_file(file_path, mkvmerge_path=mkvmerge_path)
     except sp.CalledProcessError:
         raise ValueError('"{}" could not be opened'.format(file_path))
     return info_json['container']['recognized']
@@ -129,16 +375,7 @@ def verify_supported(file_path, mkvmerge_path='mkvmerge'):
     if not isfile(file_path):
         raise FileNotFoundError('"{}" does not exist'.format(file_path))
     try:
-        # 创建启动信息对象
-        startupinfo = None
-        if sys.platform == 'win32':
-            startupinfo = sp.STARTUPINFO()
-            startupinfo.dwFlags |= sp.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = sp.SW_HIDE
-        info_json = json.loads(sp.check_output([mkvmerge_path, '-J', file_path],
-                                               startupinfo=startupinfo,
-                                               creationflags=sp.CREATE_NO_WINDOW | sp.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-                                               ).decode())
+        info_json = identify_file(file_path, mkvmerge_path=mkvmerge_path)
     except sp.CalledProcessError:
         raise ValueError('"{}" could not be opened')
     return info_json['container']['supported']
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# 模块都在仓库根目录下，没有安装为包
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LogManager import LogManager  # noqa: E402
+
+# 测试中的日志不写入仓库下的 logs/
+LogManager._log_dir = tempfile.mkdtemp(prefix='mergemkv-test-logs-')
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import Verification
+
+NATIVE = {'source': 'native'}
+PROBED = {'source': 'mkvmerge'}
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    """不启动 mkvmerge：直接读取和 mkvmerge -J 都换成返回固定结果的函数，并记录调用次数"""
+    calls = {'native': 0, 'probe': 0}
+
+    def read_native(file_path):
+        calls['native'] += 1
+        return NATIVE
+
+    def run_identify(file_path, mkvmerge_path, cancel=None):
+        calls['probe'] += 1
+        return PROBED
+
+    monkeypatch.setattr(Verification, '_native_readers', (read_native,))
+    async def arun_identify(file_path, mkvmerge_path):
+        calls['probe'] += 1
+        return PROBED
+
+    monkeypatch.setattr(Verification, '_run_identify', run_identify)
+    monkeypatch.setattr(Verification, '_arun_identify', arun_identify)
+    monkeypatch.setattr(Verification, 'get_mkvmerge_version', lambda mkvmerge_path='mkvmerge': '')
+    Verification.reset_identify_registry()
+    file_path = tmp_path / 'video.mkv'
+    file_path.write_bytes(b'\x1a\x45\xdf\xa3')
+    yield str(file_path), calls
+    Verification.reset_identify_registry()
+
+
+def test_second_request_is_a_registry_hit(registry):
+    file_path, calls = registry
+    assert Verification.identify_file(file_path) is NATIVE
+    assert Verification.identify_file(file_path) is NATIVE
+    assert calls == {'native': 1, 'probe': 0}
+    stats = Verification.get_identify_stats()
+    assert stats['requests'] == 2
+    assert stats['registry_hits'] == 1
+
+
+def test_native_false_is_never_served_a_native_result(registry):
+    file_path, calls = registry
+    assert Verification.identify_file(file_path) is NATIVE
+    assert Verification.identify_file(file_path, native=False) is PROBED
+    assert Verification.identify_file(file_path, native=False) is PROBED
+    assert calls == {'native': 1, 'probe': 1}
+
+
+def test_async_and_sync_share_the_registry(registry):
+    file_path, calls = registry
+    assert asyncio.run(Verification.aidentify_file(file_path)) is NATIVE
+    assert Verification.identify_file(file_path) is NATIVE
+    assert calls == {'native': 1, 'probe': 0}
+    stats = Verification.get_identify_stats()
+    assert stats['requests'] == 2
+    assert stats['registry_hits'] == 1
+
+
+def test_sync_result_is_reused_by_async(registry):
+    file_path, calls = registry
+    assert Verification.identify_file(file_path, native=False) is PROBED
+    assert asyncio.run(Verification.aidentify_file(file_path, native=False)) is PROBED
+    assert calls == {'native': 0, 'probe': 1}
+
+
+def test_async_native_false_is_never_served_a_native_result(registry):
+    file_path, calls = registry
+    assert Verification.identify_file(file_path) is NATIVE
+    assert asyncio.run(Verification.aidentify_file(file_path, native=False)) is PROBED
+    assert calls == {'native': 1, 'probe': 1}
+
+
+def test_key_changes_with_native_and_file_contents(registry):
+    file_path, _ = registry
+    key = Verification._registry_key(file_path, 'mkvmerge', True)
+    assert key != Verification._registry_key(file_path, 'mkvmerge', False)
+    with open(file_path, 'ab') as f:
+        f.write(b'\x00')
+    assert Verification._registry_key(file_path, 'mkvmerge', True) != key
+
+
+def test_missing_file_has_no_key(tmp_path):
+    assert Verification._registry_key(str(tmp_path / 'missing.mkv'), 'mkvmerge', True) is None
@@ -0,0 +1,91 @@
+import os
+
+from AtomicOutput import partial_path
+from JobJournal import STATE_DONE, STATE_FAILED, STATE_RUNNING, JobJournal
+from MergeMkv import execute_plan
+from MergePlan import MergePlan, PlannedJob
+from MuxScheduler import JOB_DONE
+
+
+def _write(path, data=b'video'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def _reopen(journal_path):
+    journal = JobJournal(journal_path)
+    journal.open(resume=True)
+    journal.close()
+    return journal
+
+
+def test_resume_skips_only_finished_unchanged_files(tmp_path):
+    done = _write(tmp_path / 'in' / 'done.mkv')
+    failed = _write(tmp_path / 'in' / 'failed.mkv')
+    interrupted = _write(tmp_path / 'in' / 'interrupted.mkv')
+    output = str(tmp_path / 'out' / 'interrupted.mkv')
+    _write(partial_path(output), b'half')
+    journal_path = str(tmp_path / 'journal.jsonl')
+
+    journal = JobJournal(journal_path)
+    journal.open()
+    journal.record(done, STATE_DONE, str(tmp_path / 'out' / 'done.mkv'), 0)
+    journal.record(failed, STATE_FAILED, str(tmp_path / 'out' / 'failed.mkv'), 2)
+    journal.record(interrupted, STATE_RUNNING, output)
+    journal.close()
+    # 被杀掉时最后一行可能只写了一半
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"input": "')
+
+    journal = _reopen(journal_path)
+    assert journal.is_done(done)
+    assert not journal.is_done(failed)
+    assert not journal.is_done(interrupted)
+    assert journal.partial_output(interrupted) == partial_path(output)
+    assert journal.summary()[STATE_DONE] == 1
+
+    # 输入文件变化后重新合并
+    _write(done, b'new video')
+    assert not _reopen(journal_path).is_done(done)
+
+
+def test_new_journal_forgets_previous_run(tmp_path):
+    done = _write(tmp_path / 'in' / 'done.mkv')
+    journal_path = str(tmp_path / 'journal.jsonl')
+    journal = JobJournal(journal_path)
+    journal.open()
+    journal.record(done, STATE_DONE, str(tmp_path / 'out' / 'done.mkv'), 0)
+    journal.close()
+
+    journal = JobJournal(journal_path)
+    journal.open(resume=False)
+    journal.close()
+    assert not journal.is_done(done)
+    assert not _reopen(journal_path).is_done(done)
+
+
+def test_execute_plan_resume_skips_completed_jobs(tmp_path):
+    # 直接复制的任务不需要 mkvmerge
+    inputs = [_write(tmp_path / 'in' / f'ep{i}.mkv', b'video %d' % i) for i in range(3)]
+    output = str(tmp_path / 'out')
+
+    def plan(files):
+        merge_plan = MergePlan(str(tmp_path / 'in'), output)
+        for index, input_file in enumerate(files):
+            merge_plan.jobs.append(PlannedJob(index=index, input_file=input_file,
+                                              output_file=os.path.join(output, os.path.basename(input_file)),
+                                              argv=[], subtitle_files=[], attachments=[], passthrough='copy'))
+        return merge_plan
+
+    first = execute_plan(plan(inputs[:2]))
+    assert [result.status for result in first] == [JOB_DONE, JOB_DONE]
+
+    # force 时不看输出清单，只有任务日志能让前两个文件被跳过
+    results = execute_plan(plan(inputs), resume=True, force=True)
+    assert [result.job.input_file for result in results] == inputs[2:]
+    assert results[0].status == JOB_DONE
+    for index, input_file in enumerate(inputs):
+        with open(os.path.join(output, os.path.basename(input_file)), 'rb') as f:
+            assert f.read() == b'video %d' % index
@@ -0,0 +1,53 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from MKVInfo import DecodeError, MkvInfo, decode
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def identification():
+    with open(os.path.join(DATA, 'identify_mkv.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('options', [{}, {'strict': False}, {'lazy': True}, {'strict': False, 'lazy': True}],
+                         ids=['strict', 'permissive', 'lazy', 'permissive-lazy'])
+def test_decode_matches_from_dict(identification, options):
+    expected = MkvInfo.from_dict(identification).to_dict()
+    assert decode(MkvInfo, identification, **options).to_dict() == expected
+
+
+def test_lazy_fields_match_eager_fields(identification):
+    eager = decode(MkvInfo, identification)
+    lazy = decode(MkvInfo, identification, lazy=True)
+    assert lazy.container.properties.title == eager.container.properties.title == '第一集'
+    assert [track.properties.codec_id for track in lazy.tracks] == \
+           [track.properties.codec_id for track in eager.tracks]
+    assert lazy.to_dict() == eager.to_dict()
+
+
+def test_wrong_type_is_rejected_like_from_dict(identification):
+    broken = copy.deepcopy(identification)
+    broken['tracks'][1]['properties']['audio_channels'] = '2'
+    with pytest.raises(AssertionError):
+        MkvInfo.from_dict(broken)
+    with pytest.raises(DecodeError):
+        decode(MkvInfo, broken)
+    assert decode(MkvInfo, broken, strict=False).tracks[1].properties.audio_channels is None
+
+
+def test_decoders_are_compiled_on_first_decode():
+    # 新的解释器中导入后还没有编译解码器，第一次 decode 时才编译
+    code = ('import json, MKVInfo\n'
+            'assert not MKVInfo._CLASS_DECODERS\n'
+            'info = MKVInfo.decode(MKVInfo.MkvInfo, json.load(open("tests/data/identify_mkv.json", encoding="utf-8")))\n'
+            'assert MKVInfo._CLASS_DECODERS and len(info.tracks) == 3\n')
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
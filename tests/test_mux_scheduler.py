@@ -0,0 +1,113 @@
+import threading
+import time
+
+from MuxScheduler import JOB_CANCELLED, JOB_DONE, JobLog, MuxJob, MuxResult, MuxScheduler
+from StorageDevices import DeviceLimits
+
+
+class FakeDevices(DeviceLimits):
+    """路径的第一段就是设备名，不访问真实的文件系统"""
+
+    def __init__(self, limits):
+        super().__init__()
+        self.limits = limits
+
+    def kind(self, device):
+        return 'test'
+
+    def limit(self, device):
+        return self.limits.get(device)
+
+    def devices_for(self, paths):
+        devices = []
+        for path in paths:
+            device = path.split('/', 1)[0]
+            if device not in devices:
+                devices.append(device)
+        return tuple(devices)
+
+
+class Recorder:
+    """记录每个设备上同时运行的任务数的最大值"""
+
+    def __init__(self, seconds=0.03):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.total = 0
+        self.peak_total = 0
+        self.started = []
+
+    def __call__(self, job):
+        devices = {path.split('/', 1)[0] for path in (job.input_file, job.output_file)}
+        with self.lock:
+            self.started.append(job.index)
+            self.total += 1
+            self.peak_total = max(self.peak_total, self.total)
+            for device in devices:
+                self.running[device] = self.running.get(device, 0) + 1
+                self.peak[device] = max(self.peak.get(device, 0), self.running[device])
+        time.sleep(self.seconds)
+        with self.lock:
+            self.total -= 1
+            for device in devices:
+                self.running[device] -= 1
+        return MuxResult(job, JOB_DONE, 0)
+
+
+def _job(index, input_file, output_file):
+    return MuxJob(index=index, input_file=input_file, output_file=output_file, command=[],
+                  subtitle_files=[], output_dir='', log=JobLog(buffered=True))
+
+
+def test_device_limits_are_never_exceeded():
+    recorder = Recorder()
+    scheduler = MuxScheduler(recorder, jobs=4, device_limits=FakeDevices({'hdd': 1, 'ssd': 2}))
+    jobs = [_job(i, f'hdd/{i}.mkv', f'out/{i}.mkv') for i in range(3)] + \
+           [_job(i, f'ssd/{i}.mkv', f'out/{i}.mkv') for i in range(3, 6)]
+    for job in jobs:
+        scheduler.submit(job)
+    results = scheduler.wait()
+
+    assert [result.job.index for result in results] == list(range(6))
+    assert all(result.status == JOB_DONE for result in results)
+    assert recorder.peak['hdd'] == 1
+    assert recorder.peak['ssd'] == 2
+    assert recorder.peak['out'] <= 4  # 没有上限的设备只受总任务数限制
+    assert recorder.peak_total <= 4
+
+
+def test_full_device_does_not_block_jobs_on_other_devices():
+    recorder = Recorder()
+    scheduler = MuxScheduler(recorder, jobs=2, device_limits=FakeDevices({'hdd': 1}))
+    for index, device in enumerate(['hdd', 'hdd', 'hdd', 'ssd']):
+        scheduler.submit(_job(index, f'{device}/{index}.mkv', f'{device}/{index}.out.mkv'))
+    scheduler.wait()
+    # 第二个任务所在的机械硬盘已满，先启动排在后面的 ssd 任务
+    assert set(recorder.started[:2]) == {0, 3}
+    assert recorder.peak['hdd'] == 1
+
+
+def test_job_occupies_both_input_and_output_devices():
+    recorder = Recorder()
+    scheduler = MuxScheduler(recorder, jobs=4, device_limits=FakeDevices({'nas': 1}))
+    scheduler.submit(_job(0, 'nas/0.mkv', 'ssd/0.mkv'))
+    scheduler.submit(_job(1, 'ssd/1.mkv', 'nas/1.mkv'))
+    scheduler.wait()
+    assert recorder.peak['nas'] == 1
+
+
+def test_cancel_drops_queued_jobs():
+    release = threading.Event()
+
+    def run(job):
+        release.wait(5)
+        return MuxResult(job, JOB_DONE, 0)
+
+    scheduler = MuxScheduler(run, jobs=2, device_limits=FakeDevices({'hdd': 1}))
+    for index in range(3):
+        scheduler.submit(_job(index, f'hdd/{index}.mkv', f'hdd/{index}.out.mkv'))
+    scheduler.cancel()
+    release.set()
+    assert [result.status for result in scheduler.wait()] == [JOB_DONE, JOB_CANCELLED, JOB_CANCELLED]
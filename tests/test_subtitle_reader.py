@@ -0,0 +1,62 @@
+import codecs
+
+import pytest
+
+import SubtitleReader
+
+ASS = '''[Script Info]
+; 中文字幕
+Title: 第一集
+ScriptType: v4.00+
+
+[V4+ Styles]
+Style: Default,微软雅黑,20
+
+[Events]
+Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,你好，世界
+'''
+
+SRT = '''1
+00:00:01,000 --> 00:00:02,000
+你好，世界
+
+2
+00:00:03,000 --> 00:00:04,000
+再見
+'''
+
+
+def _identify(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return SubtitleReader.read_identification(str(path))
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'gbk', 'big5'])
+def test_ass_without_bom(tmp_path, encoding):
+    info = _identify(tmp_path, 'ep1.ass', ASS.replace('微软雅黑', '黑体').encode(encoding))
+    assert info['container']['type'] == 'SSA/ASS subtitles'
+    assert info['tracks'][0]['properties']['codec_id'] == 'S_TEXT/ASS'
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'gbk', 'big5'])
+def test_srt_without_bom(tmp_path, encoding):
+    info = _identify(tmp_path, 'ep1.srt', SRT.encode(encoding))
+    assert info['container']['type'] == 'SRT subtitles'
+    assert info['tracks'][0]['properties']['codec_id'] == 'S_TEXT/UTF8'
+
+
+def test_ass_with_utf16_bom(tmp_path):
+    info = _identify(tmp_path, 'ep1.ass', codecs.BOM_UTF16_LE + ASS.encode('utf-16-le'))
+    assert info['tracks'][0]['properties']['codec_id'] == 'S_TEXT/ASS'
+
+
+def test_header_cut_inside_a_multibyte_character(tmp_path, monkeypatch):
+    data = ASS.encode('utf-8')
+    monkeypatch.setattr(SubtitleReader, 'HEADER_BYTES', data.index('第'.encode('utf-8')) + 1)
+    assert _identify(tmp_path, 'ep1.ass', data)['tracks'][0]['properties']['codec_id'] == 'S_TEXT/ASS'
+
+
+def test_unrecognized_text_falls_back(tmp_path):
+    assert _identify(tmp_path, 'notes.srt', '随便写的文字'.encode('gbk')) is None
+    assert _identify(tmp_path, 'ep1.txt', ASS.encode('utf-8')) is None
@@ -1,5 +1,6 @@
 import os
 import platform
+import shutil
 import subprocess
 import logging
 import sys
@@ -27,23 +28,53 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(os.path.dirname(__file__))
     return os.path.join(base_path, relative_path)
 
+def hidden_window_kwargs() -> dict:
+    """
+    获取在 Windows 上隐藏子进程控制台窗口所需的参数
+    
+    Returns:
+        dict: 可直接传给 subprocess.Popen 或 asyncio.create_subprocess_exec 的参数，其他平台返回空字典
+    """
+    if sys.platform != 'win32':
+        return {}
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return {
+        'startupinfo': startupinfo,
+        'creationflags': subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP,
+    }
+
 def get_mkvmerge_path() -> str:
     """
     获取mkvmerge可执行文件的路径，使用缓存避免重复查找
     
+    上次查找到的路径记录在 MkvmergeCache 中，可执行文件未变化时不再重新查找
+    
     Returns:
         str: mkvmerge可执行文件的完整路径，如果未找到则返回'mkvmerge'
-        
-    Note:
-        Windows: 从注册表和常见安装路径查找MKVToolNix
-        macOS: 从常见安装路径查找
-        Linux: 使用系统包管理器安装的版本
     """
     global _mkvmerge_path_cache
     
     if _mkvmerge_path_cache is not None:
         return _mkvmerge_path_cache
+    
+    from MkvmergeCache import MkvmergeCache
+    _mkvmerge_path_cache = MkvmergeCache.get_instance().get_default_path(discover_mkvmerge_path)
+    return _mkvmerge_path_cache
+
+def discover_mkvmerge_path() -> str:
+    """
+    查找mkvmerge可执行文件的路径，不使用缓存
+    
+    Returns:
+        str: mkvmerge可执行文件的完整路径，如果未找到则返回'mkvmerge'
         
+    Note:
+        Windows: 从注册表和常见安装路径查找MKVToolNix
+        macOS: 从常见安装路径查找
+        Linux: 使用系统包管理器安装的版本
+    """
     logger.info("开始查找 mkvmerge 路径...")
     
     system = platform.system()
@@ -60,7 +91,6 @@ def get_mkvmerge_path() -> str:
                     mkvmerge_path = os.path.join(install_path, 'mkvmerge.exe')
                     if os.path.exists(mkvmerge_path):
                         logger.info(f"从64位注册表找到 mkvmerge: {mkvmerge_path}")
-                        _mkvmerge_path_cache = mkvmerge_path
                         return mkvmerge_path
             except Exception:
                 logger.debug("64位注册表查找失败，尝试32位注册表")
@@ -73,7 +103,6 @@ def get_mkvmerge_path() -> str:
                         mkvmerge_path = os.path.join(install_path, 'mkvmerge.exe')
                         if os.path.exists(mkvmerge_path):
                             logger.info(f"从32位注册表找到 mkvmerge: {mkvmerge_path}")
-                            _mkvmerge_path_cache = mkvmerge_path
                             return mkvmerge_path
                 except Exception:
                     logger.debug("注册表查找失败")
@@ -91,7 +120,6 @@ def get_mkvmerge_path() -> str:
                 mkvmerge_path = os.path.join(path, 'mkvmerge.exe')
                 if os.path.exists(mkvmerge_path):
                     logger.info(f"在常见路径找到 mkvmerge: {mkvmerge_path}")
-                    _mkvmerge_path_cache = mkvmerge_path
                     return mkvmerge_path
                     
         except ImportError:
@@ -110,27 +138,17 @@ def get_mkvmerge_path() -> str:
             mkvmerge_path = os.path.join(path, 'mkvmerge')
             if os.path.exists(mkvmerge_path):
                 logger.info(f"在 macOS 路径找到 mkvmerge: {mkvmerge_path}")
-                _mkvmerge_path_cache = mkvmerge_path
                 return mkvmerge_path
     
-    # 在PATH中查找mkvmerge
+    # 在PATH中查找mkvmerge，不启动 which/where 进程
     logger.debug("在系统PATH中查找mkvmerge...")
-    try:
-        if system == 'Windows':
-            result = subprocess.run(['where', 'mkvmerge'], capture_output=True, text=True)
-        else:
-            result = subprocess.run(['which', 'mkvmerge'], capture_output=True, text=True)
-        if result.returncode == 0:
-            mkvmerge_path = result.stdout.strip().split('\n')[0]
-            logger.info(f"在PATH中找到 mkvmerge: {mkvmerge_path}")
-            _mkvmerge_path_cache = mkvmerge_path
-            return mkvmerge_path
-    except Exception as e:
-        logger.debug(f"PATH查找失败: {str(e)}")
+    mkvmerge_path = shutil.which('mkvmerge')
+    if mkvmerge_path is not None:
+        logger.info(f"在PATH中找到 mkvmerge: {mkvmerge_path}")
+        return mkvmerge_path
     
     logger.warning("未找到 mkvmerge，将使用默认值 'mkvmerge'")
-    _mkvmerge_path_cache = 'mkvmerge'
-    return _mkvmerge_path_cache
+    return 'mkvmerge'
 
 def verify_mkvmerge(mkvmerge_path: str) -> bool:
     """
@@ -142,14 +160,11 @@ def verify_mkvmerge(mkvmerge_path: str) -> bool:
     Returns:
         bool: 如果mkvmerge可用返回True，否则返回False
     """
-    try:
-        result = subprocess.run([mkvmerge_path, '--version'], 
-                              capture_output=True, 
-                              text=True)
-        if result.returncode == 0 and 'mkvmerge' in result.stdout.lower():
-            logger.info(f"验证mkvmerge成功: {mkvmerge_path}")
-            logger.debug(f"mkvmerge版本信息: {result.stdout.strip()}")
-            return True
-    except Exception as e:
-        logger.error(f"验证mkvmerge失败: {str(e)}")
+    from MkvmergeCache import MkvmergeCache
+    info = MkvmergeCache.get_instance().probe(mkvmerge_path)
+    if info.verified:
+        logger.info(f"验证mkvmerge成功: {mkvmerge_path}")
+        logger.debug(f"mkvmerge版本信息: {info.version}")
+        return True
+    logger.error(f"验证mkvmerge失败: {mkvmerge_path}")
     return False 
\ No newline at end of file